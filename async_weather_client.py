@@ -0,0 +1,183 @@
+"""
+中央氣象署天氣資料非同步 API 客戶端
+以 asyncio 包裝 WeatherAPIClient，可同時抓取多個資料集或多組 API 金鑰
+"""
+import asyncio
+from typing import Optional, List, Dict, Any, Sequence
+from database import WeatherDatabase
+from forecast_snapshot import ForecastSnapshot
+from weather_records import WeatherBatch, WeatherRecord
+from weather_crawler import WeatherAPIClient
+
+
+class AsyncWeatherAPIClient:
+    """
+    中央氣象署開放資料非同步 API 客戶端
+
+    網路請求與解析在執行緒中進行（requests 為同步函式庫），
+    以 semaphore 限制同時進行的下載數；資料庫寫入同樣移至執行緒並依序執行，
+    不會阻塞事件迴圈。
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        use_database: bool = True,
+        max_concurrency: int = 4,
+        semaphore: Optional[asyncio.Semaphore] = None,
+        dataset_id: Optional[str] = None
+    ):
+        """
+        初始化非同步 API 客戶端
+
+        Args:
+            api_key: CWA API 授權金鑰，若未提供則從環境變數讀取
+            use_database: 是否啟用資料庫儲存功能
+            max_concurrency: 同時進行的下載數上限
+            semaphore: 與其他客戶端共用的併發限制，提供時忽略 max_concurrency
+            dataset_id: 資料集代碼，未提供則為 WeatherAPIClient.DATASET_ID
+        """
+        # 資料庫寫入由本類別統一處理，內部同步客戶端不直接寫入
+        self._client = WeatherAPIClient(api_key=api_key, use_database=False, dataset_id=dataset_id)
+        self.db = WeatherDatabase() if use_database else None
+        self._semaphore = semaphore or asyncio.Semaphore(max_concurrency)
+        # 同步客戶端的 Session 與快照狀態一次只允許一個執行緒使用
+        self._client_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+
+    @property
+    def api_key(self) -> str:
+        return self._client.api_key
+
+    @property
+    def dataset_id(self) -> str:
+        return self._client.dataset_id
+
+    async def _run(self, func, *args):
+        """在執行緒中呼叫同步客戶端的方法"""
+        async with self._semaphore, self._client_lock:
+            return await asyncio.to_thread(func, *args)
+
+    async def _write(self, func, *args):
+        """在執行緒中依序執行資料庫寫入"""
+        async with self._write_lock:
+            return await asyncio.to_thread(func, *args)
+
+    async def fetch_weather_data(self) -> Optional[Dict[str, Any]]:
+        """
+        取得完整的天氣預報資料
+
+        Returns:
+            Dict: 完整的 JSON 資料，失敗則返回 None
+        """
+        return await self._run(self._client.fetch_weather_data)
+
+    async def get_snapshot(self) -> Optional[ForecastSnapshot]:
+        """
+        取得目前的預報快照，過期或尚未下載時才重新取得
+
+        Returns:
+            ForecastSnapshot: 預報快照，失敗則返回 None
+        """
+        return await self._run(self._client.get_snapshot)
+
+    async def get_locations(self) -> List[str]:
+        """
+        取得所有可用地點的清單
+
+        Returns:
+            List[str]: 地點名稱清單，按字母順序排序
+        """
+        snapshot = await self.get_snapshot()
+        return snapshot.get_locations() if snapshot else []
+
+    async def get_temperature_info(self, location_name: str) -> Optional[WeatherRecord]:
+        """
+        取得特定地點的溫度資訊
+
+        Args:
+            location_name: 地點名稱（如「臺北市」）
+
+        Returns:
+            WeatherRecord: 溫度資訊，失敗則返回 None
+        """
+        # 如果啟用資料庫，先檢查快取
+        if self.db:
+            cached_data = await asyncio.to_thread(self.db.get_fresh_data, location_name, 10, self.dataset_id)
+            if cached_data:
+                return cached_data
+
+        snapshot = await self.get_snapshot()
+        if not snapshot:
+            return None
+
+        result = snapshot.get_temperature_info(location_name)
+        if result and self.db and result['location'] not in snapshot.persisted_locations:
+            snapshot.persisted_locations.add(result['location'])
+            await self._write(
+                self.db.insert_weather_data,
+                result['location'], result['date'], result['max_temp'],
+                result['min_temp'], result['weather'], self.dataset_id
+            )
+        return result
+
+    async def get_all_locations_data(self) -> WeatherBatch:
+        """
+        取得所有地點的溫度資訊，並以單一交易寫入資料庫
+
+        Returns:
+            WeatherBatch: 所有地點的溫度資訊，失敗則為空批次
+        """
+        snapshot = await self.get_snapshot()
+        if not snapshot:
+            return WeatherBatch()
+
+        results = snapshot.get_all_locations_data()
+        pending = [item for item in results if item['location'] not in snapshot.persisted_locations]
+        if self.db and pending:
+            counts = await self._write(self.db.insert_many, pending, self.dataset_id)
+            if counts is not None:
+                snapshot.persisted_locations.update(item['location'] for item in pending)
+        if self.db and not snapshot.forecast_persisted:
+            if await self._write(self.db.insert_forecast, snapshot.forecast_table, snapshot.issue_time, self.dataset_id) >= 0:
+                snapshot.forecast_persisted = True
+        return results
+
+
+async def gather_all_locations_data(
+    clients: Sequence[AsyncWeatherAPIClient]
+) -> List[WeatherBatch]:
+    """
+    同時取得多個客戶端（不同資料集或 API 金鑰）的所有地點資料
+
+    併發數由各客戶端的 semaphore 控制；要讓多個客戶端共用同一個上限，
+    建立時傳入同一個 semaphore。
+
+    Args:
+        clients: 非同步客戶端列表
+
+    Returns:
+        List[WeatherBatch]: 與 clients 順序對應的結果，失敗者為空批次
+    """
+    results = await asyncio.gather(
+        *(client.get_all_locations_data() for client in clients),
+        return_exceptions=True
+    )
+    output = []
+    for result in results:
+        if isinstance(result, BaseException):
+            print(f"✗ 取得資料時發生錯誤: {result}")
+            output.append(WeatherBatch())
+        else:
+            output.append(result)
+    return output
+
+
+if __name__ == "__main__":
+    # 測試非同步 API 客戶端
+    async def _demo():
+        client = AsyncWeatherAPIClient()
+        all_data = await client.get_all_locations_data()
+        print(f"✓ 成功取得資訊: {len(all_data)} 筆資料")
+
+    asyncio.run(_demo())
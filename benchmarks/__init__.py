@@ -0,0 +1,4 @@
+"""
+效能基準測試
+以記錄的 CWA 資料與本機替身伺服器離線量測下載、解析、寫入與查詢的耗時
+"""
@@ -0,0 +1,122 @@
+"""
+基準測試資料
+載入 fixtures/ 中的 CWA 資料，並依指定的地點數與天數合成放大版本
+"""
+import copy
+import json
+import os
+from datetime import date, timedelta
+from typing import Dict, Any, List, Tuple
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def fixture_path(dataset_id: str = "F-A0010-001") -> str:
+    """
+    取得資料集的 fixture 檔案路徑
+
+    Args:
+        dataset_id: 資料集代碼
+
+    Returns:
+        str: 檔案路徑
+    """
+    return os.path.join(FIXTURE_DIR, f"{dataset_id}.json")
+
+
+def load_fixture(dataset_id: str = "F-A0010-001") -> Dict[str, Any]:
+    """
+    載入記錄的 CWA 回應
+
+    Args:
+        dataset_id: 資料集代碼
+
+    Returns:
+        Dict: 完整的 JSON 資料
+    """
+    with open(fixture_path(dataset_id), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def location_list(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """取得 F-A0010-001 資料中的 location 陣列"""
+    return (payload['cwaopendata']['resources']['resource']['data']
+            ['agrWeatherForecasts']['weatherForecasts']['location'])
+
+
+def scale_payload(payload: Dict[str, Any], locations: int, days: int) -> Dict[str, Any]:
+    """
+    以記錄的資料為樣板，合成指定地點數與天數的資料
+
+    地點名稱為「原地點名稱-序號」，每日數值沿用樣板中同一天序的資料，
+    超出樣板天數的部分循環使用，溫度加上與序號相關的小幅偏移，使各地點資料不完全相同。
+
+    Args:
+        payload: 樣板資料（F-A0010-001 格式）
+        locations: 合成的地點數
+        days: 每個地點的預報天數
+
+    Returns:
+        Dict: 合成後的完整 JSON 資料
+    """
+    scaled = copy.deepcopy(payload)
+    templates = location_list(payload)
+    first_date = date.fromisoformat(templates[0]['weatherElements']['MaxT']['daily'][0]['dataDate'])
+    dates = [(first_date + timedelta(days=k)).isoformat() for k in range(days)]
+
+    generated = []
+    for index in range(locations):
+        template = templates[index % len(templates)]
+        offset = (index // len(templates)) % 5 - 2
+        elements = {}
+        for element, body in template['weatherElements'].items():
+            daily = body['daily']
+            entries = []
+            for k, day in enumerate(dates):
+                entry = dict(daily[k % len(daily)], dataDate=day)
+                if 'temperature' in entry:
+                    entry['temperature'] = str(int(entry['temperature']) + offset)
+                entries.append(entry)
+            elements[element] = {'daily': entries}
+        generated.append({
+            'locationName': f"{template['locationName']}-{index:05d}",
+            'weatherElements': elements,
+        })
+
+    (scaled['cwaopendata']['resources']['resource']['data']
+     ['agrWeatherForecasts']['weatherForecasts']['location']) = generated
+    return scaled
+
+
+def encode(payload: Dict[str, Any]) -> bytes:
+    """
+    將資料編碼為 CWA 回應的位元組內容
+
+    Args:
+        payload: 完整的 JSON 資料
+
+    Returns:
+        bytes: UTF-8 JSON
+    """
+    return json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+
+def history_rows(payload: Dict[str, Any]) -> List[Tuple[str, str, float, float, str]]:
+    """
+    將每個地點的每日預報轉為 weather_data 資料列，用於模擬多日累積的歷史資料
+
+    Args:
+        payload: 完整的 JSON 資料（F-A0010-001 格式）
+
+    Returns:
+        List[tuple]: (location, date, max_temp, min_temp, weather)
+    """
+    rows = []
+    for loc in location_list(payload):
+        elements = loc['weatherElements']
+        for wx, max_t, min_t in zip(elements['Wx']['daily'], elements['MaxT']['daily'], elements['MinT']['daily']):
+            rows.append((
+                loc['locationName'], wx['dataDate'],
+                float(max_t['temperature']), float(min_t['temperature']), wx['weather']
+            ))
+    return rows
@@ -0,0 +1,38 @@
+"""
+記錄 CWA API 回應作為基準測試資料
+
+用法（於專案根目錄執行，需要網路與 API 金鑰）:
+    python -m benchmarks.record
+"""
+import json
+import sys
+
+from benchmarks.payloads import fixture_path
+from weather_crawler import WeatherAPIClient
+
+
+def record(dataset_id: str = WeatherAPIClient.DATASET_ID) -> bool:
+    """
+    下載資料集並覆寫 fixtures/ 中的檔案
+
+    Args:
+        dataset_id: 資料集代碼
+
+    Returns:
+        bool: 成功返回 True
+    """
+    # 資料集須在建立時指定，解碼結構、斷路器、快取鍵與監控標籤才會對應同一個資料集
+    client = WeatherAPIClient(use_database=False, use_shared_cache=False, dataset_id=dataset_id)
+    data = client.fetch_weather_data()
+    if data is None:
+        return False
+
+    path = fixture_path(dataset_id)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"✓ 已記錄 {dataset_id}: {path}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if record(*sys.argv[1:2]) else 1)
@@ -0,0 +1,355 @@
+"""
+效能基準測試執行程式
+
+以 fixtures/ 中的 F-A0010-001 資料合成指定規模的資料，透過本機替身伺服器提供，
+分別量測下載、解析、擷取、寫入、查詢與完整爬取的耗時與峰值記憶體，
+並與 baseline.json 比較，超出容許範圍時以非零狀態碼結束。
+
+用法（於專案根目錄執行）:
+    python -m benchmarks.run
+    python -m benchmarks.run --locations 5000 --days 14 --repeat 7
+    python -m benchmarks.run --update-baseline
+"""
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, Any, List, Optional
+from urllib.parse import quote
+
+from benchmarks.payloads import load_fixture, scale_payload, encode, history_rows
+from benchmarks.stub_server import StubCWAServer
+from database import WeatherDatabase
+from datasets import get_dataset
+from forecast_snapshot import ForecastSnapshot
+from forecast_table import extract_forecast_table
+from payload_decoder import decode_payload
+from weather_api_server import WeatherAPIServer
+from weather_crawler import WeatherAPIClient
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# 比較時容許的最小絕對差異（秒、KB）
+NOISE_FLOOR = {'median_s': 0.002, 'peak_kb': 64.0}
+
+
+class BenchContext:
+    """各測試項目共用的資料、替身伺服器與暫存目錄"""
+
+    def __init__(self, locations: int, days: int):
+        self.locations = locations
+        self.days = days
+        self.payload = scale_payload(load_fixture(), locations, days)
+        self.body = encode(self.payload)
+        self.workdir = tempfile.mkdtemp(prefix="weather-bench-")
+        self.server = StubCWAServer({WeatherAPIClient.DATASET_ID: self.body}).start()
+        self._db_count = 0
+        # 測試項目啟動的其他資源（如 API 伺服器）的關閉函式
+        self.cleanup: List[Callable[[], None]] = []
+
+    def client(self, db: Optional[WeatherDatabase] = None) -> WeatherAPIClient:
+        """建立指向替身伺服器、不使用共用快取的客戶端"""
+        client = WeatherAPIClient(api_key="BENCH", use_database=False, use_shared_cache=False)
+        client.BASE_URL = self.server.base_url
+        if db is not None:
+            client.use_database = True
+            client.db = db
+        return client
+
+    def database(self) -> WeatherDatabase:
+        """在暫存目錄建立新的資料庫"""
+        self._db_count += 1
+        return WeatherDatabase(os.path.join(self.workdir, f"bench-{self._db_count}.db"))
+
+    def close(self):
+        for close in self.cleanup:
+            close()
+        self.server.stop()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+# ---- 測試項目：每個函式完成準備工作後返回要計時的函式 ----
+
+def bench_fetch(ctx: BenchContext) -> Callable[[], Any]:
+    """完整下載並解碼 JSON（不帶條件式標頭）"""
+    client = ctx.client()
+
+    def run():
+        client._last_payload = None
+        client._validators = {}
+        assert client.fetch_weather_data() is not None
+    return run
+
+
+def bench_fetch_not_modified(ctx: BenchContext) -> Callable[[], Any]:
+    """條件式下載，伺服器回應 304"""
+    client = ctx.client()
+    client.fetch_weather_data()
+
+    def run():
+        client.fetch_weather_data()
+        assert not client.last_fetch_changed
+    return run
+
+
+def bench_parse(ctx: BenchContext) -> Callable[[], Any]:
+    """以標準函式庫解碼 JSON 位元組"""
+    body = ctx.body
+    return lambda: json.loads(body)
+
+
+def bench_decode(ctx: BenchContext) -> Callable[[], Any]:
+    """以客戶端的解碼路徑（msgspec/orjson，含結構驗證）解碼 JSON 位元組"""
+    body = ctx.body
+    dataset = get_dataset(WeatherAPIClient.DATASET_ID)
+    return lambda: decode_payload(body, dataset)
+
+
+def bench_snapshot(ctx: BenchContext) -> Callable[[], Any]:
+    """由已解碼的資料建立預報快照（索引）"""
+    payload = ctx.payload
+    return lambda: ForecastSnapshot(payload)
+
+
+def bench_extract(ctx: BenchContext) -> Callable[[], Any]:
+    """擷取各地點第一天資料與完整多日預報表（快照會保存摘要，每次建立新的快照）"""
+    payload = ctx.payload
+
+    def run():
+        snapshot = ForecastSnapshot(payload)
+        snapshot.get_all_locations_data()
+        extract_forecast_table(snapshot.locations)
+    return run
+
+
+def bench_upsert(ctx: BenchContext) -> Callable[[], Any]:
+    """批次寫入各地點第一天資料（重複爬取時的穩定狀態）"""
+    db = ctx.database()
+    rows = ForecastSnapshot(ctx.payload).get_all_locations_data()
+    return lambda: db.insert_many(rows)
+
+
+def bench_upsert_forecast(ctx: BenchContext) -> Callable[[], Any]:
+    """批次寫入完整多日預報"""
+    db = ctx.database()
+    table = extract_forecast_table(ForecastSnapshot(ctx.payload).locations)
+    return lambda: db.insert_forecast(table, "2025-12-04T11:00:00+08:00")
+
+
+def bench_latest(ctx: BenchContext) -> Callable[[], Any]:
+    """在多日歷史資料中查詢各地點最新一筆"""
+    db = ctx.database()
+    db.insert_many(history_rows(ctx.payload))
+    return db.get_all_latest_data
+
+
+def bench_crawl(ctx: BenchContext) -> Callable[[], Any]:
+    """完整爬取：下載、建立快照、寫入資料庫（每次使用新的客戶端與資料庫）"""
+    def run():
+        client = ctx.client(ctx.database())
+        assert client.fetch_snapshot() is not None
+        assert client.get_all_locations_data()
+        client.db.close()
+    return run
+
+
+def bench_api(ctx: BenchContext) -> Callable[[], Any]:
+    """HTTP API 以保持連線的單一連線依序查詢 1000 次各地點目前資料與預報（gzip）"""
+    server = WeatherAPIServer(ctx.client(), db=ctx.database(), port=0).start()
+    ctx.cleanup.append(server.shutdown)
+    host, port = server.address
+    names = ForecastSnapshot(ctx.payload).get_locations()[:100]
+    paths = [f"/{endpoint}/{quote(name)}" for name in names for endpoint in ('locations', 'forecast')]
+
+    def run():
+        conn = http.client.HTTPConnection(host, port)
+        for i in range(1000):
+            conn.request('GET', paths[i % len(paths)], headers={'Accept-Encoding': 'gzip'})
+            response = conn.getresponse()
+            response.read()
+            assert response.status == 200
+        conn.close()
+    return run
+
+
+CASES: Dict[str, Callable[[BenchContext], Callable[[], Any]]] = {
+    'fetch': bench_fetch,
+    'fetch_not_modified': bench_fetch_not_modified,
+    'parse': bench_parse,
+    'decode': bench_decode,
+    'snapshot': bench_snapshot,
+    'extract': bench_extract,
+    'upsert': bench_upsert,
+    'upsert_forecast': bench_upsert_forecast,
+    'latest': bench_latest,
+    'crawl': bench_crawl,
+    'api': bench_api,
+}
+
+
+def measure(func: Callable[[], Any], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    """
+    量測函式的耗時與峰值記憶體
+
+    耗時為 repeat 次的中位數與最小值；峰值記憶體另以 tracemalloc 執行一次量測，
+    避免追蹤的額外負擔影響耗時。
+
+    Args:
+        func: 要量測的函式
+        repeat: 計時次數
+        warmup: 計時前的暖機次數
+
+    Returns:
+        Dict: {'median_s', 'min_s', 'peak_kb'}
+    """
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'median_s': round(statistics.median(timings), 6),
+        'min_s': round(min(timings), 6),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def run_cases(names: List[str], locations: int, days: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    執行指定的測試項目
+
+    Args:
+        names: 測試項目名稱
+        locations: 合成的地點數
+        days: 每個地點的預報天數
+        repeat: 每個項目的計時次數
+
+    Returns:
+        Dict: 項目名稱 → 量測結果
+    """
+    ctx = BenchContext(locations, days)
+    results = {}
+    try:
+        for name in names:
+            # 客戶端與資料庫的進度訊息不影響量測，暫時隱藏
+            with contextlib.redirect_stdout(io.StringIO()):
+                func = CASES[name](ctx)
+                result = measure(func, repeat)
+            results[name] = result
+            print(
+                f"  {name:<20} 中位數 {result['median_s'] * 1000:10.2f} ms"
+                f"  最小 {result['min_s'] * 1000:10.2f} ms"
+                f"  峰值記憶體 {result['peak_kb']:10.1f} KB"
+            )
+    finally:
+        ctx.close()
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    與基準結果比較
+
+    Args:
+        results: 本次量測結果
+        baseline: baseline.json 的內容
+        tolerance: 容許的增加比例（0.5 表示可比基準慢或多用 50%）
+
+    Returns:
+        List[str]: 退步項目的說明，沒有退步則為空列表
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            continue
+        for metric, floor in NOISE_FLOOR.items():
+            # 極短耗時與極少記憶體的項目以絕對下限避免雜訊誤判
+            limit = max(base[metric] * (1 + tolerance), base[metric] + floor)
+            if result[metric] > limit:
+                regressions.append(
+                    f"{name}.{metric}: {result[metric]} > {limit:.6g}（基準 {base[metric]}）"
+                )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="天氣資料處理效能基準測試")
+    parser.add_argument("--locations", type=int, default=2000, help="合成的地點數")
+    parser.add_argument("--days", type=int, default=14, help="每個地點的預報天數")
+    parser.add_argument("--repeat", type=int, default=5, help="每個項目的計時次數")
+    parser.add_argument("--cases", default=",".join(CASES), help="要執行的項目（逗號分隔）")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="基準結果檔案")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="容許的退步比例")
+    parser.add_argument("--update-baseline", action="store_true", help="以本次結果覆寫基準檔案")
+    parser.add_argument("--output", default=None, help="將本次結果寫入 JSON 檔案")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.cases.split(",") if name.strip()]
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error(f"未知的測試項目: {', '.join(unknown)}（可用: {', '.join(CASES)}）")
+
+    print(f"📊 效能基準測試：{args.locations} 個地點 × {args.days} 天，每項 {args.repeat} 次")
+    report = {
+        'scale': {'locations': args.locations, 'days': args.days},
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'results': run_cases(names, args.locations, args.days, args.repeat),
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"✓ 已更新基準結果: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("⚠ 找不到基準結果，略過比較（可使用 --update-baseline 建立）")
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('scale') != report['scale']:
+        print(f"⚠ 基準結果的資料規模不同（{baseline.get('scale')}），略過比較")
+        return 0
+
+    regressions = compare(report['results'], baseline, args.tolerance)
+    if regressions:
+        print(f"✗ 效能退步（容許 {args.tolerance:.0%}）:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"✓ 與基準結果相比沒有超過 {args.tolerance:.0%} 的退步")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+CWA 開放資料 API 的本機替身伺服器
+以固定內容回應 /fileapi/v1/opendataapi/<資料集代碼>，支援 ETag 條件式請求
+"""
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+
+class StubCWAServer:
+    """
+    本機 CWA API 替身
+
+    用法:
+        with StubCWAServer({'F-A0010-001': body}) as server:
+            client.BASE_URL = server.base_url
+    """
+
+    def __init__(
+        self,
+        bodies: Dict[str, bytes],
+        latency_seconds: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        """
+        初始化替身伺服器
+
+        Args:
+            bodies: 資料集代碼 → 回應內容
+            latency_seconds: 每次回應前的模擬延遲（秒）
+            host: 監聽位址
+            port: 監聽埠號，0 表示自動選擇
+        """
+        self.bodies = dict(bodies)
+        self.latency_seconds = latency_seconds
+        self.requests = 0
+        self.not_modified = 0
+        self._etags = {key: self._etag(body) for key, body in self.bodies.items()}
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """與 WeatherAPIClient.BASE_URL 對應的網址"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/fileapi/v1/opendataapi"
+
+    def set_body(self, dataset_id: str, body: bytes):
+        """
+        替換資料集的回應內容（模擬預報更新）
+
+        Args:
+            dataset_id: 資料集代碼
+            body: 新的回應內容
+        """
+        self.bodies[dataset_id] = body
+        self._etags[dataset_id] = self._etag(body)
+
+    def start(self) -> "StubCWAServer":
+        """以背景 daemon 執行緒啟動伺服器"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-cwa", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止伺服器"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubCWAServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @staticmethod
+    def _etag(body: bytes) -> str:
+        return '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stub.requests += 1
+                if stub.latency_seconds:
+                    time.sleep(stub.latency_seconds)
+
+                dataset_id = self.path.split('?', 1)[0].rstrip('/').rsplit('/', 1)[-1]
+                body = stub.bodies.get(dataset_id)
+                if body is None:
+                    self.send_error(404)
+                    return
+
+                etag = stub._etags[dataset_id]
+                if self.headers.get('If-None-Match') == etag:
+                    stub.not_modified += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -2,8 +2,12 @@
 完整天氣資料爬蟲腳本
 從 CWA API 取得所有地點的天氣資料並儲存到資料庫
 """
+import argparse
+import time
 from weather_crawler import WeatherAPIClient
-from database import WeatherDatabase
+from metrics import metrics, PrometheusFileSink, start_metrics_server
+
+metrics.describe('weather_crawl_seconds', "一次完整爬取（下載、解析與寫入資料庫）的耗時（秒）")
 
 
 def crawl_all_weather_data():
@@ -15,6 +19,16 @@ def crawl_all_weather_data():
     # 初始化客戶端（啟用資料庫）
     client = WeatherAPIClient(use_database=True)
     
+    # 下載一次完整資料，後續查詢皆由記憶體中的快照提供
+    print("\n📥 下載天氣預報資料...")
+    snapshot = client.fetch_snapshot()
+    
+    if not snapshot:
+        print("✗ 無法取得天氣預報資料")
+        return
+    
+    print(f"✓ 預報發布時間: {snapshot.issue_time or '未知'}")
+    
     # 取得所有地點清單
     print("\n📍 取得地點清單...")
     locations = client.get_locations()
@@ -26,14 +40,15 @@ def crawl_all_weather_data():
     print(f"✓ 找到 {len(locations)} 個地點")
     print(f"地點列表: {', '.join(locations)}")
     
-    # 逐一取得每個地點的天氣資料
-    print(f"\n🌤️ 開始爬取所有地點的天氣資料...")
+    # 由快照一次取得所有地點的天氣資料並儲存
+    print(f"\n🌤️ 開始處理所有地點的天氣資料...")
+    all_data = {item['location']: item for item in client.get_all_locations_data()}
     success_count = 0
     fail_count = 0
     
     for i, location in enumerate(locations, 1):
         print(f"\n[{i}/{len(locations)}] 正在處理: {location}")
-        temp_info = client.get_temperature_info(location)
+        temp_info = all_data.get(location)
         
         if temp_info:
             print(f"  ✓ 成功: {location}")
@@ -62,5 +77,134 @@ def crawl_all_weather_data():
         print(f"  資料庫大小: {stats.get('db_size_kb', 0)} KB")
 
 
+def cron_crawl(min_age_minutes: int = 10) -> bool:
+    """
+    排程爬取：資料仍新鮮時直接結束（不發送請求，也不載入 requests），否則下載並寫入資料庫
+    
+    只輸出一行摘要，適合由 cron 呼叫。
+    
+    Args:
+        min_age_minutes: 資料庫最近更新在此分鐘數內時略過爬取
+    
+    Returns:
+        bool: 成功（含略過）返回 True
+    """
+    # 建立客戶端不會載入 requests，第一次發送請求時才載入
+    client = WeatherAPIClient(use_database=True, use_shared_cache=False)
+    if min_age_minutes > 0 and client.db.has_recent_update(min_age_minutes, client.dataset_id):
+        print(f"✓ 資料在 {min_age_minutes} 分鐘內已更新，略過")
+        return True
+    
+    snapshot = client.fetch_snapshot()
+    if not snapshot:
+        print("✗ 無法取得天氣預報資料")
+        return False
+    
+    results = client.get_all_locations_data()
+    print(f"✓ 預報發布時間 {snapshot.issue_time or '未知'}，已處理 {len(results)} 個地點")
+    return bool(results)
+
+
+def pipeline_crawl(dataset_ids, workers: int = None, io_workers: int = 4) -> bool:
+    """
+    以多行程管線爬取多個資料集：並行下載、子行程解析與擷取、單一寫入者寫入資料庫
+    
+    Args:
+        dataset_ids: 資料集代碼
+        workers: 解析行程數，未提供則為 CPU 核心數
+        io_workers: 同時進行的下載數
+    
+    Returns:
+        bool: 所有資料集皆成功返回 True
+    """
+    from crawl_pipeline import CrawlPipeline
+    
+    pipeline = CrawlPipeline(dataset_ids, workers=workers, io_workers=io_workers)
+    print(
+        f"🚀 管線爬取 {len(pipeline.dataset_ids)} 個資料集"
+        f"（解析行程 {pipeline.workers}、同時下載 {pipeline.io_workers}）"
+    )
+    report = pipeline.run()
+    
+    for result in report['results']:
+        mark = "✓" if result['ok'] else "✗"
+        print(
+            f"  {mark} {result['dataset']}: {result['locations']} 個地點、"
+            f"{result['forecast_rows']} 筆預報（發布時間 {result['issue_time'] or '未知'}）"
+        )
+    if report['failed']:
+        print(f"✗ 失敗: {', '.join(report['failed'])}")
+    print(f"📊 完成 {len(report['results'])} 個資料集，耗時 {report['seconds']:.1f} 秒")
+    return not report['failed']
+
+
+def watch(interval_seconds: float = None):
+    """
+    以常駐模式執行：在快照過期前定期更新快照與資料庫
+    
+    Args:
+        interval_seconds: 更新間隔（秒），未提供則為快照有效期限的 80%
+    """
+    from refresh_scheduler import RefreshScheduler
+    
+    scheduler = RefreshScheduler(WeatherAPIClient(use_database=True), interval_seconds=interval_seconds)
+    print(f"🔁 常駐更新模式，間隔約 {scheduler.interval_seconds:.0f} 秒（Ctrl+C 結束）")
+    try:
+        while True:
+            delay = scheduler.run_once()
+            status = scheduler.status()
+            print(
+                f"  最近成功: {status['last_success'] or '尚無'}，"
+                f"連續失敗: {status['consecutive_failures']}，"
+                f"下次更新: {delay:.0f} 秒後"
+            )
+            metrics.flush()
+            time.sleep(delay)
+    except KeyboardInterrupt:
+        print("\n已停止常駐更新")
+
+
 if __name__ == "__main__":
-    crawl_all_weather_data()
+    parser = argparse.ArgumentParser(description="爬取中央氣象署天氣資料並儲存到資料庫")
+    parser.add_argument("--watch", action="store_true", help="常駐執行，在快取過期前定期更新")
+    parser.add_argument("--interval", type=float, default=None, help="常駐模式的更新間隔（秒）")
+    parser.add_argument("--cron", action="store_true", help="精簡模式：資料仍新鮮時略過，只輸出一行摘要")
+    parser.add_argument("--min-age", type=int, default=10, help="精簡模式下略過爬取的資料新鮮度（分鐘）")
+    parser.add_argument("--pipeline", action="store_true", help="多行程管線模式：並行爬取 --datasets 指定的多個資料集")
+    parser.add_argument(
+        "--datasets", default=None,
+        help="管線模式的資料集代碼（逗號分隔），未提供則為 22 個縣市的 F-D0047 鄉鎮預報"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="管線模式的解析行程數（預設為 CPU 核心數）")
+    parser.add_argument("--io-workers", type=int, default=4, help="管線模式同時進行的下載數")
+    parser.add_argument("--metrics-file", default=None, help="將效能指標以 Prometheus 文字格式寫入此檔案")
+    parser.add_argument("--metrics-port", type=int, default=None, help="常駐模式下於此埠號提供 /metrics 端點")
+    args = parser.parse_args()
+    
+    if args.metrics_file:
+        metrics.add_sink(PrometheusFileSink(args.metrics_file))
+    
+    if args.pipeline:
+        from datasets import COUNTY_TOWNSHIP_DATASETS
+        
+        dataset_ids = (
+            [item.strip() for item in args.datasets.split(",") if item.strip()]
+            if args.datasets else COUNTY_TOWNSHIP_DATASETS
+        )
+        with metrics.timer('weather_crawl_seconds'):
+            ok = pipeline_crawl(dataset_ids, args.workers, args.io_workers)
+        metrics.flush()
+        raise SystemExit(0 if ok else 1)
+    elif args.cron:
+        with metrics.timer('weather_crawl_seconds'):
+            ok = cron_crawl(args.min_age)
+        metrics.flush()
+        raise SystemExit(0 if ok else 1)
+    elif args.watch:
+        if args.metrics_port:
+            start_metrics_server(args.metrics_port)
+        watch(args.interval)
+    else:
+        with metrics.timer('weather_crawl_seconds'):
+            crawl_all_weather_data()
+        metrics.flush()
@@ -0,0 +1,217 @@
+"""
+多資料集爬取管線
+下載（執行緒，限制同時連線數）→ 解析與擷取（行程池，不受 GIL 限制）→ 寫入（單一寫入者）
+三個階段重疊執行，一次爬取多個資料檔（如各縣市的 F-D0047 鄉鎮預報）時，
+解析與擷取的耗時隨 CPU 核心數縮短。
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import (
+    Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+)
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+from database import WeatherDatabase
+from datasets import get_dataset
+from forecast_snapshot import ForecastSnapshot
+from forecast_table import ForecastTable
+from metrics import metrics
+from payload_decoder import decode_payload
+from weather_crawler import WeatherAPIClient
+
+metrics.describe('weather_pipeline_seconds', "多資料集爬取管線的總耗時（秒）")
+metrics.describe('weather_pipeline_stage_seconds', "爬取管線各階段（parse、write）的耗時（秒）")
+metrics.describe('weather_pipeline_datasets_total', "爬取管線處理的資料集數，依結果（ok、failed）區分")
+
+
+class ExtractedBatch:
+    """子行程擷取出的精簡資料批次（以 pickle 傳回主行程）"""
+
+    __slots__ = ('dataset_id', 'issue_time', 'summaries', 'forecast', 'parse_seconds', 'skipped')
+
+    def __init__(
+        self,
+        dataset_id: str,
+        issue_time: Optional[str],
+        summaries: List[Tuple],
+        forecast: ForecastTable,
+        parse_seconds: float,
+        skipped: int = 0
+    ):
+        """
+        Args:
+            dataset_id: 資料集代碼
+            issue_time: 預報發布時間
+            summaries: 各地點第一天資料 (location, date, max_temp, min_temp, weather)
+            forecast: 完整預報表
+            parse_seconds: 子行程中解析與擷取的耗時（秒）
+            skipped: 缺少日期而略過的地點數
+        """
+        self.dataset_id = dataset_id
+        self.issue_time = issue_time
+        self.summaries = summaries
+        self.forecast = forecast
+        self.parse_seconds = parse_seconds
+        self.skipped = skipped
+
+
+def parse_and_extract(dataset_id: str, raw: bytes) -> ExtractedBatch:
+    """
+    解碼原始回應並擷取各地點摘要與完整預報表（在子行程中執行）
+
+    Args:
+        dataset_id: 資料集代碼
+        raw: API 回應的原始位元組
+
+    Returns:
+        ExtractedBatch: 擷取結果
+
+    Raises:
+        PayloadSchemaError: 資料結構與資料集定義不符
+        ValueError: JSON 格式錯誤
+    """
+    start = time.perf_counter()
+    dataset = get_dataset(dataset_id)
+    snapshot = ForecastSnapshot(decode_payload(raw, dataset), dataset=dataset)
+    summaries = []
+    skipped = 0
+    for item in snapshot.get_all_locations_data():
+        # 沒有預報日期的地點無法寫入（日期為主鍵的一部分）
+        if not item['date'] or item['date'] == '-':
+            skipped += 1
+            continue
+        summaries.append((item['location'], item['date'], item['max_temp'], item['min_temp'], item['weather']))
+    forecast = snapshot.forecast_table
+    return ExtractedBatch(
+        dataset_id, snapshot.issue_time, summaries, forecast,
+        time.perf_counter() - start, skipped
+    )
+
+
+class CrawlPipeline:
+    """
+    多資料集爬取管線
+
+    用法:
+        pipeline = CrawlPipeline(COUNTY_TOWNSHIP_DATASETS, workers=4)
+        report = pipeline.run()
+    """
+
+    def __init__(
+        self,
+        dataset_ids: Iterable[str],
+        api_key: Optional[str] = None,
+        db: Optional[WeatherDatabase] = None,
+        workers: Optional[int] = None,
+        io_workers: int = 4,
+        base_url: Optional[str] = None
+    ):
+        """
+        初始化管線
+
+        Args:
+            dataset_ids: 要爬取的資料集代碼
+            api_key: CWA API 授權金鑰，若未提供則從環境變數讀取
+            db: 寫入的資料庫，未提供則使用預設資料庫
+            workers: 解析行程數，未提供則為 CPU 核心數；1 表示以單一執行緒解析（不建立子行程）
+            io_workers: 同時進行的下載數
+            base_url: API 網址（測試時指向替身伺服器），未提供則使用 WeatherAPIClient.BASE_URL
+
+        Raises:
+            KeyError: 不支援的資料集
+        """
+        self.dataset_ids = list(dict.fromkeys(dataset_ids))
+        for dataset_id in self.dataset_ids:
+            get_dataset(dataset_id)
+        self.api_key = api_key
+        self.db = db or WeatherDatabase()
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.io_workers = max(1, io_workers)
+        self.base_url = base_url
+
+    def _download(self, dataset_id: str) -> Optional[bytes]:
+        """下載單一資料集（在下載執行緒中執行，每個資料集使用各自的客戶端與 Session）"""
+        client = WeatherAPIClient(
+            api_key=self.api_key, use_database=False, use_shared_cache=False, dataset_id=dataset_id
+        )
+        if self.base_url:
+            client.BASE_URL = self.base_url
+        try:
+            return client.fetch_raw()
+        finally:
+            if client._session is not None:
+                client._session.close()
+
+    def _write(self, batch: ExtractedBatch) -> Dict[str, Any]:
+        """由主行程將批次寫入資料庫"""
+        with metrics.timer('weather_pipeline_stage_seconds', stage='write'):
+            counts = self.db.insert_many(batch.summaries, batch.dataset_id) if batch.summaries else None
+            forecast_rows = self.db.insert_forecast(batch.forecast, batch.issue_time, batch.dataset_id)
+        return {
+            'dataset': batch.dataset_id,
+            'issue_time': batch.issue_time,
+            'locations': len(batch.summaries),
+            'skipped': batch.skipped,
+            'forecast_rows': forecast_rows,
+            'counts': counts,
+            'ok': forecast_rows >= 0 and (counts is not None or not batch.summaries),
+        }
+
+    def run(self) -> Dict[str, Any]:
+        """
+        執行一次完整爬取
+
+        下載完成的資料立即交給解析行程，解析完成的批次立即寫入，
+        任一資料集失敗不影響其他資料集。
+
+        Returns:
+            Dict: {'results': 各資料集結果, 'failed': 失敗的資料集, 'seconds': 總耗時}
+        """
+        start = time.perf_counter()
+        results: List[Dict[str, Any]] = []
+        failed: List[str] = []
+
+        io_pool = ThreadPoolExecutor(self.io_workers, thread_name_prefix="crawl-download")
+        # 下載執行緒已在執行，以 spawn 建立子行程，避免 fork 複製其他執行緒持有中的鎖
+        cpu_pool: Executor = (
+            ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            if self.workers > 1
+            else ThreadPoolExecutor(1, thread_name_prefix="crawl-parse")
+        )
+        try:
+            pending: Dict[Future, Tuple[str, str]] = {
+                io_pool.submit(self._download, dataset_id): ('download', dataset_id)
+                for dataset_id in self.dataset_ids
+            }
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, dataset_id = pending.pop(future)
+                    try:
+                        value = future.result()
+                    except Exception as e:
+                        print(f"✗ {dataset_id} {'下載' if stage == 'download' else '解析'}失敗: {e}")
+                        failed.append(dataset_id)
+                        continue
+
+                    if stage == 'download':
+                        if value is None:
+                            failed.append(dataset_id)
+                        else:
+                            pending[cpu_pool.submit(parse_and_extract, dataset_id, value)] = ('parse', dataset_id)
+                        continue
+
+                    metrics.observe('weather_pipeline_stage_seconds', value.parse_seconds, stage='parse')
+                    result = self._write(value)
+                    results.append(result)
+                    if not result['ok']:
+                        failed.append(dataset_id)
+        finally:
+            io_pool.shutdown(wait=True)
+            cpu_pool.shutdown(wait=True)
+
+        seconds = time.perf_counter() - start
+        metrics.observe('weather_pipeline_seconds', seconds)
+        metrics.inc('weather_pipeline_datasets_total', sum(1 for r in results if r['ok']), result='ok')
+        metrics.inc('weather_pipeline_datasets_total', len(failed), result='failed')
+        return {'results': results, 'failed': failed, 'seconds': seconds}
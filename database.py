@@ -4,14 +4,239 @@
 """
 import sqlite3
 import os
-from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
+import threading
+import time
+from collections.abc import Mapping
+from typing import Optional, List, Dict, Any, Tuple
 from contextlib import contextmanager
+from metrics import metrics
+from migrations import LATEST_VERSION, migrate
+from weather_records import WeatherBatch, WeatherRecord
+
+# 未指定資料集時的預報資料集代碼
+DEFAULT_DATASET = "F-A0010-001"
+
+metrics.describe('weather_db_transaction_seconds', "資料庫交易區塊的耗時（秒，含提交）")
+metrics.describe('weather_db_commit_seconds', "資料庫提交的耗時（秒）")
+metrics.describe('weather_db_errors_total', "因錯誤而回滾的資料庫交易數")
+
+
+class ConnectionPool:
+    """
+    SQLite 連線池
+    
+    每個執行緒持有一條長期存在的連線（sqlite3 連線不可跨執行緒共用），
+    並啟用 WAL 模式讓 Streamlit 的讀取不會被爬蟲的寫入阻塞。
+    """
+    
+    # 每條連線快取的預編譯 SQL 敘述數量
+    CACHED_STATEMENTS = 128
+    # 寫入鎖等待時間（毫秒）
+    BUSY_TIMEOUT_MS = 5000
+    
+    def __init__(self, db_path: str):
+        """
+        初始化連線池
+        
+        Args:
+            db_path: 資料庫檔案路徑
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[tuple] = []
+        # 資料表結構在每個行程、每個資料庫路徑只檢查一次
+        self.schema_ready = False
+        self.schema_lock = threading.Lock()
+    
+    def acquire(self) -> sqlite3.Connection:
+        """
+        取得目前執行緒的連線，不存在時建立
+        
+        Returns:
+            sqlite3.Connection: 資料庫連線物件
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                # 順便清除已結束執行緒留下的連線
+                alive = []
+                for thread, old_conn in self._connections:
+                    if thread.is_alive():
+                        alive.append((thread, old_conn))
+                    else:
+                        old_conn.close()
+                alive.append((threading.current_thread(), conn))
+                self._connections = alive
+        return conn
+    
+    def _connect(self) -> sqlite3.Connection:
+        """建立並設定新的連線"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.BUSY_TIMEOUT_MS / 1000,
+            cached_statements=self.CACHED_STATEMENTS,
+            # 連線只在建立它的執行緒中使用，但允許由 close_all() 跨執行緒關閉
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row  # 讓查詢結果可以用欄位名稱存取
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL 模式下 NORMAL 已可確保一致性，並省下每次 commit 的 fsync
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={self.BUSY_TIMEOUT_MS}")
+        return conn
+    
+    def enter(self) -> int:
+        """
+        進入目前執行緒的交易區塊
+        
+        巢狀深度與連線一同記錄在連線池的執行緒區域變數中，
+        同一路徑的多個 WeatherDatabase 在同一執行緒共用同一條連線與同一個深度。
+        
+        Returns:
+            int: 進入前的深度（0 表示最外層，由其負責提交或回滾）
+        """
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        return depth
+    
+    def leave(self, depth: int):
+        """
+        離開交易區塊，恢復進入前的深度
+        
+        Args:
+            depth: enter() 返回的深度
+        """
+        self._local.depth = depth
+    
+    def release(self):
+        """關閉目前執行緒的連線，不影響其他執行緒與其他共用此連線池的實例"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'depth', 0):
+            # 交易進行中（巢狀區塊內）不關閉連線
+            return
+        with self._lock:
+            self._connections = [(thread, old_conn) for thread, old_conn in self._connections if old_conn is not conn]
+        conn.close()
+        self._local.conn = None
+    
+    def close_all(self):
+        """關閉連線池中所有執行緒的連線（僅供行程結束或測試使用）"""
+        with self._lock:
+            for _, conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+
+# 以資料庫路徑為鍵的連線池，同一行程內的 WeatherDatabase 共用
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """
+    取得指定資料庫路徑的共用連線池
+    
+    Args:
+        db_path: 資料庫檔案路徑
+    
+    Returns:
+        ConnectionPool: 連線池
+    """
+    key = db_path if db_path == ":memory:" else os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(db_path)
+        return pool
+
+
+def encode_date(value) -> int:
+    """
+    將日期轉為 weather_data 使用的整數格式
+    
+    Args:
+        value: 'YYYY-MM-DD' 開頭的字串、date/datetime 物件或已編碼的整數
+    
+    Returns:
+        int: YYYYMMDD
+    
+    Raises:
+        ValueError: 無法辨識的日期格式
+    """
+    if isinstance(value, int):
+        return value
+    if hasattr(value, 'year'):
+        return value.year * 10000 + value.month * 100 + value.day
+    text = str(value)
+    if len(text) < 10 or text[4] != '-' or text[7] != '-':
+        raise ValueError(f"無法辨識的日期: {value!r}")
+    return int(text[:4]) * 10000 + int(text[5:7]) * 100 + int(text[8:10])
+
+
+def decode_date(value: int) -> str:
+    """
+    將整數日期轉回文字
+    
+    Args:
+        value: YYYYMMDD
+    
+    Returns:
+        str: YYYY-MM-DD
+    """
+    return f"{value // 10000:04d}-{value // 100 % 100:02d}-{value % 100:02d}"
 
 
 class WeatherDatabase:
     """天氣資料庫管理類別"""
     
+    # 資料表結構版本，記錄於 PRAGMA user_version（遷移定義於 migrations.py）
+    SCHEMA_VERSION = LATEST_VERSION
+    
+    # weather_data 以整數儲存日期（YYYYMMDD）與時間（UTC epoch 秒數），
+    # 查詢時轉回 YYYY-MM-DD 與 YYYY-MM-DD HH:MM:SS 文字，對外格式不變
+    DATE_TEXT = "printf('%04d-%02d-%02d', w.date / 10000, w.date / 100 % 100, w.date % 100)"
+    UPDATED_AT_TEXT = "datetime(w.updated_at, 'unixepoch')"
+    NOW_EPOCH = "CAST(strftime('%s', 'now') AS INTEGER)"
+    
+    # 新地點先寫入 locations 維度表，參數為 (資料集代碼, 地點名稱)
+    INSERT_LOCATION_SQL = "INSERT OR IGNORE INTO locations (dataset, name) VALUES (?, ?)"
+    # 以 (location_id, date) 為鍵的新增或更新敘述，
+    # 參數為 (資料集代碼, 地點名稱, 整數日期, 最高溫, 最低溫, 天氣)
+    UPSERT_SQL = f"""
+        INSERT INTO weather_data 
+        (location_id, date, max_temp, min_temp, weather, created_at, updated_at)
+        VALUES (
+            (SELECT id FROM locations WHERE dataset = ? AND name = ?),
+            ?, ?, ?, ?, {NOW_EPOCH}, {NOW_EPOCH}
+        )
+        ON CONFLICT(location_id, date) 
+        DO UPDATE SET
+            max_temp = excluded.max_temp,
+            min_temp = excluded.min_temp,
+            weather = excluded.weather,
+            updated_at = excluded.updated_at
+    """
+    # 每個地點的最新日期由叢集主鍵 (location_id, date) 直接定位，參數為 (資料集代碼,)
+    LATEST_SQL = f"""
+        SELECT
+            l.name AS location,
+            {DATE_TEXT} AS date,
+            w.max_temp, w.min_temp, w.weather,
+            {UPDATED_AT_TEXT} AS updated_at
+        FROM locations l
+        JOIN weather_data w
+          ON w.location_id = l.id
+         AND w.date = (SELECT MAX(date) FROM weather_data WHERE location_id = l.id)
+        WHERE l.dataset = ?
+        ORDER BY l.name
+    """
+    # 比對既有資料時每批查詢的列數（每列 2 個參數，低於 SQLite 參數上限）
+    LOOKUP_CHUNK_SIZE = 400
+    
     def __init__(self, db_path: str = "data.db"):
         """
         初始化資料庫連線
@@ -20,64 +245,73 @@ class WeatherDatabase:
             db_path: 資料庫檔案路徑，預設為 data.db
         """
         self.db_path = db_path
-        self.create_tables()
+        self.pool = get_pool(db_path)
+        self.ensure_schema()
     
     @contextmanager
-    def get_connection(self):
+    def get_connection(self, operation: str = 'other'):
         """
         取得資料庫連線的 context manager
         
+        連線由連線池長期持有，離開時只提交或回滾交易而不關閉連線；
+        巢狀使用時（包含同一路徑的其他實例）僅由最外層提交。
+        最外層區塊的耗時與提交耗時會記錄到效能指標。
+        
+        Args:
+            operation: 操作名稱，作為效能指標的標籤
+        
         Yields:
             sqlite3.Connection: 資料庫連線物件
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # 讓查詢結果可以用欄位名稱存取
+        conn = self.pool.acquire()
+        depth = self.pool.enter()
+        start = time.perf_counter()
         try:
             yield conn
-            conn.commit()
+            if depth == 0:
+                with metrics.timer('weather_db_commit_seconds', operation=operation):
+                    conn.commit()
         except Exception as e:
-            conn.rollback()
+            if depth == 0:
+                conn.rollback()
+                metrics.inc('weather_db_errors_total', operation=operation)
             raise e
         finally:
-            conn.close()
+            self.pool.leave(depth)
+            if depth == 0:
+                metrics.observe('weather_db_transaction_seconds', time.perf_counter() - start, operation=operation)
+    
+    def close(self):
+        """關閉目前執行緒的連線（其他執行緒與其他實例的連線不受影響，之後使用時重新建立）"""
+        self.pool.release()
+    
+    def ensure_schema(self):
+        """
+        確保資料表結構為最新版本
+        
+        同一行程內同一資料庫路徑只檢查一次；檢查時只讀取 PRAGMA user_version，
+        版本相符時不執行任何 DDL。
+        """
+        pool = self.pool
+        if pool.schema_ready:
+            return
+        with pool.schema_lock:
+            if pool.schema_ready:
+                return
+            version = pool.acquire().execute("PRAGMA user_version").fetchone()[0]
+            if version < self.SCHEMA_VERSION:
+                self.create_tables()
+            pool.schema_ready = True
     
     def create_tables(self):
-        """建立資料庫表格"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # 建立天氣資料表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS weather_data (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    location TEXT NOT NULL,
-                    date TEXT NOT NULL,
-                    max_temp REAL,
-                    min_temp REAL,
-                    weather TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(location, date)
-                )
-            """)
-            
-            # 建立索引以提升查詢效能
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_location 
-                ON weather_data(location)
-            """)
-            
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_date 
-                ON weather_data(date)
-            """)
-            
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_location_date 
-                ON weather_data(location, date)
-            """)
-            
-            print(f"✓ 資料庫初始化完成: {self.db_path}")
+        """建立資料庫表格，或將既有資料庫遷移到最新的結構版本"""
+        conn = self.pool.acquire()
+        applied = migrate(conn)
+        if 2 in applied:
+            # 轉換為精簡格式後回收舊表與舊索引佔用的空間
+            conn.execute("VACUUM")
+        
+        print(f"✓ 資料庫初始化完成: {self.db_path}")
     
     def insert_weather_data(
         self,
@@ -85,7 +319,8 @@ class WeatherDatabase:
         date: str,
         max_temp: Optional[float],
         min_temp: Optional[float],
-        weather: str
+        weather: str,
+        dataset: str = DEFAULT_DATASET
     ) -> bool:
         """
         插入或更新天氣資料
@@ -96,26 +331,25 @@ class WeatherDatabase:
             max_temp: 最高溫度
             min_temp: 最低溫度
             weather: 天氣現象
+            dataset: 資料集代碼
         
         Returns:
-            bool: 成功返回 True，失敗返回 False
+            bool: 成功返回 True，失敗或沒有日期（如 '-'）而略過時返回 False
         """
         try:
-            with self.get_connection() as conn:
+            date_value = encode_date(date)
+        except ValueError:
+            # 日期為主鍵的一部分，沒有預報日期的資料無法寫入
+            print(f"⚠ 略過沒有日期的資料: {location}（{date!r}）")
+            return False
+        
+        try:
+            with self.get_connection('insert_weather_data') as conn:
                 cursor = conn.cursor()
                 
-                # 使用 INSERT OR REPLACE 來處理重複資料
-                cursor.execute("""
-                    INSERT INTO weather_data 
-                    (location, date, max_temp, min_temp, weather, updated_at)
-                    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                    ON CONFLICT(location, date) 
-                    DO UPDATE SET
-                        max_temp = excluded.max_temp,
-                        min_temp = excluded.min_temp,
-                        weather = excluded.weather,
-                        updated_at = CURRENT_TIMESTAMP
-                """, (location, date, max_temp, min_temp, weather))
+                # 使用 INSERT ... ON CONFLICT 來處理重複資料
+                cursor.execute(self.INSERT_LOCATION_SQL, (dataset, location))
+                cursor.execute(self.UPSERT_SQL, (dataset, location, date_value, max_temp, min_temp, weather))
                 
                 return True
                 
@@ -123,115 +357,544 @@ class WeatherDatabase:
             print(f"✗ 插入資料時發生錯誤: {e}")
             return False
     
-    def get_latest_data(self, location: str) -> Optional[Dict[str, Any]]:
+    def insert_many(self, rows, dataset: str = DEFAULT_DATASET) -> Optional[Dict[str, int]]:
+        """
+        在單一交易中批次插入或更新多筆天氣資料
+        
+        Args:
+            rows: 可迭代的資料列，每列可為字典或 WeatherRecord（含 location、date、max_temp、
+                  min_temp、weather 鍵）、依上述順序排列的 tuple，或 pandas DataFrame
+            dataset: 資料集代碼
+        
+        Returns:
+            Dict: 各類資料列數量 {'inserted': int, 'updated': int, 'unchanged': int, 'skipped': int}，
+                  skipped 為沒有日期（如 '-'）而略過的資料列；失敗返回 None
+        """
+        try:
+            batch, skipped = self._normalize_rows(rows)
+            counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': skipped}
+            if skipped:
+                print(f"⚠ 略過 {skipped} 筆沒有日期的資料")
+            if not batch:
+                return counts
+            
+            with self.get_connection('insert_many') as conn:
+                existing = self._lookup_existing(conn, list(batch), dataset)
+                for key, values in batch.items():
+                    if key not in existing:
+                        counts['inserted'] += 1
+                    elif existing[key] == values[2:]:
+                        counts['unchanged'] += 1
+                    else:
+                        counts['updated'] += 1
+                
+                conn.executemany(
+                    self.INSERT_LOCATION_SQL, ((dataset, name) for name in {key[0] for key in batch})
+                )
+                # 未變更的資料列同樣寫入，以更新 updated_at 作為資料新鮮度依據
+                conn.executemany(self.UPSERT_SQL, ((dataset,) + values for values in batch.values()))
+            
+            return counts
+            
+        except Exception as e:
+            print(f"✗ 批次插入資料時發生錯誤: {e}")
+            return None
+    
+    def _normalize_rows(self, rows) -> Tuple[Dict[tuple, tuple], int]:
+        """
+        將各種格式的資料列轉換為以 (location, date) 為鍵的 tuple，日期轉為整數 YYYYMMDD
+        
+        Args:
+            rows: 字典（含 WeatherRecord）、tuple 或 DataFrame 形式的資料列
+        
+        Returns:
+            Tuple[Dict, int]: ((location, date) → (location, date, max_temp, min_temp, weather)，
+                              同一鍵重複時以最後一筆為準；無法辨識日期而略過的資料列數)
+        """
+        fields = ('location', 'date', 'max_temp', 'min_temp', 'weather')
+        
+        # pandas DataFrame（不直接匯入 pandas）
+        if hasattr(rows, 'to_dict') and hasattr(rows, 'columns'):
+            rows = rows.to_dict('records')
+        
+        batch = {}
+        skipped = 0
+        for row in rows:
+            if isinstance(row, Mapping):
+                values = tuple(row.get(field) for field in fields)
+            else:
+                values = tuple(row)[:len(fields)]
+            # DataFrame 以 NaN 表示缺值，統一轉為 None
+            values = tuple(None if value != value else value for value in values)
+            try:
+                date = encode_date(values[1])
+            except (TypeError, ValueError):
+                # 擷取時缺少 dataDate 的地點日期為 '-'，逐列略過而不是讓整批失敗
+                skipped += 1
+                continue
+            values = (values[0], date) + values[2:]
+            batch[(values[0], date)] = values
+        return batch, skipped
+    
+    def _lookup_existing(
+        self,
+        conn: sqlite3.Connection,
+        keys: List[tuple],
+        dataset: str = DEFAULT_DATASET
+    ) -> Dict[tuple, tuple]:
+        """
+        查詢批次中已存在的資料列
+        
+        Args:
+            conn: 資料庫連線
+            keys: (location, 整數日期) 鍵的清單
+            dataset: 資料集代碼
+        
+        Returns:
+            Dict: (location, 整數日期) → (max_temp, min_temp, weather)
+        """
+        existing = {}
+        for start in range(0, len(keys), self.LOOKUP_CHUNK_SIZE):
+            chunk = keys[start:start + self.LOOKUP_CHUNK_SIZE]
+            placeholders = ", ".join(["(?, ?)"] * len(chunk))
+            params = [value for key in chunk for value in key] + [dataset]
+            cursor = conn.execute(f"""
+                WITH batch(location, date) AS (VALUES {placeholders})
+                SELECT batch.location, batch.date, w.max_temp, w.min_temp, w.weather
+                FROM batch
+                JOIN locations l ON l.dataset = ? AND l.name = batch.location
+                JOIN weather_data w
+                  ON w.location_id = l.id AND w.date = batch.date
+            """, params)
+            for row in cursor:
+                existing[(row[0], row[1])] = (row[2], row[3], row[4])
+        return existing
+    
+    def insert_forecast(
+        self,
+        table,
+        issue_time: Optional[str] = None,
+        dataset: str = DEFAULT_DATASET
+    ) -> int:
+        """
+        在單一交易中批次寫入多日、多要素預報
+        
+        Args:
+            table: ForecastTable 或 (location, element, date, value, text) 的可迭代資料列
+            issue_time: 預報發布時間
+            dataset: 資料集代碼
+        
+        Returns:
+            int: 寫入的資料列數，失敗返回 -1
+        """
+        rows = table.rows() if hasattr(table, 'rows') else table
+        try:
+            with self.get_connection('insert_forecast') as conn:
+                cursor = conn.executemany("""
+                    INSERT INTO weather_forecast
+                    (dataset, location, element, date, value, text, issue_time, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(dataset, location, element, date)
+                    DO UPDATE SET
+                        value = excluded.value,
+                        text = excluded.text,
+                        issue_time = excluded.issue_time,
+                        updated_at = CURRENT_TIMESTAMP
+                """, ((dataset,) + tuple(row) + (issue_time,) for row in rows))
+                return cursor.rowcount
+                
+        except Exception as e:
+            print(f"✗ 寫入預報資料時發生錯誤: {e}")
+            return -1
+    
+    def get_forecast(
+        self,
+        location: str,
+        element: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        dataset: str = DEFAULT_DATASET
+    ) -> List[Dict[str, Any]]:
+        """
+        查詢特定地點的多日預報
+        
+        Args:
+            location: 地點名稱
+            element: 天氣要素代碼（如 MaxT、MinT、Wx），未提供則為所有要素
+            start_date: 起始日期（含）
+            end_date: 結束日期（含，逐時資料比對時間的日期部分）
+            dataset: 資料集代碼
+        
+        Returns:
+            List[Dict]: 依日期與要素排序的預報資料列表
+        """
+        conditions = ["dataset = ?", "location = ?"]
+        params: List[Any] = [dataset, location]
+        if element is not None:
+            conditions.append("element = ?")
+            params.append(element)
+        if start_date is not None:
+            conditions.append("date >= ?")
+            params.append(start_date)
+        if end_date is not None:
+            conditions.append("substr(date, 1, ?) <= ?")
+            params.extend([len(end_date), end_date])
+        
+        try:
+            with self.get_connection('get_forecast') as conn:
+                cursor = conn.execute(f"""
+                    SELECT location, element, date, value, text, issue_time
+                    FROM weather_forecast
+                    WHERE {' AND '.join(conditions)}
+                    ORDER BY date, element
+                """, params)
+                return [dict(row) for row in cursor.fetchall()]
+                
+        except Exception as e:
+            print(f"✗ 查詢預報資料時發生錯誤: {e}")
+            return []
+    
+    def get_latest_data(self, location: str, dataset: str = DEFAULT_DATASET) -> Optional[WeatherRecord]:
         """
         取得特定地點的最新天氣資料
         
         Args:
             location: 地點名稱
+            dataset: 資料集代碼
         
         Returns:
-            Dict: 天氣資料字典，若無資料則返回 None
+            WeatherRecord: 天氣資料，若無資料則返回 None
         """
         try:
-            with self.get_connection() as conn:
+            with self.get_connection('get_latest_data') as conn:
                 cursor = conn.cursor()
                 
-                cursor.execute("""
-                    SELECT location, date, max_temp, min_temp, weather, updated_at
-                    FROM weather_data
-                    WHERE location = ?
-                    ORDER BY date DESC, updated_at DESC
+                cursor.execute(f"""
+                    SELECT
+                        l.name AS location,
+                        {self.DATE_TEXT} AS date,
+                        w.max_temp, w.min_temp, w.weather,
+                        {self.UPDATED_AT_TEXT} AS updated_at
+                    FROM locations l
+                    JOIN weather_data w ON w.location_id = l.id
+                    WHERE l.dataset = ? AND l.name = ?
+                    ORDER BY w.date DESC
                     LIMIT 1
-                """, (location,))
+                """, (dataset, location))
                 
                 row = cursor.fetchone()
-                
-                if row:
-                    return {
-                        'location': row['location'],
-                        'date': row['date'],
-                        'max_temp': row['max_temp'],
-                        'min_temp': row['min_temp'],
-                        'weather': row['weather'],
-                        'updated_at': row['updated_at']
-                    }
-                
-                return None
+                return WeatherRecord(*row) if row else None
                 
         except Exception as e:
             print(f"✗ 查詢資料時發生錯誤: {e}")
             return None
     
-    def get_all_latest_data(self) -> List[Dict[str, Any]]:
+    def get_all_latest_data(self, dataset: str = DEFAULT_DATASET) -> WeatherBatch:
         """
         取得所有地點的最新天氣資料
         
+        Args:
+            dataset: 資料集代碼
+        
         Returns:
-            List[Dict]: 天氣資料列表
+            WeatherBatch: 天氣資料（可如列表般迭代出 WeatherRecord），失敗則為空批次
         """
         try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
+            with self.get_connection('get_all_latest_data') as conn:
+                # 逐列讀入欄位式批次，不先建立完整的資料列清單
+                return WeatherBatch(conn.execute(self.LATEST_SQL, (dataset,)))
                 
-                # 使用子查詢取得每個地點的最新記錄
-                cursor.execute("""
-                    SELECT location, date, max_temp, min_temp, weather, updated_at
-                    FROM weather_data
-                    WHERE (location, date, updated_at) IN (
-                        SELECT location, date, MAX(updated_at)
-                        FROM weather_data
-                        GROUP BY location
-                    )
-                    ORDER BY location
-                """)
-                
-                rows = cursor.fetchall()
+        except Exception as e:
+            print(f"✗ 查詢所有資料時發生錯誤: {e}")
+            return WeatherBatch()
+    
+    def get_all_latest_frame(self, dataset: str = DEFAULT_DATASET):
+        """
+        取得所有地點的最新天氣資料（DataFrame 版本）
+        
+        Args:
+            dataset: 資料集代碼
+        
+        Returns:
+            pandas.DataFrame: 欄位為 location、date、max_temp、min_temp、weather、updated_at
+        """
+        return self.get_all_latest_data(dataset).to_frame(list(WeatherBatch.COLUMNS))
+    
+    def get_fresh_data(
+        self,
+        location: str,
+        ttl_minutes: int = 10,
+        dataset: str = DEFAULT_DATASET
+    ) -> Optional[WeatherRecord]:
+        """
+        以單一查詢取得特定地點在有效期限內的最新天氣資料
+        
+        最新一筆資料由叢集主鍵 (location_id, date) 直接定位，
+        新鮮度則在 SQLite 內以 UTC epoch 秒數比較。
+        
+        Args:
+            location: 地點名稱
+            ttl_minutes: 資料有效期限（分鐘）
+            dataset: 資料集代碼
+        
+        Returns:
+            WeatherRecord: 天氣資料，過期或不存在則返回 None
+        """
+        try:
+            with self.get_connection('get_fresh_data') as conn:
+                cursor = conn.execute(f"""
+                    SELECT location, date, max_temp, min_temp, weather, {self.UPDATED_AT_TEXT} AS updated_at
+                    FROM (
+                        SELECT
+                            l.name AS location,
+                            {self.DATE_TEXT} AS date,
+                            w.max_temp, w.min_temp, w.weather, w.updated_at
+                        FROM locations l
+                        JOIN weather_data w ON w.location_id = l.id
+                        WHERE l.dataset = ? AND l.name = ?
+                        ORDER BY w.date DESC
+                        LIMIT 1
+                    ) w
+                    WHERE w.updated_at > {self.NOW_EPOCH} - ?
+                """, (dataset, location, int(ttl_minutes) * 60))
                 
-                return [
-                    {
-                        'location': row['location'],
-                        'date': row['date'],
-                        'max_temp': row['max_temp'],
-                        'min_temp': row['min_temp'],
-                        'weather': row['weather'],
-                        'updated_at': row['updated_at']
-                    }
-                    for row in rows
-                ]
+                row = cursor.fetchone()
+                return WeatherRecord(*row) if row else None
                 
         except Exception as e:
-            print(f"✗ 查詢所有資料時發生錯誤: {e}")
-            return []
+            print(f"✗ 檢查資料新鮮度時發生錯誤: {e}")
+            return None
     
-    def is_data_fresh(self, location: str, ttl_minutes: int = 10) -> bool:
+    def is_data_fresh(self, location: str, ttl_minutes: int = 10, dataset: str = DEFAULT_DATASET) -> bool:
         """
         檢查資料是否在有效期限內
         
         Args:
             location: 地點名稱
             ttl_minutes: 資料有效期限（分鐘）
+            dataset: 資料集代碼
         
         Returns:
             bool: 資料新鮮返回 True，過期或不存在返回 False
         """
-        data = self.get_latest_data(location)
+        return self.get_fresh_data(location, ttl_minutes, dataset) is not None
+    
+    def has_recent_update(self, ttl_minutes: int = 10, dataset: Optional[str] = None) -> bool:
+        """
+        檢查是否有任何地點在有效期限內更新過（供排程爬取判斷是否略過）
         
-        if not data:
-            return False
+        Args:
+            ttl_minutes: 資料有效期限（分鐘）
+            dataset: 只檢查此資料集的地點，未提供則為所有資料集
         
+        Returns:
+            bool: 有資料在期限內更新返回 True
+        """
         try:
-            # 解析 updated_at 時間戳記
-            updated_at = datetime.strptime(data['updated_at'], '%Y-%m-%d %H:%M:%S')
-            current_time = datetime.now()
-            time_diff = current_time - updated_at
-            
-            return time_diff < timedelta(minutes=ttl_minutes)
-            
+            with self.get_connection('has_recent_update') as conn:
+                if dataset is None:
+                    row = conn.execute(
+                        f"SELECT 1 FROM weather_data WHERE updated_at > {self.NOW_EPOCH} - ? LIMIT 1",
+                        (int(ttl_minutes) * 60,)
+                    ).fetchone()
+                else:
+                    row = conn.execute(f"""
+                        SELECT 1 FROM weather_data w
+                        JOIN locations l ON l.id = w.location_id
+                        WHERE l.dataset = ? AND w.updated_at > {self.NOW_EPOCH} - ?
+                        LIMIT 1
+                    """, (dataset, int(ttl_minutes) * 60)).fetchone()
+                return row is not None
         except Exception as e:
             print(f"✗ 檢查資料新鮮度時發生錯誤: {e}")
             return False
     
+    # 彙總週期對應的 SQLite 日期運算式（週以星期一為起始日）
+    ROLLUP_PERIODS = {
+        'day': DATE_TEXT,
+        'week': f"date({DATE_TEXT}, 'weekday 0', '-6 days')",
+        'month': "printf('%04d-%02d-01', w.date / 10000, w.date / 100 % 100)",
+    }
+    
+    def get_history(
+        self,
+        location: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        dataset: str = DEFAULT_DATASET
+    ):
+        """
+        查詢特定地點在日期範圍內的歷史資料
+        
+        Args:
+            location: 地點名稱
+            start_date: 起始日期（含，YYYY-MM-DD）
+            end_date: 結束日期（含，YYYY-MM-DD）
+            dataset: 資料集代碼
+        
+        Returns:
+            pandas.DataFrame: 依日期排序，欄位為 date、max_temp、min_temp、weather
+        """
+        return self.get_history_multi([location], start_date, end_date, dataset).drop(columns='location')
+    
+    def get_history_multi(
+        self,
+        locations: Optional[List[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        dataset: str = DEFAULT_DATASET
+    ):
+        """
+        查詢多個地點在日期範圍內的歷史資料
+        
+        Args:
+            locations: 地點名稱列表，未提供則為所有地點
+            start_date: 起始日期（含，YYYY-MM-DD）
+            end_date: 結束日期（含，YYYY-MM-DD）
+            dataset: 資料集代碼
+        
+        Returns:
+            pandas.DataFrame: 依地點與日期排序，欄位為 location、date、max_temp、min_temp、weather
+        """
+        return self.get_history_batch(locations, start_date, end_date, dataset).to_frame()
+    
+    def get_history_batch(
+        self,
+        locations: Optional[List[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        dataset: str = DEFAULT_DATASET
+    ) -> WeatherBatch:
+        """
+        查詢多個地點在日期範圍內的歷史資料（欄位式批次，不需要 pandas）
+        
+        Args:
+            locations: 地點名稱列表，未提供則為所有地點
+            start_date: 起始日期（含，YYYY-MM-DD）
+            end_date: 結束日期（含，YYYY-MM-DD）
+            dataset: 資料集代碼
+        
+        Returns:
+            WeatherBatch: 依地點與日期排序的資料，失敗則為空批次
+        """
+        where, params = self._range_conditions(locations, start_date, end_date, dataset)
+        try:
+            with self.get_connection('get_history') as conn:
+                return WeatherBatch(conn.execute(f"""
+                    SELECT l.name, {self.DATE_TEXT}, w.max_temp, w.min_temp, w.weather
+                    FROM weather_data w
+                    JOIN locations l ON l.id = w.location_id
+                    {where}
+                    ORDER BY l.name, w.date
+                """, params))
+        except Exception as e:
+            print(f"✗ 查詢歷史資料時發生錯誤: {e}")
+            return WeatherBatch()
+    
+    def get_rollup(
+        self,
+        locations: Optional[List[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        period: str = 'week',
+        dataset: str = DEFAULT_DATASET
+    ):
+        """
+        依日、週或月彙總歷史溫度
+        
+        Args:
+            locations: 地點名稱列表，未提供則為所有地點
+            start_date: 起始日期（含，YYYY-MM-DD）
+            end_date: 結束日期（含，YYYY-MM-DD）
+            period: 彙總週期，'day'、'week' 或 'month'
+            dataset: 資料集代碼
+        
+        Returns:
+            pandas.DataFrame: 欄位為 location、period（週期起始日）、max_temp（最高溫的最大值）、
+                              min_temp（最低溫的最小值）、mean_max、mean_min、mean_temp、days
+        
+        Raises:
+            ValueError: 不支援的彙總週期
+        """
+        if period not in self.ROLLUP_PERIODS:
+            raise ValueError(f"不支援的彙總週期: {period}（可用: {', '.join(self.ROLLUP_PERIODS)}）")
+        
+        where, params = self._range_conditions(locations, start_date, end_date, dataset)
+        period_expr = self.ROLLUP_PERIODS[period]
+        return self._query_frame(f"""
+            SELECT
+                l.name AS location,
+                {period_expr} AS period,
+                MAX(w.max_temp),
+                MIN(w.min_temp),
+                AVG(w.max_temp),
+                AVG(w.min_temp),
+                AVG((w.max_temp + w.min_temp) / 2.0),
+                COUNT(*)
+            FROM weather_data w
+            JOIN locations l ON l.id = w.location_id
+            {where}
+            GROUP BY location, period
+            ORDER BY location, period
+        """, params, ['location', 'period', 'max_temp', 'min_temp', 'mean_max', 'mean_min', 'mean_temp', 'days'])
+    
+    def _range_conditions(
+        self,
+        locations: Optional[List[str]],
+        start_date: Optional[str],
+        end_date: Optional[str],
+        dataset: str = DEFAULT_DATASET
+    ) -> tuple:
+        """
+        組合資料集、地點與日期範圍的 WHERE 條件（可使用叢集主鍵 (location_id, date)）
+        
+        Returns:
+            tuple: (WHERE 子句, 參數列表)
+        """
+        conditions = ["l.dataset = ?"]
+        params: List[Any] = [dataset]
+        if locations is not None:
+            conditions.append(f"l.name IN ({', '.join('?' * len(locations))})")
+            params.extend(locations)
+        if start_date is not None:
+            conditions.append("w.date >= ?")
+            params.append(encode_date(start_date))
+        if end_date is not None:
+            conditions.append("w.date <= ?")
+            params.append(encode_date(end_date))
+        return f"WHERE {' AND '.join(conditions)}", params
+    
+    def _query_frame(self, sql: str, params: List[Any], columns: List[str]):
+        """
+        執行查詢並以欄位陣列建立 DataFrame
+        
+        location 轉為 category、date/period/updated_at 轉為 datetime64，溫度欄位為 float64。
+        
+        Returns:
+            pandas.DataFrame: 查詢結果，失敗則為空的 DataFrame
+        """
+        import pandas as pd
+        
+        try:
+            with self.get_connection('query_frame') as conn:
+                rows = conn.execute(sql, params).fetchall()
+        except Exception as e:
+            print(f"✗ 查詢歷史資料時發生錯誤: {e}")
+            rows = []
+        
+        data = dict(zip(columns, zip(*rows))) if rows else {column: [] for column in columns}
+        frame = pd.DataFrame({column: list(data[column]) for column in columns})
+        for column in columns:
+            if column == 'location':
+                frame[column] = frame[column].astype('category')
+            elif column in ('date', 'period', 'updated_at'):
+                frame[column] = pd.to_datetime(frame[column], errors='coerce')
+            elif column == 'days':
+                frame[column] = frame[column].astype('int64')
+            elif column != 'weather':
+                frame[column] = frame[column].astype('float64')
+        return frame
+    
     def get_statistics(self) -> Dict[str, Any]:
         """
         取得資料庫統計資訊
@@ -240,7 +903,7 @@ class WeatherDatabase:
             Dict: 統計資訊
         """
         try:
-            with self.get_connection() as conn:
+            with self.get_connection('get_statistics') as conn:
                 cursor = conn.cursor()
                 
                 # 總記錄數
@@ -248,11 +911,14 @@ class WeatherDatabase:
                 total = cursor.fetchone()['total']
                 
                 # 地點數
-                cursor.execute("SELECT COUNT(DISTINCT location) as locations FROM weather_data")
+                cursor.execute("SELECT COUNT(DISTINCT location_id) as locations FROM weather_data")
                 locations = cursor.fetchone()['locations']
                 
-                # 資料庫檔案大小
-                db_size = os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+                # 資料庫檔案大小（含尚未寫回主檔的 WAL 日誌）
+                db_size = 0
+                for path in (self.db_path, f"{self.db_path}-wal"):
+                    if os.path.exists(path):
+                        db_size += os.path.getsize(path)
                 
                 return {
                     'total_records': total,
@@ -0,0 +1,431 @@
+"""
+中央氣象署檔案 API 資料集定義
+每個資料集宣告其代碼、地點清單在 JSON 中的路徑與預報值的擷取方式，
+使下載、快取、快照與資料庫層不必針對單一資料集撰寫
+"""
+import re
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
+from forecast_snapshot import ForecastSnapshot
+from forecast_table import ForecastTable, extract_forecast_table, iter_forecast_entries, split_entry_values
+from json_stream import LOCATION_ARRAY_PATTERN
+from payload_decoder import PayloadSchemaError
+
+# (地點名稱, 地點的原始 JSON 節點)
+Record = Tuple[str, Dict[str, Any]]
+# (天氣要素代碼, 時間, 值欄位字典)
+Entry = Tuple[str, str, Dict[str, Any]]
+
+
+def _get(node: Any, key: str) -> Any:
+    """
+    取得字典欄位，同時接受首字母大小寫不同的寫法（如 location / Location）
+
+    Args:
+        node: JSON 節點
+        key: 欄位名稱
+
+    Returns:
+        Any: 欄位值，不存在則返回 None
+    """
+    if not isinstance(node, dict):
+        return None
+    if key in node:
+        return node[key]
+    for variant in (key[:1].upper() + key[1:], key[:1].lower() + key[1:]):
+        if variant in node:
+            return node[variant]
+    return None
+
+
+def _walk(node: Any, path: Tuple[str, ...]) -> List[Any]:
+    """
+    依路徑取得節點，路徑中遇到陣列時展開每個元素
+
+    Args:
+        node: 起始節點
+        path: 欄位名稱路徑
+
+    Returns:
+        List: 路徑末端的所有節點
+    """
+    nodes = [node]
+    for key in path:
+        next_nodes = []
+        for current in nodes:
+            value = _get(current, key)
+            if isinstance(value, list):
+                next_nodes.extend(value)
+            elif value is not None:
+                next_nodes.append(value)
+        nodes = next_nodes
+    return nodes
+
+
+# weatherElement 清單格式（F-C0032、F-D0047）的地點欄位，包含首字母大寫的寫法
+ELEMENT_LIST_FIELDS = ('locationName', 'LocationName', 'geocode', 'Geocode', 'weatherElement', 'WeatherElement')
+
+
+class Dataset:
+    """CWA 檔案 API 資料集"""
+
+    # 發布時間的候選路徑（依序嘗試）
+    ISSUE_TIME_PATHS = (
+        ('cwaopendata', 'resources', 'resource', 'metadata', 'temporal', 'issueTime'),
+        ('cwaopendata', 'dataset', 'datasetInfo', 'issueTime'),
+        ('cwaopendata', 'sent'),
+    )
+
+    def __init__(
+        self,
+        dataset_id: str,
+        name: str,
+        record_path: Tuple[str, ...],
+        iter_entries: Optional[Callable[[Dict[str, Any]], Iterator[Entry]]] = None,
+        extract_table: Optional[Callable[[List[Record]], ForecastTable]] = None,
+        summarize: Optional[Callable[[str, Dict[str, Any]], Dict[str, Any]]] = None,
+        group_path: Optional[Tuple[str, ...]] = None,
+        summary_fields: Tuple[str, ...] = ELEMENT_LIST_FIELDS,
+        stream_pattern: Optional[str] = None
+    ):
+        """
+        定義資料集
+
+        Args:
+            dataset_id: 檔案 API 的資料集代碼（URL 中的 ID）
+            name: 資料集名稱
+            record_path: 由 JSON 根節點到地點清單的路徑
+            iter_entries: 由單一地點節點逐筆產生 (要素, 時間, 值欄位) 的函式
+            extract_table: 自訂的預報表擷取函式，未提供則以 iter_entries 建立
+            summarize: 自訂的第一天摘要函式，未提供則由 iter_entries 計算
+            group_path: 地點分組（如縣市）的路徑，提供時地點名稱前加上組名以避免重複
+            summary_fields: 計算摘要所需的地點欄位，串流解析時只保留這些欄位
+            stream_pattern: 串流解析時地點陣列起點的正規表示式，未提供則不支援串流
+        """
+        self.dataset_id = dataset_id
+        self.name = name
+        self.record_path = record_path
+        self.group_path = group_path
+        self.summary_fields = summary_fields
+        self.stream_pattern = stream_pattern
+        self._iter_entries = iter_entries
+        self._extract_table = extract_table
+        self._summarize = summarize
+
+    def __repr__(self) -> str:
+        return f"Dataset({self.dataset_id!r}, {self.name!r})"
+
+    def records(self, payload: Dict[str, Any]) -> List[Record]:
+        """
+        取得資料中的所有地點
+
+        Args:
+            payload: 完整的 JSON 資料
+
+        Returns:
+            List[tuple]: (地點名稱, 原始 JSON 節點)，略過沒有名稱的節點
+        """
+        if self.group_path is None:
+            return [
+                (name, node)
+                for node in _walk(payload, self.record_path)
+                if (name := location_name(node))
+            ]
+
+        # 分組資料（如 F-D0047-089 依縣市分組的鄉鎮）以「縣市＋鄉鎮」命名
+        records = []
+        for group in _walk(payload, self.group_path):
+            group_name = _get(group, 'locationsName') or ''
+            for node in _walk(group, self.record_path[len(self.group_path):]):
+                name = location_name(node)
+                if not name:
+                    continue
+                if group_name and not name.startswith(group_name):
+                    name = group_name + name
+                records.append((name, node))
+        return records
+
+    def validate(self, payload: Any):
+        """
+        檢查地點清單是否存在、非空，且每個地點都有名稱
+
+        Args:
+            payload: 解碼後的資料
+
+        Raises:
+            PayloadSchemaError: 路徑中斷、地點清單為空或地點缺少名稱
+        """
+        if not isinstance(payload, dict):
+            raise PayloadSchemaError(self.dataset_id, f"根節點應為物件，實際為 {type(payload).__name__}")
+
+        path = self.record_path
+        for depth in range(1, len(path)):
+            if not _walk(payload, path[:depth]):
+                raise PayloadSchemaError(self.dataset_id, f"缺少 `$.{'.'.join(path[:depth])}`")
+
+        location_path = f"$.{'.'.join(path)}"
+        records = _walk(payload, path)
+        if not records:
+            raise PayloadSchemaError(self.dataset_id, f"`{location_path}` 不存在或為空")
+        for index, record in enumerate(records):
+            if not isinstance(record, dict):
+                raise PayloadSchemaError(
+                    self.dataset_id, f"`{location_path}[{index}]` 應為物件，實際為 {type(record).__name__}"
+                )
+            if not location_name(record):
+                raise PayloadSchemaError(self.dataset_id, f"`{location_path}[{index}]` 缺少 locationName")
+
+    def issue_time(self, payload: Dict[str, Any]) -> Optional[str]:
+        """
+        取得預報發布時間
+
+        Args:
+            payload: 完整的 JSON 資料
+
+        Returns:
+            str: 發布時間，找不到則為 None
+        """
+        for path in self.ISSUE_TIME_PATHS:
+            values = _walk(payload, path)
+            if values and isinstance(values[0], str):
+                return values[0]
+        return None
+
+    def identifier(self, payload: Dict[str, Any]) -> Optional[str]:
+        """取得資料識別碼"""
+        return _get(_get(payload, 'cwaopendata'), 'identifier')
+
+    def iter_entries(self, record: Dict[str, Any]) -> Iterator[Entry]:
+        """
+        逐筆產生單一地點的預報值
+
+        Args:
+            record: 地點的原始 JSON 節點
+
+        Yields:
+            tuple: (要素代碼, 時間, 值欄位字典)
+        """
+        if self._iter_entries is None:
+            return iter(())
+        return self._iter_entries(record)
+
+    def extract_table(self, records: List[Record]) -> ForecastTable:
+        """
+        將所有地點、要素與時間攤平為預報表
+
+        Args:
+            records: records() 的結果
+
+        Returns:
+            ForecastTable: 預報資料表
+        """
+        if self._extract_table is not None:
+            return self._extract_table(records)
+
+        table = ForecastTable()
+        for name, record in records:
+            for element, time, values in self.iter_entries(record):
+                value, text = split_entry_values(values)
+                table.append(name, element, time, value, text)
+        return table
+
+    def summarize(self, name: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        取得地點第一天的溫度與天氣摘要
+
+        Args:
+            name: 地點名稱
+            record: 地點的原始 JSON 節點
+
+        Returns:
+            Dict: {'location', 'date', 'max_temp', 'min_temp', 'weather'}
+        """
+        if self._summarize is not None:
+            return self._summarize(name, record)
+        return summarize_entries(name, self.iter_entries(record))
+
+
+def location_name(record: Dict[str, Any]) -> Optional[str]:
+    """取得地點節點的名稱"""
+    return _get(record, 'locationName')
+
+
+# 摘要使用的天氣要素（英文代碼與新版檔案的中文名稱）
+MAX_TEMP_ELEMENTS = ('MaxT', '最高溫度', 'T', '溫度')
+MIN_TEMP_ELEMENTS = ('MinT', '最低溫度', 'T', '溫度')
+WEATHER_ELEMENTS = ('Wx', '天氣現象')
+
+
+def summarize_entries(name: str, entries: Iterator[Entry]) -> Dict[str, Any]:
+    """
+    由預報值計算第一天的摘要
+
+    最高溫取第一天最高溫要素（無則為逐時溫度）的最大值、最低溫取最小值，
+    天氣取第一天第一個天氣現象描述。
+
+    Args:
+        name: 地點名稱
+        entries: (要素, 時間, 值欄位) 序列
+
+    Returns:
+        Dict: {'location', 'date', 'max_temp', 'min_temp', 'weather'}
+    """
+    by_element: Dict[str, List[Tuple[str, Optional[float], Optional[str]]]] = {}
+    for element, time, values in entries:
+        value, text = split_entry_values(values)
+        by_element.setdefault(element, []).append((time[:10], value, text))
+
+    def pick(candidates):
+        for element in candidates:
+            if by_element.get(element):
+                return by_element[element]
+        return []
+
+    max_series = pick(MAX_TEMP_ELEMENTS)
+    min_series = pick(MIN_TEMP_ELEMENTS)
+    wx_series = pick(WEATHER_ELEMENTS)
+    dates = [day for series in (max_series, min_series, wx_series) for day, _, _ in series]
+    first_date = min(dates) if dates else '-'
+
+    max_values = [value for day, value, _ in max_series if day == first_date and value is not None]
+    min_values = [value for day, value, _ in min_series if day == first_date and value is not None]
+    weather = next((text for day, _, text in wx_series if day == first_date and text), '-')
+
+    return {
+        'location': name,
+        'date': first_date,
+        'max_temp': max(max_values) if max_values else None,
+        'min_temp': min(min_values) if min_values else None,
+        'weather': weather
+    }
+
+
+def _flatten_values(raw: Any) -> Dict[str, Any]:
+    """
+    將 parameter / elementValue 節點攤平為單層的值欄位字典
+
+    清單中的多個值依序編號（value、value1…），單位說明（measures）略過。
+    """
+    if isinstance(raw, dict):
+        raw = [raw]
+    if not isinstance(raw, list):
+        return {'value': raw}
+    values: Dict[str, Any] = {}
+    for item in raw:
+        if not isinstance(item, dict):
+            continue
+        for key, value in item.items():
+            if key.lower() in ('measures', 'parameterunit'):
+                continue
+            slot, index = key, 1
+            while slot in values:
+                slot, index = f"{key}{index}", index + 1
+            values[slot] = value
+    return values
+
+
+def _iter_element_list_entries(record: Dict[str, Any]) -> Iterator[Entry]:
+    """
+    F-C0032 / F-D0047 格式：weatherElement[] → time[] → parameter 或 elementValue
+    """
+    for element in _get(record, 'weatherElement') or []:
+        element_name = _get(element, 'elementName')
+        if not element_name:
+            continue
+        for step in _get(element, 'time') or []:
+            time = _get(step, 'dataTime') or _get(step, 'startTime')
+            if not time:
+                continue
+            raw = _get(step, 'parameter')
+            if raw is None:
+                raw = _get(step, 'elementValue')
+            yield element_name, str(time), _flatten_values(raw)
+
+
+# 已註冊的資料集
+DATASETS: Dict[str, Dataset] = {}
+
+# F-D0047 鄉鎮預報：001、005…085 為各縣市未來 2 天（逐 3 小時）、003、007…087 為未來 1 週，
+# 089、091 為全臺
+TOWNSHIP_DATASET_PATTERN = re.compile(r"^F-D0047-\d{3}$")
+# 22 個縣市的未來 2 天鄉鎮預報檔
+COUNTY_TOWNSHIP_DATASETS = tuple(f"F-D0047-{number:03d}" for number in range(1, 86, 4))
+
+
+def register(dataset: Dataset) -> Dataset:
+    """
+    註冊資料集
+
+    Args:
+        dataset: 資料集定義
+
+    Returns:
+        Dataset: 同一個資料集（可作為裝飾性的寫法）
+    """
+    DATASETS[dataset.dataset_id] = dataset
+    return dataset
+
+
+def township_dataset(dataset_id: str, name: str = "鄉鎮天氣預報") -> Dataset:
+    """
+    建立 F-D0047 系列的鄉鎮預報資料集定義
+
+    Args:
+        dataset_id: 資料集代碼（F-D0047-001 ~ F-D0047-091）
+        name: 資料集名稱
+
+    Returns:
+        Dataset: 資料集定義
+    """
+    return Dataset(
+        dataset_id,
+        name,
+        record_path=('cwaopendata', 'dataset', 'locations', 'location'),
+        group_path=('cwaopendata', 'dataset', 'locations'),
+        iter_entries=_iter_element_list_entries,
+        stream_pattern=r'"[Ll]ocation"\s*:\s*\[',
+    )
+
+
+def get_dataset(dataset_id: str) -> Dataset:
+    """
+    取得資料集定義，F-D0047 系列未註冊的代碼會自動建立
+
+    Args:
+        dataset_id: 資料集代碼
+
+    Returns:
+        Dataset: 資料集定義
+
+    Raises:
+        KeyError: 不支援的資料集
+    """
+    dataset = DATASETS.get(dataset_id)
+    if dataset is None and TOWNSHIP_DATASET_PATTERN.match(dataset_id):
+        dataset = register(township_dataset(dataset_id))
+    if dataset is None:
+        raise KeyError(f"不支援的資料集: {dataset_id}（可用: {', '.join(sorted(DATASETS))}）")
+    return dataset
+
+
+register(Dataset(
+    "F-A0010-001",
+    "農業氣象一週預報",
+    record_path=('cwaopendata', 'resources', 'resource', 'data',
+                 'agrWeatherForecasts', 'weatherForecasts', 'location'),
+    iter_entries=iter_forecast_entries,
+    extract_table=lambda records: extract_forecast_table([record for _, record in records]),
+    summarize=ForecastSnapshot.extract_first_day,
+    summary_fields=('locationName', 'weatherElements'),
+    stream_pattern=LOCATION_ARRAY_PATTERN,
+))
+
+register(Dataset(
+    "F-C0032-001",
+    "一般天氣預報－今明 36 小時天氣預報",
+    record_path=('cwaopendata', 'dataset', 'location'),
+    iter_entries=_iter_element_list_entries,
+    stream_pattern=r'"location"\s*:\s*\[',
+))
+
+register(township_dataset("F-D0047-089", "鄉鎮天氣預報－臺灣未來 2 天天氣預報"))
+register(township_dataset("F-D0047-091", "鄉鎮天氣預報－臺灣未來 1 週天氣預報"))
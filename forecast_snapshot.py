@@ -0,0 +1,298 @@
+"""
+中央氣象署天氣預報快照模組
+將預報資料下載並解析一次後保存在記憶體中，供多次查詢使用
+"""
+from bisect import bisect_left
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+from forecast_table import ForecastTable
+from weather_records import WeatherBatch, WeatherRecord
+
+
+class ForecastSnapshot:
+    """單次下載的天氣預報快照"""
+
+    def __init__(self, data: Dict[str, Any], fetched_at: Optional[datetime] = None, dataset=None):
+        """
+        從完整的 JSON 資料建立快照
+
+        Args:
+            data: fetch_weather_data() 取得的完整 JSON 資料
+            fetched_at: 下載（或最近一次確認未變更）的時間，未提供則使用目前時間
+            dataset: 資料集定義（datasets.Dataset），未提供則為 F-A0010-001
+        """
+        if dataset is None:
+            from datasets import get_dataset
+            dataset = get_dataset("F-A0010-001")
+        self.dataset = dataset
+        self.fetched_at = fetched_at or datetime.now()
+        self.payload = data
+        # 下載時的 HTTP 驗證資訊（ETag、Last-Modified、內容雜湊），供條件式下載使用
+        self.validators: Dict[str, Optional[str]] = {}
+        # 自下載或最近一次確認未變更後已寫入資料庫的地點，期間可略過重複寫入
+        self.persisted_locations = set()
+        self.forecast_persisted = False
+        self._forecast_table: Optional[ForecastTable] = None
+        self._summaries: Optional[WeatherBatch] = None
+
+        # 快照識別資訊，供呼叫端判斷資料是否已更新
+        self.identifier = dataset.identifier(data)
+        self.issue_time = dataset.issue_time(data)
+
+        # 依資料集定義取得 (地點名稱, 原始節點) 清單
+        self._records = dataset.records(data)
+        self.locations = [record for _, record in self._records]
+
+        if not self.locations:
+            print("⚠ 找不到地點資料，資料結構可能已變更")
+
+        self._build_index()
+
+    def _build_index(self):
+        """建立地點索引，每份資料只建立一次"""
+        # 主索引：地點名稱 → 原始 JSON 節點
+        self._by_name: Dict[str, Dict[str, Any]] = {}
+        # 次索引：區域代碼與正規化名稱（臺/台）→ 地點名稱
+        self._by_code: Dict[str, str] = {}
+        self._by_alias: Dict[str, str] = {}
+
+        for name, loc in self._records:
+            self._by_name.setdefault(name, loc)
+            self._by_alias.setdefault(normalize_location_name(name), name)
+            code = location_code(loc)
+            if code:
+                self._by_code.setdefault(code, name)
+
+        self._sorted_names = sorted(self._by_name)
+
+    def resolve_location(self, key: str) -> Optional[str]:
+        """
+        將地點名稱、區域代碼或異體字名稱（如「台北」與「臺北」）解析為正式地點名稱
+
+        Args:
+            key: 地點名稱或區域代碼
+
+        Returns:
+            str: 正式地點名稱，找不到則返回 None
+        """
+        if key in self._by_name:
+            return key
+        return self._by_code.get(key) or self._by_alias.get(normalize_location_name(key))
+
+    def confirm(self):
+        """
+        記錄上游確認資料未變更（304 或內容相同）
+
+        更新確認時間並清除已寫入記錄，讓下次寫入重新整理資料庫的 updated_at，
+        資料庫的新鮮度判斷（get_fresh_data）因此與快照一致。
+        """
+        self.fetched_at = datetime.now()
+        self.persisted_locations.clear()
+
+    def age_seconds(self) -> float:
+        """
+        取得快照下載至今經過的秒數
+
+        Returns:
+            float: 經過秒數
+        """
+        return (datetime.now() - self.fetched_at).total_seconds()
+
+    def is_stale(self, ttl_minutes: int = 10) -> bool:
+        """
+        檢查快照是否超過有效期限
+
+        Args:
+            ttl_minutes: 快照有效期限（分鐘）
+
+        Returns:
+            bool: 超過期限返回 True
+        """
+        return self.age_seconds() >= ttl_minutes * 60
+
+    @property
+    def forecast_table(self) -> ForecastTable:
+        """
+        所有地點、天氣要素與日期的預報資料表（首次存取時建立）
+
+        Returns:
+            ForecastTable: 預報資料表
+        """
+        if self._forecast_table is None:
+            self._forecast_table = self.dataset.extract_table(self._records)
+        return self._forecast_table
+
+    @property
+    def summaries(self) -> WeatherBatch:
+        """
+        各地點第一天的溫度與天氣摘要（首次存取時建立）
+
+        Returns:
+            WeatherBatch: 每個地點一列，依地點名稱排序
+        """
+        if self._summaries is None:
+            self._summaries = WeatherBatch(
+                self.dataset.summarize(name, self._by_name[name])
+                for name in self._sorted_names
+            )
+        return self._summaries
+
+    def get_forecast(
+        self,
+        location_name: Optional[str] = None,
+        element: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> ForecastTable:
+        """
+        查詢多日、多要素預報
+
+        Args:
+            location_name: 地點名稱或區域代碼，未提供則為所有地點
+            element: 天氣要素代碼（如 MaxT、MinT、Wx），未提供則為所有要素
+            start_date: 起始日期（含）
+            end_date: 結束日期（含）
+
+        Returns:
+            ForecastTable: 符合條件的預報資料
+        """
+        if location_name is not None:
+            resolved = self.resolve_location(location_name)
+            if resolved is None:
+                return ForecastTable()
+            location_name = resolved
+        return self.forecast_table.filter(location_name, element, start_date, end_date)
+
+    def get_locations(self) -> List[str]:
+        """
+        取得所有可用地點的清單
+
+        Returns:
+            List[str]: 地點名稱清單，按字母順序排序
+        """
+        return list(self._sorted_names)
+
+    def get_temperature_info(self, location_name: str) -> Optional[WeatherRecord]:
+        """
+        取得特定地點的溫度資訊
+
+        Args:
+            location_name: 地點名稱（如「臺北市」）或區域代碼
+
+        Returns:
+            WeatherRecord: 溫度資訊（可用 record['max_temp'] 存取），找不到地點則返回 None
+        """
+        name = self.resolve_location(location_name)
+        if name is None:
+            print(f"✗ 找不到地點: {location_name}")
+            return None
+
+        # 摘要與 _sorted_names 順序相同，以二分搜尋定位
+        return self.summaries[bisect_left(self._sorted_names, name)]
+
+    def get_all_locations_data(self) -> WeatherBatch:
+        """
+        取得所有地點的溫度資訊
+
+        Returns:
+            WeatherBatch: 所有地點的溫度資訊（可如列表般迭代出 WeatherRecord）
+        """
+        return self.summaries
+
+    def get_all_locations_frame(self):
+        """
+        取得所有地點的溫度資訊（DataFrame 版本）
+
+        Returns:
+            pandas.DataFrame: 欄位為 location（category）、date（datetime64）、
+                              max_temp、min_temp（float64）、weather
+        """
+        return self.summaries.to_frame()
+
+    @staticmethod
+    def extract_first_day(location_name: str, loc: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        提取 F-A0010-001 地點第一天的溫度與天氣資訊
+
+        Args:
+            location_name: 地點名稱
+            loc: 地點的原始 JSON 節點
+
+        Returns:
+            Dict: 溫度資訊字典
+        """
+        elements = loc.get('weatherElements', {})
+
+        # 最高溫
+        max_t_data = elements.get('MaxT', {}).get('daily', [])
+        first_day_max = max_t_data[0] if max_t_data else {}
+        max_temp = parse_temperature(first_day_max.get('temperature', '-'))
+
+        # 最低溫
+        min_t_data = elements.get('MinT', {}).get('daily', [])
+        first_day_min = min_t_data[0] if min_t_data else {}
+        min_temp = parse_temperature(first_day_min.get('temperature', '-'))
+
+        # 日期
+        date = first_day_max.get('dataDate', '-')
+
+        # 天氣現象
+        wx_data = elements.get('Wx', {}).get('daily', [])
+        first_day_wx = wx_data[0] if wx_data else {}
+        weather = first_day_wx.get('weather', '-')
+
+        return {
+            'location': location_name,
+            'date': date,
+            'max_temp': max_temp,
+            'min_temp': min_temp,
+            'weather': weather
+        }
+
+
+def location_code(loc: Dict[str, Any]) -> Optional[str]:
+    """
+    取得地點節點的區域代碼
+
+    Args:
+        loc: 地點的原始 JSON 節點
+
+    Returns:
+        str: geocode 或 areaCode（兩種大小寫寫法皆可），無則返回 None
+    """
+    code = (
+        loc.get('geocode') or loc.get('Geocode')
+        or loc.get('areaCode') or loc.get('AreaCode')
+    )
+    return str(code) if code else None
+
+
+def normalize_location_name(name: str) -> str:
+    """
+    正規化地點名稱，統一「臺」與「台」並去除空白
+
+    Args:
+        name: 地點名稱
+
+    Returns:
+        str: 正規化後的名稱
+    """
+    return name.strip().replace('臺', '台')
+
+
+def parse_temperature(temp_str: str) -> Optional[float]:
+    """
+    解析溫度字串為浮點數
+
+    Args:
+        temp_str: 溫度字串
+
+    Returns:
+        float or None: 溫度數值，無效則返回 None
+    """
+    if temp_str == '-' or not temp_str:
+        return None
+    try:
+        return float(temp_str)
+    except (ValueError, TypeError):
+        return None
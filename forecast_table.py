@@ -0,0 +1,267 @@
+"""
+中央氣象署天氣預報欄位式資料表
+將預報資料中所有地點、所有天氣要素、所有日期攤平成精簡的欄位式表格
+"""
+import math
+import sys
+from array import array
+from typing import Optional, List, Dict, Any, Iterator, Tuple, Sequence
+
+# 視為日期而非數值的欄位名稱
+DATE_FIELDS = ('dataDate', 'startTime', 'endTime', 'dataTime')
+
+
+class ForecastTable:
+    """
+    欄位式預報資料表
+
+    每一列為 (location, element, date, value, text)：
+    value 為數值（缺值為 NaN），text 為文字描述（無則為 None）。
+    地點、要素與日期字串皆經過 intern，重複值只佔一份記憶體。
+    資料表依地點逐一建立，建立時記錄每個地點的資料列範圍，依地點查詢時直接取該範圍。
+    """
+
+    COLUMNS = ('location', 'element', 'date', 'value', 'text')
+
+    def __init__(self):
+        """建立空的資料表"""
+        self.location: List[str] = []
+        self.element: List[str] = []
+        self.date: List[str] = []
+        self.value = array('d')
+        self.text: List[Optional[str]] = []
+        # 已結束的地點 → 資料列範圍 (start, stop)；目前地點的範圍為 (_current_start, len(self))
+        self._ranges: Dict[str, Tuple[int, int]] = {}
+        self._current: Optional[str] = None
+        self._current_start = 0
+        # 同一地點的資料列不相鄰時（不依地點逐一加入），查詢改為逐列比對
+        self._contiguous = True
+
+    def __len__(self) -> int:
+        return len(self.location)
+
+    def append(
+        self,
+        location: str,
+        element: str,
+        date: str,
+        value: Optional[float],
+        text: Optional[str]
+    ):
+        """
+        新增一列資料
+
+        Args:
+            location: 地點名稱
+            element: 天氣要素代碼（如 MaxT、MinT、Wx）
+            date: 日期 (YYYY-MM-DD)，逐時預報的資料集為完整時間
+            value: 數值，無則為 None
+            text: 文字描述，無則為 None
+        """
+        location = sys.intern(location)
+        if location is not self._current:
+            self._start_location(location)
+        self.location.append(location)
+        self.element.append(sys.intern(element))
+        self.date.append(sys.intern(date))
+        self.value.append(math.nan if value is None else value)
+        self.text.append(text)
+
+    def _start_location(self, location: str):
+        """結束目前地點的資料列範圍，開始新的地點"""
+        start = len(self.location)
+        if self._current is not None:
+            self._ranges[self._current] = (self._current_start, start)
+        if location in self._ranges:
+            self._contiguous = False
+        self._current = location
+        self._current_start = start
+
+    def location_rows(self, location: str) -> Sequence[int]:
+        """
+        取得地點的資料列索引
+
+        Args:
+            location: 地點名稱
+
+        Returns:
+            Sequence[int]: 資料列索引（依加入順序）
+        """
+        if not self._contiguous:
+            return [i for i, name in enumerate(self.location) if name == location]
+        if location == self._current:
+            return range(self._current_start, len(self.location))
+        span = self._ranges.get(location)
+        return range(*span) if span is not None else range(0)
+
+    def rows(self) -> Iterator[Tuple[str, str, str, Optional[float], Optional[str]]]:
+        """
+        逐列取出資料
+
+        Yields:
+            tuple: (location, element, date, value, text)，數值缺值以 None 表示
+        """
+        for i in range(len(self)):
+            value = self.value[i]
+            yield (
+                self.location[i],
+                self.element[i],
+                self.date[i],
+                None if math.isnan(value) else value,
+                self.text[i]
+            )
+
+    def filter(
+        self,
+        location: Optional[str] = None,
+        element: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> "ForecastTable":
+        """
+        依條件篩選資料列
+
+        Args:
+            location: 地點名稱
+            element: 天氣要素代碼
+            start_date: 起始日期（含）
+            end_date: 結束日期（含，逐時資料比對時間的日期部分）
+
+        Returns:
+            ForecastTable: 篩選後的新資料表
+        """
+        # 指定地點時只檢查該地點的資料列範圍
+        indices = range(len(self)) if location is None else self.location_rows(location)
+        result = ForecastTable()
+        for i in indices:
+            if element is not None and self.element[i] != element:
+                continue
+            date = self.date[i]
+            if start_date is not None and date < start_date:
+                continue
+            if end_date is not None and date[:len(end_date)] > end_date:
+                continue
+            value = self.value[i]
+            result.append(
+                self.location[i], self.element[i], date,
+                None if math.isnan(value) else value, self.text[i]
+            )
+        return result
+
+    def locations(self) -> List[str]:
+        """
+        取得資料表中的地點
+
+        Returns:
+            List[str]: 排序後的地點名稱
+        """
+        return sorted(set(self.location))
+
+    def elements(self) -> List[str]:
+        """
+        取得資料表中的天氣要素
+
+        Returns:
+            List[str]: 排序後的要素代碼
+        """
+        return sorted(set(self.element))
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """
+        轉換為字典列表
+
+        Returns:
+            List[Dict]: 每列一個字典
+        """
+        return [dict(zip(self.COLUMNS, row)) for row in self.rows()]
+
+    def to_frame(self):
+        """
+        轉換為 pandas DataFrame（location、element 為 category 型別）
+
+        Returns:
+            pandas.DataFrame: 預報資料表
+        """
+        import pandas as pd
+
+        return pd.DataFrame({
+            'location': pd.Categorical(self.location),
+            'element': pd.Categorical(self.element),
+            'date': self.date,
+            'value': pd.Series(self.value, dtype='float64'),
+            'text': self.text,
+        })
+
+
+def extract_forecast_table(locations: List[Dict[str, Any]]) -> ForecastTable:
+    """
+    從 F-A0010-001 的 location 清單提取所有地點、要素與日期的預報值
+
+    每個天氣要素底下的清單（如 daily）逐筆展開；
+    數值欄位（如 temperature、weatherid）寫入 value，文字欄位（如 weather）寫入 text。
+
+    Args:
+        locations: weatherForecasts.location 清單
+
+    Returns:
+        ForecastTable: 預報資料表
+    """
+    table = ForecastTable()
+    for loc in locations:
+        location_name = loc.get('locationName')
+        if not location_name:
+            continue
+        for element_name, date, entry in iter_forecast_entries(loc):
+            value, text = split_entry_values(entry)
+            table.append(location_name, element_name, date, value, text)
+    return table
+
+
+def iter_forecast_entries(location: Dict[str, Any]) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """
+    逐筆產生 F-A0010-001 單一地點的預報項目
+
+    Args:
+        location: weatherForecasts.location 清單中的地點
+
+    Yields:
+        tuple: (要素代碼, 日期 YYYY-MM-DD, 預報項目)，缺日期的項目略過
+    """
+    for element_name, element in (location.get('weatherElements') or {}).items():
+        if not isinstance(element, dict):
+            continue
+        for series in element.values():
+            if not isinstance(series, list):
+                continue
+            for entry in series:
+                if not isinstance(entry, dict):
+                    continue
+                date = entry.get('dataDate') or entry.get('startTime') or entry.get('dataTime')
+                if date:
+                    yield element_name, date[:10], entry
+
+
+def split_entry_values(entry: Dict[str, Any]) -> Tuple[Optional[float], Optional[str]]:
+    """
+    將單筆預報項目拆成數值與文字
+
+    Args:
+        entry: 預報項目，如 {'dataDate': ..., 'temperature': '25'}
+
+    Returns:
+        tuple: (數值, 文字)，各取第一個符合的欄位
+    """
+    value = None
+    text = None
+    for key, raw in entry.items():
+        if key in DATE_FIELDS or raw in (None, '', '-'):
+            continue
+        try:
+            number = float(raw)
+        except (ValueError, TypeError):
+            if text is None and isinstance(raw, str):
+                text = raw
+            continue
+        if value is None:
+            value = number
+    return value, text
@@ -0,0 +1,101 @@
+"""
+串流式 JSON 陣列解析模組
+從分段抵達的位元組中逐一解析指定陣列的元素，不需先建立完整的物件樹
+"""
+import codecs
+import json
+import re
+from typing import Iterable, Iterator, Any, Union
+
+# F-A0010-001 中 weatherForecasts.location 陣列的起點
+LOCATION_ARRAY_PATTERN = r'"weatherForecasts"\s*:\s*\{\s*"location"\s*:\s*\['
+
+# 尚未找到陣列起點時保留的緩衝區尾端長度，避免標記被切在兩段之間
+_MARKER_TAIL = 256
+
+
+def iter_json_array(
+    chunks: Iterable[bytes],
+    array_pattern: Union[str, "re.Pattern"] = LOCATION_ARRAY_PATTERN,
+    encoding: str = 'utf-8'
+) -> Iterator[Any]:
+    """
+    逐一產生 JSON 文件中指定陣列的元素
+
+    陣列起點以正規表示式定位（須以左中括號結尾），陣列之前的內容會直接捨棄；
+    每解析完一個元素即從緩衝區移除，記憶體用量只與單一元素大小有關。
+    呼叫端可隨時停止迭代，剩餘資料不會被讀取。
+    陣列元素須為物件或陣列（數值元素可能在片段邊界被截斷）。
+
+    Args:
+        chunks: 位元組片段，如 response.iter_content()
+        array_pattern: 定位陣列起點的正規表示式
+        encoding: 文字編碼
+
+    Yields:
+        Any: 陣列中的每個元素
+
+    Raises:
+        ValueError: 找不到陣列起點或資料不完整
+    """
+    pattern = re.compile(array_pattern) if isinstance(array_pattern, str) else array_pattern
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder(encoding)()
+    chunk_iter = iter(chunks)
+
+    buffer = ''
+    exhausted = False
+
+    def read_more() -> bool:
+        nonlocal buffer, exhausted
+        for chunk in chunk_iter:
+            if chunk:
+                buffer += text_decoder.decode(chunk)
+                return True
+        buffer += text_decoder.decode(b'', final=True)
+        exhausted = True
+        return False
+
+    # 定位陣列起點
+    while True:
+        match = pattern.search(buffer)
+        if match:
+            buffer = buffer[match.end():]
+            break
+        if exhausted:
+            raise ValueError("找不到指定的 JSON 陣列，資料結構可能已變更")
+        buffer = buffer[-_MARKER_TAIL:]
+        read_more()
+
+    # 逐一解析陣列元素
+    pos = 0
+    while True:
+        # 略過空白與逗號
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) or exhausted:
+                break
+            read_more()
+
+        if pos >= len(buffer):
+            raise ValueError("JSON 陣列未正常結束，資料可能不完整")
+        if buffer[pos] == ']':
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # 元素尚未完整抵達，讀取更多資料後重試
+            if exhausted:
+                raise
+            read_more()
+            continue
+
+        # 已解析的部分超過一半時才裁切，避免反覆複製緩衝區
+        if end > len(buffer) // 2:
+            buffer = buffer[end:]
+            pos = 0
+        else:
+            pos = end
+        yield item
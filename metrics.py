@@ -0,0 +1,367 @@
+"""
+效能指標模組
+提供行程內的計數器、量測值與耗時分佈統計，可輸出為 Prometheus 文字格式
+（寫入檔案或以 HTTP 端點提供），用於判斷延遲來自上游 API、JSON 解析或 SQLite
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple, Any
+
+# 耗時分佈的預設區間上限（秒）
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    """將標籤字典轉為可作為字典鍵的排序 tuple"""
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    """將標籤轉為 Prometheus 格式的 {name="value"} 字串"""
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (
+        '{}="{}"'.format(name, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class _Histogram:
+    """單一標籤組合的耗時分佈"""
+
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    執行緒安全的指標登錄表
+
+    所有指標以名稱加標籤區分；測試時可直接以 snapshot() 讀取目前數值，
+    或以 add_sink() 加入匯出目的地，再以 flush() 寫出。
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        初始化登錄表
+
+        Args:
+            buckets: 耗時分佈的區間上限（秒），需由小到大排列
+        """
+        self.buckets = tuple(buckets)
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Tuple[str, Callable[[], Dict[str, float]]]] = []
+        self._sinks: List[Any] = []
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str):
+        """
+        設定指標說明（輸出為 Prometheus 的 # HELP），於定義指標的模組載入時呼叫
+
+        Args:
+            name: 指標名稱
+            help_text: 說明文字
+        """
+        with self._lock:
+            self._help[name] = help_text
+
+    def help_text(self, name: str) -> Optional[str]:
+        """
+        取得指標說明
+
+        Args:
+            name: 指標名稱
+
+        Returns:
+            str: 說明文字，未設定則返回 None
+        """
+        with self._lock:
+            return self._help.get(name)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """
+        增加計數器
+
+        Args:
+            name: 指標名稱（慣例以 _total 結尾）
+            value: 增加量
+            **labels: 標籤
+        """
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        """
+        設定量測值
+
+        Args:
+            name: 指標名稱
+            value: 目前數值
+            **labels: 標籤
+        """
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float, **labels):
+        """
+        記錄一次耗時
+
+        Args:
+            name: 指標名稱（慣例以 _seconds 結尾）
+            value: 耗時（秒）
+            **labels: 標籤
+        """
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self.buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """
+        計時區塊並記錄耗時（區塊拋出例外時同樣記錄）
+
+        Args:
+            name: 指標名稱
+            **labels: 標籤
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def add_collector(self, collector: Callable[[], Dict[str, float]], kind: str = 'gauge'):
+        """
+        加入在輸出時才計算的指標（如快取統計）
+
+        Args:
+            collector: 返回 {指標名稱: 數值} 的函式
+            kind: 'gauge'（目前數值）或 'counter'（累計數值，名稱慣例以 _total 結尾）
+        """
+        if kind not in ('gauge', 'counter'):
+            raise ValueError(f"不支援的指標類型: {kind}")
+        self._collectors.append((kind, collector))
+
+    def add_sink(self, sink):
+        """
+        加入匯出目的地
+
+        Args:
+            sink: 具有 export(registry) 方法的物件
+        """
+        self._sinks.append(sink)
+
+    def flush(self):
+        """將目前指標寫出到所有匯出目的地"""
+        for sink in self._sinks:
+            try:
+                sink.export(self)
+            except Exception as e:
+                print(f"✗ 匯出效能指標時發生錯誤: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        取得目前所有指標的數值
+
+        Returns:
+            Dict: {'counters': {...}, 'gauges': {...}, 'histograms': {...}}，
+                  各指標以 {標籤 tuple: 數值} 表示，耗時分佈為 {'count', 'sum'}
+        """
+        counters, gauges = self._collect()
+        with self._lock:
+            return {
+                'counters': counters,
+                'gauges': gauges,
+                'histograms': {
+                    name: {key: {'count': h.count, 'sum': h.total} for key, h in series.items()}
+                    for name, series in self._histograms.items()
+                },
+            }
+
+    def get(self, name: str, **labels) -> float:
+        """
+        取得單一計數器或量測值（不存在時為 0）
+
+        Args:
+            name: 指標名稱
+            **labels: 標籤
+
+        Returns:
+            float: 目前數值；耗時分佈返回記錄次數
+        """
+        key = _label_key(labels)
+        with self._lock:
+            if name in self._counters:
+                return self._counters[name].get(key, 0)
+            if name in self._histograms:
+                histogram = self._histograms[name].get(key)
+                return histogram.count if histogram else 0
+            if name in self._gauges:
+                return self._gauges[name].get(key, 0)
+        return 0
+
+    def reset(self):
+        """清除所有指標數值"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def render_prometheus(self) -> str:
+        """
+        輸出 Prometheus 文字格式（text/plain; version=0.0.4）
+
+        Returns:
+            str: 指標文字
+        """
+        counters, gauges = self._collect()
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(counters):
+                self._header(lines, name, 'counter')
+                for key, value in sorted(counters[name].items()):
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+
+            for name in sorted(gauges):
+                self._header(lines, name, 'gauge')
+                for key, value in sorted(gauges[name].items()):
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+
+            for name in sorted(self._histograms):
+                self._header(lines, name, 'histogram')
+                for key, histogram in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.total:.6f}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: List[str], name: str, kind: str):
+        """加入 # HELP 與 # TYPE 行"""
+        if name in self._help:
+            help_text = self._help[name].replace('\\', '\\\\').replace('\n', '\\n')
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    def _collect(self) -> Tuple[Dict[str, Dict[LabelKey, float]], Dict[str, Dict[LabelKey, float]]]:
+        """合併已記錄的計數器與量測值，以及 collector 計算的數值"""
+        with self._lock:
+            collected = {
+                'counter': {name: dict(series) for name, series in self._counters.items()},
+                'gauge': {name: dict(series) for name, series in self._gauges.items()},
+            }
+            collectors = list(self._collectors)
+        for kind, collector in collectors:
+            try:
+                for name, value in collector().items():
+                    collected[kind].setdefault(name, {})[()] = value
+            except Exception as e:
+                print(f"✗ 收集效能指標時發生錯誤: {e}")
+        return collected['counter'], collected['gauge']
+
+
+class PrometheusFileSink:
+    """
+    將指標以 Prometheus 文字格式寫入檔案
+
+    可搭配 node_exporter 的 textfile collector 使用；先寫暫存檔再置換，
+    讀取端不會讀到不完整的內容。
+    """
+
+    def __init__(self, path: str):
+        """
+        初始化檔案匯出
+
+        Args:
+            path: 輸出檔案路徑（node_exporter 需以 .prom 結尾）
+        """
+        self.path = path
+
+    def export(self, registry: MetricsRegistry):
+        """
+        寫出目前的指標
+
+        Args:
+            registry: 指標登錄表
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(registry.render_prometheus())
+        os.replace(tmp_path, self.path)
+
+
+def start_metrics_server(port: int = 9108, host: str = "127.0.0.1", registry: Optional[MetricsRegistry] = None):
+    """
+    以背景 daemon 執行緒啟動 /metrics HTTP 端點
+
+    Args:
+        port: 監聽埠號
+        host: 監聽位址
+        registry: 指標登錄表，未提供則使用共用的 metrics
+
+    Returns:
+        http.server.ThreadingHTTPServer: 伺服器物件，可呼叫 shutdown() 停止
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    registry = registry or metrics
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # 不輸出每次抓取的存取紀錄
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"✓ 效能指標端點: http://{host}:{port}/metrics")
+    return server
+
+
+# 行程內共用的指標登錄表
+metrics = MetricsRegistry()
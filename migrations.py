@@ -0,0 +1,234 @@
+"""
+資料庫結構遷移模組
+以 PRAGMA user_version 記錄資料庫的結構版本，依序套用尚未執行的遷移
+"""
+import sqlite3
+from typing import Callable, List, Optional, Tuple
+
+
+def _v1_initial(conn: sqlite3.Connection):
+    """建立初始的 weather_data 與 weather_forecast 資料表"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS weather_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            location TEXT NOT NULL,
+            date TEXT NOT NULL,
+            max_temp REAL,
+            min_temp REAL,
+            weather TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(location, date)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_location ON weather_data(location)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_date ON weather_data(date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_location_date ON weather_data(location, date)")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_latest_cover
+        ON weather_data(location, date DESC, updated_at DESC, max_temp, min_temp, weather)
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS weather_forecast (
+            location TEXT NOT NULL,
+            element TEXT NOT NULL,
+            date TEXT NOT NULL,
+            value REAL,
+            text TEXT,
+            issue_time TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (location, element, date)
+        )
+    """)
+
+
+def _v2_compact_weather_data(conn: sqlite3.Connection):
+    """
+    weather_data 改為精簡格式
+
+    - 地點名稱移至 locations 維度表，資料列只存整數 location_id
+    - 日期存為整數 YYYYMMDD，建立與更新時間存為 UTC epoch 秒數
+    - 以 (location_id, date) 為 WITHOUT ROWID 叢集主鍵，資料依地點與日期排列，
+      取代 idx_location、idx_location_date 與 idx_latest_cover
+    - 沒有日期的舊資料（擷取時缺少 dataDate 而存為 '-'）無法轉為整數日期，不予保留
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS locations (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    """)
+    conn.execute("""
+        INSERT OR IGNORE INTO locations (name)
+        SELECT DISTINCT location FROM weather_data ORDER BY location
+    """)
+    conn.execute("""
+        CREATE TABLE weather_data_compact (
+            location_id INTEGER NOT NULL REFERENCES locations(id),
+            date INTEGER NOT NULL,
+            max_temp REAL,
+            min_temp REAL,
+            weather TEXT,
+            created_at INTEGER NOT NULL,
+            updated_at INTEGER NOT NULL,
+            PRIMARY KEY (location_id, date)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        INSERT INTO weather_data_compact
+        (location_id, date, max_temp, min_temp, weather, created_at, updated_at)
+        SELECT
+            l.id,
+            CAST(replace(substr(w.date, 1, 10), '-', '') AS INTEGER),
+            w.max_temp,
+            w.min_temp,
+            w.weather,
+            COALESCE(CAST(strftime('%s', w.created_at) AS INTEGER), CAST(strftime('%s', 'now') AS INTEGER)),
+            COALESCE(CAST(strftime('%s', w.updated_at) AS INTEGER), CAST(strftime('%s', 'now') AS INTEGER))
+        FROM weather_data w
+        JOIN locations l ON l.name = w.location
+        WHERE w.date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'
+    """)
+    dropped = conn.execute(
+        "SELECT COUNT(*) FROM weather_data "
+        "WHERE date NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'"
+    ).fetchone()[0]
+    if dropped:
+        print(f"⚠ 捨棄 {dropped} 筆沒有日期的舊資料")
+    # 刪除舊表時一併刪除其索引
+    conn.execute("DROP TABLE weather_data")
+    conn.execute("ALTER TABLE weather_data_compact RENAME TO weather_data")
+    # 跨地點的日期範圍查詢（彙總、封存）使用
+    conn.execute("CREATE INDEX idx_date ON weather_data(date)")
+
+
+def _v3_forecast_dataset(conn: sqlite3.Connection):
+    """
+    weather_forecast 加入資料集代碼
+
+    不同資料集（如 F-A0010-001 與 F-D0047 鄉鎮預報）的要素代碼與時間粒度不同，
+    以 (dataset, location, element, date) 為主鍵分開保存；既有資料歸入 F-A0010-001。
+    """
+    conn.execute("""
+        CREATE TABLE weather_forecast_v3 (
+            dataset TEXT NOT NULL,
+            location TEXT NOT NULL,
+            element TEXT NOT NULL,
+            date TEXT NOT NULL,
+            value REAL,
+            text TEXT,
+            issue_time TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (dataset, location, element, date)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        INSERT INTO weather_forecast_v3
+        (dataset, location, element, date, value, text, issue_time, updated_at)
+        SELECT 'F-A0010-001', location, element, date, value, text, issue_time, updated_at
+        FROM weather_forecast
+    """)
+    conn.execute("DROP TABLE weather_forecast")
+    conn.execute("ALTER TABLE weather_forecast_v3 RENAME TO weather_forecast")
+
+
+def _v4_location_dataset(conn: sqlite3.Connection):
+    """
+    locations 加入資料集代碼
+
+    涵蓋相同鄉鎮的資料集（如 F-D0047-061 與 F-D0047-063）使用相同的地點名稱，
+    但第一天摘要不同；改以 (dataset, name) 區分地點，weather_data 經由 location_id
+    隨之依資料集分開保存。既有地點若只出現在單一資料集的預報中則歸入該資料集，
+    否則歸入 F-A0010-001。
+    """
+    conn.execute("""
+        CREATE TABLE locations_v4 (
+            id INTEGER PRIMARY KEY,
+            dataset TEXT NOT NULL,
+            name TEXT NOT NULL,
+            UNIQUE (dataset, name)
+        )
+    """)
+    conn.execute("""
+        INSERT INTO locations_v4 (id, dataset, name)
+        SELECT
+            l.id,
+            COALESCE((
+                SELECT MIN(f.dataset) FROM weather_forecast f
+                WHERE f.location = l.name
+                HAVING COUNT(DISTINCT f.dataset) = 1
+            ), 'F-A0010-001'),
+            l.name
+        FROM locations l
+    """)
+    conn.execute("DROP TABLE locations")
+    conn.execute("ALTER TABLE locations_v4 RENAME TO locations")
+
+
+# (版本, 說明, 遷移函式)，版本需連續遞增
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "建立 weather_data 與 weather_forecast", _v1_initial),
+    (2, "weather_data 改為精簡格式（locations 維度表、整數日期與時間、叢集主鍵）", _v2_compact_weather_data),
+    (3, "weather_forecast 加入資料集代碼", _v3_forecast_dataset),
+    (4, "locations 加入資料集代碼", _v4_location_dataset),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    """
+    取得資料庫目前的結構版本
+
+    Args:
+        conn: 資料庫連線
+
+    Returns:
+        int: PRAGMA user_version 的值（未遷移過的資料庫為 0）
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, target: Optional[int] = None) -> List[int]:
+    """
+    依序套用尚未執行的遷移
+
+    每個遷移在獨立的交易中執行並更新 user_version，失敗時回滾該遷移並拋出例外；
+    交易以 BEGIN IMMEDIATE 取得寫入鎖後重新檢查版本，多個行程同時啟動時只會執行一次。
+
+    Args:
+        conn: 資料庫連線
+        target: 目標版本，未提供則遷移到最新版本
+
+    Returns:
+        List[int]: 本次套用的版本
+
+    Raises:
+        ValueError: 目標版本不存在
+        sqlite3.Error: 遷移失敗
+    """
+    target = LATEST_VERSION if target is None else target
+    if target > LATEST_VERSION:
+        raise ValueError(f"不存在的結構版本: {target}（最新為 {LATEST_VERSION}）")
+
+    if conn.in_transaction:
+        conn.commit()
+
+    applied = []
+    for version, description, func in MIGRATIONS:
+        if version > target or version <= get_version(conn):
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version <= get_version(conn):
+                conn.rollback()
+                continue
+            func(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+        print(f"✓ 資料庫結構已遷移至 v{version}: {description}")
+    return applied
@@ -0,0 +1,175 @@
+"""
+CWA 檔案 API 回應解碼模組
+依序使用 msgspec（依資料集結構直接解碼並驗證型別）、orjson、標準函式庫 json，
+結構不符時拋出 PayloadSchemaError 並指出位置，而不是默默得到空的地點清單。
+依結構解碼時只保留結構中宣告的欄位，只適合建立快照等內部用途；
+需要完整資料時以 typed=False 解碼。
+"""
+import json
+from typing import List, Dict, Any, Optional, Tuple, TypedDict
+
+
+class PayloadSchemaError(ValueError):
+    """回應的資料結構與資料集定義不符"""
+
+    def __init__(self, dataset_id: str, message: str):
+        """
+        Args:
+            dataset_id: 資料集代碼
+            message: 不符的位置與原因
+        """
+        self.dataset_id = dataset_id
+        self.message = message
+        super().__init__(f"{dataset_id} 資料結構不符: {message}")
+
+    def __reduce__(self):
+        # 解析在子行程中失敗時，例外須能以原本的參數重建後傳回主行程
+        return type(self), (self.dataset_id, self.message)
+
+
+# ---- F-A0010-001 結構（只宣告使用到的欄位，msgspec 解碼時略過其餘欄位）----
+
+class AgrLocation(TypedDict, total=False):
+    locationName: str
+    geocode: str
+    areaCode: str
+    # 要素 → {'daily': [{'dataDate': ..., 'temperature': ...}, ...]}
+    weatherElements: Dict[str, Dict[str, Any]]
+
+
+class AgrWeatherForecasts(TypedDict):
+    location: List[AgrLocation]
+
+
+class AgrForecasts(TypedDict):
+    weatherForecasts: AgrWeatherForecasts
+
+
+class AgrData(TypedDict):
+    agrWeatherForecasts: AgrForecasts
+
+
+class Temporal(TypedDict, total=False):
+    issueTime: str
+
+
+class ResourceMetadata(TypedDict, total=False):
+    temporal: Temporal
+
+
+class AgrResource(TypedDict, total=False):
+    metadata: ResourceMetadata
+    data: AgrData
+
+
+class AgrResources(TypedDict):
+    resource: AgrResource
+
+
+class AgrOpenData(TypedDict, total=False):
+    identifier: str
+    sent: str
+    resources: AgrResources
+
+
+class AgrPayload(TypedDict):
+    cwaopendata: AgrOpenData
+
+
+# 資料集代碼 → 解碼結構（未列出的資料集解碼為一般字典後再驗證路徑）
+SCHEMAS: Dict[str, Any] = {
+    "F-A0010-001": AgrPayload,
+}
+
+_decoders: Dict[str, Any] = {}
+
+# (msgspec, orjson) 模組，未安裝者為 None；尚未載入時為 None
+_fast_modules: Optional[Tuple[Any, Any]] = None
+
+
+def _load_fast_modules() -> Tuple[Any, Any]:
+    """
+    延遲載入 msgspec 與 orjson，第一次解碼時才載入並快取結果
+    （排程爬取在資料仍新鮮時不解碼，不需要載入）
+
+    Returns:
+        tuple: (msgspec, orjson)，未安裝者為 None
+    """
+    global _fast_modules
+    if _fast_modules is None:
+        try:
+            import msgspec
+        except ImportError:
+            msgspec = None
+        try:
+            import orjson
+        except ImportError:
+            orjson = None
+        _fast_modules = (msgspec, orjson)
+    return _fast_modules
+
+
+def decoder_name() -> str:
+    """
+    目前可用的最快解碼器
+
+    Returns:
+        str: 'msgspec'、'orjson' 或 'json'
+    """
+    msgspec, orjson = _load_fast_modules()
+    if msgspec is not None:
+        return 'msgspec'
+    if orjson is not None:
+        return 'orjson'
+    return 'json'
+
+
+def _typed_decoder(dataset_id: str):
+    """取得（並快取）資料集的 msgspec 解碼器，沒有 msgspec 或未定義結構則返回 None"""
+    msgspec = _load_fast_modules()[0]
+    if msgspec is None or dataset_id not in SCHEMAS:
+        return None
+    decoder = _decoders.get(dataset_id)
+    if decoder is None:
+        decoder = _decoders[dataset_id] = msgspec.json.Decoder(SCHEMAS[dataset_id])
+    return decoder
+
+
+def decode_payload(raw: bytes, dataset, fast: bool = True, typed: bool = True) -> Dict[str, Any]:
+    """
+    解碼 API 回應並驗證資料結構
+
+    Args:
+        raw: API 回應的原始位元組
+        dataset: 資料集定義（datasets.Dataset）
+        fast: 是否使用 msgspec/orjson，False 時一律使用標準函式庫
+        typed: 是否依資料集結構解碼（需要 msgspec），False 時保留所有欄位
+
+    Returns:
+        Dict: 解碼後的資料；依結構解碼時只保留宣告的欄位，否則與 json.loads 的結果相同
+
+    Raises:
+        PayloadSchemaError: 資料結構與資料集定義不符（如缺少必要欄位、型別錯誤、沒有地點）
+        ValueError: 不是有效的 JSON
+    """
+    msgspec, orjson = _load_fast_modules() if fast else (None, None)
+    decoder = _typed_decoder(dataset.dataset_id) if fast and typed else None
+    if decoder is not None:
+        try:
+            data = decoder.decode(raw)
+        except msgspec.ValidationError as e:
+            raise PayloadSchemaError(dataset.dataset_id, str(e)) from None
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from None
+    elif orjson is not None:
+        data = orjson.loads(raw)
+    elif msgspec is not None:
+        try:
+            data = msgspec.json.decode(raw)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from None
+    else:
+        data = json.loads(raw)
+
+    dataset.validate(data)
+    return data
@@ -0,0 +1,159 @@
+"""
+背景更新排程模組
+在快取過期前預先下載預報快照並寫入資料庫，使使用者請求不必等待上游 API
+"""
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, Callable
+from weather_crawler import WeatherAPIClient
+from metrics import metrics
+
+metrics.describe('weather_refresh_seconds', "背景更新一次快照的耗時（秒）")
+metrics.describe('weather_refresh_total', "背景更新次數，依結果（success、failure）區分")
+metrics.describe('weather_refresh_consecutive_failures', "背景更新目前的連續失敗次數")
+
+
+class RefreshScheduler:
+    """
+    預報快照背景更新排程
+
+    成功時每隔 interval_seconds（加上隨機抖動）更新一次，應小於快照的有效期限；
+    失敗時以指數退避重試，期間使用者仍由共用快取取得上一份快照。
+    """
+
+    def __init__(
+        self,
+        client: Optional[WeatherAPIClient] = None,
+        interval_seconds: Optional[float] = None,
+        jitter: float = 0.1,
+        retry_base_seconds: float = 15,
+        max_backoff_seconds: float = 300,
+        refresh_func: Optional[Callable[[], bool]] = None
+    ):
+        """
+        初始化排程
+
+        Args:
+            client: 要更新的 API 客戶端，未提供則建立新的客戶端
+            interval_seconds: 更新間隔（秒），未提供則為快照有效期限的 80%
+            jitter: 更新間隔的隨機抖動比例（0.1 表示 ±10%）
+            retry_base_seconds: 失敗後第一次重試的等待秒數
+            max_backoff_seconds: 失敗重試的最長等待秒數
+            refresh_func: 自訂的更新函式，返回是否成功，未提供則使用 refresh_once
+        """
+        self.client = client or WeatherAPIClient()
+        self.interval_seconds = interval_seconds or self.client.snapshot_ttl_minutes * 60 * 0.8
+        self.jitter = jitter
+        self.retry_base_seconds = retry_base_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.refresh_func = refresh_func or self.refresh_once
+
+        self.last_success: Optional[datetime] = None
+        self.last_attempt: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.consecutive_failures = 0
+        self.next_run_at: Optional[float] = None
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh_once(self) -> bool:
+        """
+        立即更新一次快照並寫入資料庫
+
+        Returns:
+            bool: 成功返回 True
+        """
+        snapshot = self.client.refresh_snapshot()
+        if snapshot is None:
+            return False
+        # 寫入資料庫（資料未變更時會自動略過）
+        self.client.get_all_locations_data()
+        return True
+
+    def run_once(self) -> float:
+        """
+        執行一次更新並記錄結果
+
+        Returns:
+            float: 距離下一次更新的秒數
+        """
+        self.last_attempt = datetime.now()
+        start = time.perf_counter()
+        try:
+            ok = self.refresh_func()
+            self.last_error = None if ok else "更新失敗"
+        except Exception as e:
+            ok = False
+            self.last_error = str(e)
+            print(f"✗ 背景更新時發生錯誤: {e}")
+        metrics.observe('weather_refresh_seconds', time.perf_counter() - start)
+        metrics.inc('weather_refresh_total', result='success' if ok else 'failure')
+
+        if ok:
+            self.last_success = self.last_attempt
+            self.consecutive_failures = 0
+            delay = self.interval_seconds
+        else:
+            self.consecutive_failures += 1
+            delay = min(
+                self.max_backoff_seconds,
+                self.retry_base_seconds * 2 ** (self.consecutive_failures - 1)
+            )
+
+        metrics.set_gauge('weather_refresh_consecutive_failures', self.consecutive_failures)
+        delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        self.next_run_at = time.monotonic() + delay
+        return delay
+
+    def run_forever(self):
+        """在目前執行緒持續執行排程，直到呼叫 stop()"""
+        while not self._stop.is_set():
+            delay = self.run_once()
+            self._stop.wait(delay)
+
+    def start(self) -> "RefreshScheduler":
+        """
+        以背景 daemon 執行緒啟動排程
+
+        Returns:
+            RefreshScheduler: 排程本身
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="weather-refresh", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        停止排程
+
+        Args:
+            timeout: 等待執行緒結束的秒數
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        """
+        取得排程狀態
+
+        Returns:
+            Dict: 最近成功時間、落後秒數（距最近成功）、連續失敗次數等
+        """
+        now = datetime.now()
+        lag = (now - self.last_success).total_seconds() if self.last_success else None
+        next_run_in = max(0.0, self.next_run_at - time.monotonic()) if self.next_run_at else None
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'last_success': self.last_success.isoformat(timespec='seconds') if self.last_success else None,
+            'last_attempt': self.last_attempt.isoformat(timespec='seconds') if self.last_attempt else None,
+            'lag_seconds': round(lag, 1) if lag is not None else None,
+            'consecutive_failures': self.consecutive_failures,
+            'last_error': self.last_error,
+            'next_run_in_seconds': round(next_run_in, 1) if next_run_in is not None else None,
+        }
@@ -0,0 +1,207 @@
+"""
+上游呼叫韌性模組
+提供帶抖動的指數退避重試與斷路器，避免在中央氣象署服務異常時持續重試
+"""
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple, Type, Any
+
+
+class CircuitOpenError(Exception):
+    """斷路器開啟中，暫停呼叫上游服務"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"斷路器開啟中（{name}），{retry_after:.0f} 秒後重試")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    斷路器
+
+    連續失敗達 failure_threshold 次後開啟，reset_timeout 秒內直接拒絕呼叫；
+    之後進入半開狀態放行一次試探呼叫，成功則關閉、失敗則重新開啟。
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 60):
+        """
+        初始化斷路器
+
+        Args:
+            name: 斷路器名稱（用於訊息）
+            failure_threshold: 開啟前允許的連續失敗次數
+            reset_timeout: 開啟後到允許試探呼叫的秒數
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state_locked()
+
+    def _state_locked(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def before_call(self):
+        """
+        呼叫前檢查，斷路器開啟時拋出例外
+
+        Raises:
+            CircuitOpenError: 斷路器開啟中，或半開狀態已有試探呼叫進行中
+        """
+        with self._lock:
+            state = self._state_locked()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            retry_after = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+            raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self):
+        """記錄成功呼叫，關閉斷路器"""
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+
+    def release(self):
+        """結束一次不影響斷路器狀態的呼叫（如非上游故障的錯誤），釋放半開試探"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        """記錄失敗呼叫，達到門檻或試探失敗時開啟斷路器"""
+        with self._lock:
+            self.failures += 1
+            if self._probe_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+class RetryPolicy:
+    """帶抖動的指數退避重試策略"""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        jitter: float = 0.5
+    ):
+        """
+        初始化重試策略
+
+        Args:
+            max_attempts: 最多嘗試次數（含第一次）
+            base_delay: 第一次重試前的等待秒數
+            max_delay: 單次等待的上限秒數
+            jitter: 等待時間的隨機比例（0.5 表示 50%~100% 之間）
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def delay(self, attempt: int) -> float:
+        """
+        取得第 attempt 次失敗後的等待秒數
+
+        Args:
+            attempt: 已失敗的次數（從 1 開始）
+
+        Returns:
+            float: 等待秒數
+        """
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * (1 - self.jitter * random.random())
+
+    def call(
+        self,
+        func: Callable[[], Any],
+        breaker: Optional[CircuitBreaker] = None,
+        retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+        deadline: Optional[float] = None
+    ) -> Any:
+        """
+        呼叫 func，遇到可重試的例外時退避後重試
+
+        只有 retry_on 中的例外會重試並計入斷路器失敗次數；其他例外直接拋出。
+        提供 deadline 時，等待後會超過期限的重試不再進行，直接拋出最後一次的例外。
+
+        Args:
+            func: 要呼叫的函式
+            breaker: 斷路器，提供時每次嘗試前先檢查
+            retry_on: 可重試的例外類型
+            deadline: 整體期限（time.monotonic() 的時間點），未提供則只受 max_attempts 限制
+
+        Returns:
+            Any: func 的返回值
+
+        Raises:
+            CircuitOpenError: 斷路器開啟中
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            if breaker is not None:
+                breaker.before_call()
+            try:
+                result = func()
+            except retry_on:
+                if breaker is not None:
+                    breaker.record_failure()
+                if attempt >= self.max_attempts:
+                    raise
+                delay = self.delay(attempt)
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    raise
+                time.sleep(delay)
+                continue
+            except BaseException:
+                if breaker is not None:
+                    # 非上游故障（如授權錯誤）不計入失敗
+                    breaker.release()
+                raise
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+
+# 以名稱區分的行程內共用斷路器
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, failure_threshold: int = 5, reset_timeout: float = 60) -> CircuitBreaker:
+    """
+    取得指定名稱的共用斷路器，不存在時建立
+
+    Args:
+        name: 斷路器名稱（如資料集代碼）
+        failure_threshold: 開啟前允許的連續失敗次數（僅建立時使用）
+        reset_timeout: 開啟後到允許試探呼叫的秒數（僅建立時使用）
+
+    Returns:
+        CircuitBreaker: 斷路器
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, failure_threshold, reset_timeout)
+        return breaker
@@ -0,0 +1,80 @@
+"""
+測試共用設定
+以 benchmarks/stub_server.py 的本機替身伺服器取代 CWA API，資料庫一律建立在暫存目錄
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.payloads import encode, load_fixture, scale_payload
+from benchmarks.stub_server import StubCWAServer
+from database import WeatherDatabase
+from resilience import CircuitBreaker
+from weather_crawler import WeatherAPIClient
+
+
+@pytest.fixture(scope="session")
+def payload():
+    """以 fixture 合成的 F-A0010-001 資料（20 個地點、5 天）"""
+    return scale_payload(load_fixture(), 20, 5)
+
+
+@pytest.fixture(scope="session")
+def c0032_payload():
+    """F-C0032-001 格式（今明 36 小時縣市預報）的兩個縣市資料"""
+    def element(name, steps):
+        return {'elementName': name, 'time': [
+            {'startTime': start, 'endTime': end, 'parameter': parameter} for start, end, parameter in steps
+        ]}
+
+    def location(name, wx, max_t, min_t):
+        times = [
+            ("2025-12-04T18:00:00+08:00", "2025-12-05T06:00:00+08:00"),
+            ("2025-12-05T06:00:00+08:00", "2025-12-05T18:00:00+08:00"),
+        ]
+        return {'locationName': name, 'weatherElement': [
+            element('Wx', [(s, e, {'parameterName': text, 'parameterValue': '4'}) for (s, e), text in zip(times, wx)]),
+            element('MaxT', [(s, e, {'parameterName': str(v), 'parameterUnit': 'C'}) for (s, e), v in zip(times, max_t)]),
+            element('MinT', [(s, e, {'parameterName': str(v), 'parameterUnit': 'C'}) for (s, e), v in zip(times, min_t)]),
+        ]}
+
+    return {'cwaopendata': {
+        'identifier': 'c0032-test',
+        'sent': '2025-12-04T17:00:00+08:00',
+        'dataset': {
+            'datasetInfo': {'issueTime': '2025-12-04T17:00:00+08:00'},
+            'location': [
+                location('臺北市', ['多雲', '陰短暫雨'], [21, 19], [17, 16]),
+                location('高雄市', ['晴時多雲', '晴'], [27, 28], [21, 20]),
+            ],
+        },
+    }}
+
+
+@pytest.fixture
+def stub(payload):
+    """回應合成資料的 CWA API 替身伺服器"""
+    with StubCWAServer({WeatherAPIClient.DATASET_ID: encode(payload)}) as server:
+        yield server
+
+
+@pytest.fixture
+def db(tmp_path):
+    """暫存目錄中的新資料庫"""
+    database = WeatherDatabase(str(tmp_path / "test.db"))
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def client(stub):
+    """指向替身伺服器、不使用共用快取與共用斷路器的客戶端"""
+    client = WeatherAPIClient(api_key="TEST", use_database=False, use_shared_cache=False)
+    client.BASE_URL = stub.base_url
+    client.breaker = CircuitBreaker(client.dataset_id)
+    return client
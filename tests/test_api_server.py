@@ -0,0 +1,111 @@
+"""WeatherAPIServer 的回應快取、gzip 與條件式請求（上游為替身伺服器）"""
+import gzip
+import http.client
+import json
+from urllib.parse import quote
+
+import pytest
+
+from benchmarks.payloads import location_list
+from weather_api_server import WeatherAPIServer
+
+
+@pytest.fixture
+def server(client, db):
+    server = WeatherAPIServer(client, db=db, port=0).start()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def get(server):
+    host, port = server.address
+
+    def request(path, headers=None, method="GET"):
+        conn = http.client.HTTPConnection(host, port, timeout=5)
+        try:
+            conn.request(method, path, headers=headers or {})
+            response = conn.getresponse()
+            return response.status, dict(response.getheaders()), response.read()
+        finally:
+            conn.close()
+
+    return request
+
+
+def test_locations(get, payload):
+    status, headers, body = get("/locations")
+
+    assert status == 200
+    assert headers['ETag']
+    names = [loc['locationName'] for loc in location_list(payload)]
+    assert json.loads(body)['locations'] == sorted(names)
+
+
+def test_gzip_matches_identity_body(get, payload):
+    location = quote(location_list(payload)[0]['locationName'])
+    status, plain_headers, plain = get(f"/forecast/{location}")
+    assert status == 200
+    assert 'Content-Encoding' not in plain_headers
+
+    status, headers, body = get(f"/forecast/{location}", {'Accept-Encoding': 'gzip, deflate'})
+    assert status == 200
+    assert headers['Content-Encoding'] == 'gzip'
+    assert headers['Vary'] == 'Accept-Encoding'
+    assert headers['ETag'] != plain_headers['ETag']
+    assert gzip.decompress(body) == plain
+
+
+def test_if_none_match_returns_304(get, payload):
+    location = quote(location_list(payload)[0]['locationName'])
+    _, plain_headers, _ = get(f"/forecast/{location}")
+    _, gzip_headers, _ = get(f"/forecast/{location}", {'Accept-Encoding': 'gzip'})
+
+    # 原始與壓縮版本的 ETag 都視為相同內容
+    for etag in (plain_headers['ETag'], gzip_headers['ETag'], 'W/' + plain_headers['ETag']):
+        for encoding in ('identity', 'gzip'):
+            status, headers, body = get(
+                f"/forecast/{location}", {'If-None-Match': etag, 'Accept-Encoding': encoding}
+            )
+            assert status == 304
+            assert body == b''
+
+    status, _, _ = get(f"/forecast/{location}", {'If-None-Match': '"other"'})
+    assert status == 200
+
+
+def test_head_sends_headers_only(get):
+    _, get_headers, body = get("/locations")
+    status, headers, head_body = get("/locations", method="HEAD")
+
+    assert status == 200
+    assert head_body == b''
+    assert int(headers['Content-Length']) == len(body)
+    assert headers['ETag'] == get_headers['ETag']
+
+
+def test_errors(get):
+    assert get("/unknown")[0] == 404
+    assert get("/forecast")[0] == 404
+    assert get("/locations/" + quote("不存在的地點"))[0] == 404
+    assert get("/history/x?start=2025/12/01")[0] == 400
+
+
+def test_history_reads_database(get, db, payload):
+    location = location_list(payload)[0]['locationName']
+    db.insert_many([(location, "2025-12-04", 25.0, 15.0, "晴")])
+
+    status, _, body = get(f"/history/{quote(location)}?start=2025-12-01")
+    assert status == 200
+    data = json.loads(body)['data']
+    assert [(row['date'], row['max_temp']) for row in data] == [("2025-12-04", 25.0)]
+
+
+def test_location_summary_is_object(get, payload):
+    location = location_list(payload)[0]['locationName']
+    status, _, body = get(f"/locations/{quote(location)}")
+
+    assert status == 200
+    data = json.loads(body)['data']
+    assert data['location'] == location
+    assert set(data) == {'location', 'date', 'max_temp', 'min_temp', 'weather', 'updated_at'}
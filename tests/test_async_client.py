@@ -0,0 +1,98 @@
+"""AsyncWeatherAPIClient 對替身伺服器的查詢、資料庫寫入與併發上限"""
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from async_weather_client import AsyncWeatherAPIClient, gather_all_locations_data
+from benchmarks.payloads import encode, location_list
+from benchmarks.stub_server import StubCWAServer
+from resilience import CircuitBreaker
+
+
+@pytest.fixture
+def multi_stub(payload, c0032_payload):
+    bodies = {
+        "F-A0010-001": encode(payload),
+        "F-C0032-001": json.dumps(c0032_payload, ensure_ascii=False).encode('utf-8'),
+    }
+    with StubCWAServer(bodies) as server:
+        yield server
+
+
+def _client(server, dataset_id="F-A0010-001", **kwargs):
+    """指向替身伺服器、不使用共用快取與共用斷路器的非同步客戶端"""
+    client = AsyncWeatherAPIClient(api_key="TEST", use_database=False, dataset_id=dataset_id, **kwargs)
+    client._client.BASE_URL = server.base_url
+    client._client.use_shared_cache = False
+    client._client.breaker = CircuitBreaker(dataset_id)
+    return client
+
+
+def test_same_surface_as_sync_client(multi_stub, db, payload):
+    client = _client(multi_stub)
+    client.db = db
+    names = sorted(loc['locationName'] for loc in location_list(payload))
+
+    async def run():
+        locations = await client.get_locations()
+        info = await client.get_temperature_info(names[0])
+        batch = await client.get_all_locations_data()
+        return locations, info, batch
+
+    locations, info, batch = asyncio.run(run())
+    assert locations == names
+    assert info['location'] == names[0]
+    assert [record.location for record in batch] == names
+    assert multi_stub.requests == 1
+    assert len(db.get_all_latest_data()) == len(names)
+    assert db.get_forecast(names[0], element='MaxT')
+
+
+def test_gather_multiple_datasets(multi_stub):
+    clients = [_client(multi_stub), _client(multi_stub, "F-C0032-001"), _client(multi_stub, "F-D0047-061")]
+    assert clients[1].dataset_id == "F-C0032-001"
+
+    agr, c0032, missing = asyncio.run(gather_all_locations_data(clients))
+    assert len(agr) == 20
+    assert [record.location for record in c0032] == ['臺北市', '高雄市']
+    # 下載失敗的客戶端得到空批次，不影響其他客戶端
+    assert len(missing) == 0
+
+
+@pytest.mark.parametrize("limit", [1, 2])
+def test_shared_semaphore_bounds_concurrency(multi_stub, limit):
+    multi_stub.latency_seconds = 0.2
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    async def run():
+        semaphore = asyncio.Semaphore(limit)
+        clients = [_client(multi_stub, dataset_id, semaphore=semaphore)
+                   for dataset_id in ("F-A0010-001", "F-C0032-001")]
+        for client in clients:
+            fetch = client._client.get_snapshot
+
+            def counted(fetch=fetch):
+                nonlocal active, peak
+                with lock:
+                    active += 1
+                    peak = max(peak, active)
+                try:
+                    return fetch()
+                finally:
+                    with lock:
+                        active -= 1
+
+            client._client.get_snapshot = counted
+        return await gather_all_locations_data(clients)
+
+    start = time.monotonic()
+    results = asyncio.run(run())
+    assert all(len(batch) > 0 for batch in results)
+    assert peak == limit
+    if limit == 1:
+        assert time.monotonic() - start >= 0.4
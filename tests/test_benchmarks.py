@@ -0,0 +1,26 @@
+"""benchmarks 的 fixture 記錄與資料合成"""
+import json
+
+from benchmarks import record as record_module
+from benchmarks.payloads import encode, location_list, scale_payload
+from benchmarks.stub_server import StubCWAServer
+from weather_crawler import WeatherAPIClient
+
+
+def test_record_uses_requested_dataset(c0032_payload, tmp_path, monkeypatch):
+    path = tmp_path / "F-C0032-001.json"
+    monkeypatch.setattr(record_module, 'fixture_path', lambda dataset_id: str(tmp_path / f"{dataset_id}.json"))
+    with StubCWAServer({"F-C0032-001": encode(c0032_payload)}) as server:
+        monkeypatch.setattr(WeatherAPIClient, 'BASE_URL', server.base_url)
+        assert record_module.record("F-C0032-001")
+
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == c0032_payload
+
+
+def test_scale_payload(payload):
+    scaled = scale_payload(payload, 12, 9)
+    locations = location_list(scaled)
+    assert len(locations) == 12
+    assert len({loc['locationName'] for loc in locations}) == 12
+    assert all(len(loc['weatherElements']['MaxT']['daily']) == 9 for loc in locations)
@@ -0,0 +1,31 @@
+"""crawl_and_save 的排程爬取與延後載入"""
+import os
+import subprocess
+import sys
+
+from database import WeatherDatabase
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code, cwd):
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys; sys.path.insert(0, {ROOT!r})\n{code}"],
+        cwd=cwd, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip().splitlines()[-1]
+
+
+def test_cron_crawl_skips_fresh_data_without_loading_requests(tmp_path):
+    db = WeatherDatabase(str(tmp_path / "data.db"))
+    db.insert_weather_data("臺北", "2025-12-04", 20.0, 10.0, "晴")
+    db.close()
+
+    loaded = _run(
+        "import crawl_and_save\n"
+        "assert crawl_and_save.cron_crawl(10)\n"
+        "print(sorted(m for m in ('requests', 'pandas', 'pyarrow') if m in sys.modules))",
+        tmp_path
+    )
+    assert loaded == "[]"
@@ -0,0 +1,63 @@
+"""CrawlPipeline 對替身伺服器的多資料集爬取（下載、解析、寫入）"""
+import json
+import pickle
+
+import pytest
+
+from benchmarks.payloads import encode, location_list
+from benchmarks.stub_server import StubCWAServer
+from crawl_pipeline import CrawlPipeline, parse_and_extract
+from payload_decoder import PayloadSchemaError
+
+
+@pytest.fixture
+def multi_stub(payload, c0032_payload):
+    bodies = {
+        "F-A0010-001": encode(payload),
+        "F-C0032-001": json.dumps(c0032_payload, ensure_ascii=False).encode('utf-8'),
+        # 資料結構不符的資料集：下載成功但解析失敗
+        "F-D0047-005": b'{"cwaopendata": {}}',
+    }
+    with StubCWAServer(bodies) as server:
+        yield server
+
+
+def test_parse_and_extract(payload):
+    batch = parse_and_extract("F-A0010-001", encode(payload))
+
+    assert batch.dataset_id == "F-A0010-001"
+    assert len(batch.summaries) + batch.skipped == len(location_list(payload))
+    assert len(batch.forecast) > 0
+
+    with pytest.raises(PayloadSchemaError) as excinfo:
+        parse_and_extract("F-D0047-005", b'{"cwaopendata": {}}')
+    # 子行程的例外以 pickle 傳回主行程
+    error = pickle.loads(pickle.dumps(excinfo.value))
+    assert (error.dataset_id, str(error)) == ("F-D0047-005", str(excinfo.value))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_writes_each_dataset_and_isolates_failures(multi_stub, db, payload, workers):
+    # F-D0047-009 不在替身伺服器中（404），F-D0047-005 解析失敗
+    pipeline = CrawlPipeline(
+        ["F-A0010-001", "F-C0032-001", "F-D0047-005", "F-D0047-009"],
+        api_key="TEST", db=db, workers=workers, base_url=multi_stub.base_url
+    )
+    report = pipeline.run()
+
+    assert sorted(report['failed']) == ["F-D0047-005", "F-D0047-009"]
+    ok = {result['dataset']: result for result in report['results'] if result['ok']}
+    assert sorted(ok) == ["F-A0010-001", "F-C0032-001"]
+    assert ok["F-A0010-001"]['counts']['inserted'] == ok["F-A0010-001"]['locations'] > 0
+
+    latest = db.get_latest_data("臺北市", dataset="F-C0032-001")
+    assert (latest['max_temp'], latest['min_temp'], latest['weather']) == (21.0, 17.0, "多雲")
+    forecast = db.get_forecast("高雄市", element="MaxT", dataset="F-C0032-001")
+    assert [row['value'] for row in forecast] == [27.0, 28.0]
+    assert len(db.get_all_latest_data("F-A0010-001")) == ok["F-A0010-001"]['locations']
+
+
+def test_duplicate_and_unknown_datasets(db):
+    assert CrawlPipeline(["F-C0032-001", "F-C0032-001"], db=db).dataset_ids == ["F-C0032-001"]
+    with pytest.raises(KeyError):
+        CrawlPipeline(["F-X0000-000"], db=db)
@@ -0,0 +1,103 @@
+"""WeatherDatabase 的批次寫入邊界情況與共用連線"""
+import threading
+
+import pandas as pd
+
+from database import WeatherDatabase
+
+
+def _row(location, date, max_temp=25.0, min_temp=15.0, weather="晴"):
+    return {'location': location, 'date': date, 'max_temp': max_temp, 'min_temp': min_temp, 'weather': weather}
+
+
+def test_counts_inserted_updated_unchanged(db):
+    rows = [_row("臺北", "2025-12-04"), _row("臺中", "2025-12-04")]
+    assert db.insert_many(rows) == {'inserted': 2, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+
+    rows = [_row("臺北", "2025-12-04"), _row("臺中", "2025-12-04", max_temp=28.0), _row("臺南", "2025-12-04")]
+    assert db.insert_many(rows) == {'inserted': 1, 'updated': 1, 'unchanged': 1, 'skipped': 0}
+    assert db.get_latest_data("臺中")['max_temp'] == 28.0
+
+
+def test_empty_batch(db):
+    assert db.insert_many([]) == {'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+
+
+def test_undated_rows_are_skipped(db):
+    rows = [_row("臺北", "-"), _row("臺中", None), _row("臺南", "2025-12-04")]
+    counts = db.insert_many(rows)
+
+    assert counts == {'inserted': 1, 'updated': 0, 'unchanged': 0, 'skipped': 2}
+    assert db.get_latest_data("臺南") is not None
+    assert db.get_latest_data("臺北") is None
+    assert db.insert_weather_data("臺北", "-", 20.0, 10.0, "晴") is False
+
+
+def test_duplicate_keys_keep_last_row(db):
+    rows = [("臺北", "2025-12-04", 20.0, 10.0, "雨"), ("臺北", "2025-12-04", 22.0, 12.0, "晴")]
+    assert db.insert_many(rows)['inserted'] == 1
+
+    latest = db.get_latest_data("臺北")
+    assert (latest['max_temp'], latest['min_temp'], latest['weather']) == (22.0, 12.0, "晴")
+
+
+def test_dataframe_nan_becomes_null(db):
+    frame = pd.DataFrame([_row("臺北", "2025-12-04", max_temp=float('nan'))])
+    assert db.insert_many(frame)['inserted'] == 1
+
+    latest = db.get_latest_data("臺北")
+    assert latest['max_temp'] is None
+    assert latest['min_temp'] == 15.0
+
+
+def test_datasets_are_isolated(db):
+    db.insert_many([_row("臺北", "2025-12-04", max_temp=20.0)], dataset="F-A0010-001")
+    counts = db.insert_many([_row("臺北", "2025-12-04", max_temp=30.0)], dataset="F-C0032-001")
+
+    assert counts['inserted'] == 1
+    assert db.get_latest_data("臺北", dataset="F-A0010-001")['max_temp'] == 20.0
+    assert db.get_latest_data("臺北", dataset="F-C0032-001")['max_temp'] == 30.0
+
+
+def test_nested_blocks_across_instances_share_one_transaction(db):
+    other = WeatherDatabase(db.db_path)
+    try:
+        with db.get_connection() as conn:
+            db.insert_weather_data("臺北", "2025-12-04", 20.0, 10.0, "晴")
+            # 同一路徑的另一個實例在同一執行緒共用連線，內層區塊不得提交外層交易
+            assert other.insert_weather_data("臺中", "2025-12-04", 22.0, 12.0, "晴")
+            assert conn.in_transaction
+            raise RuntimeError("rollback")
+    except RuntimeError:
+        pass
+    assert db.get_latest_data("臺北") is None
+    assert db.get_latest_data("臺中") is None
+
+
+def test_close_only_releases_calling_thread(db):
+    other = WeatherDatabase(db.db_path)
+    db.insert_weather_data("臺北", "2025-12-04", 20.0, 10.0, "晴")
+
+    errors = []
+    opened = threading.Event()
+    closed = threading.Event()
+
+    def worker():
+        try:
+            with other.get_connection() as conn:
+                opened.set()
+                closed.wait(5)
+                conn.execute("SELECT COUNT(*) FROM weather_data").fetchone()
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    assert opened.wait(5)
+    db.close()
+    closed.set()
+    thread.join(5)
+
+    assert errors == []
+    # 關閉後再次使用時重新建立連線
+    assert other.get_latest_data("臺北")['max_temp'] == 20.0
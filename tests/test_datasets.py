@@ -0,0 +1,79 @@
+"""各資料集（F-A0010-001、F-C0032-001、F-D0047-*）的地點、摘要與預報表提取"""
+import pytest
+
+from benchmarks.payloads import location_list
+from datasets import get_dataset
+from forecast_snapshot import ForecastSnapshot
+from forecast_table import extract_forecast_table, iter_forecast_entries
+
+
+@pytest.fixture(scope="module")
+def d0047_payload():
+    """F-D0047 格式（依縣市分組的鄉鎮逐時預報）的單一鄉鎮資料"""
+    def step(time, **values):
+        return {'dataTime': time, 'elementValue': [values]}
+
+    return {'cwaopendata': {
+        'identifier': 'd0047-test',
+        'dataset': {'locations': {
+            'locationsName': '臺北市',
+            'location': [{
+                'locationName': '中正區',
+                'geocode': '6300500',
+                'weatherElement': [
+                    {'elementName': '溫度', 'time': [
+                        step('2025-12-04T18:00:00+08:00', Temperature='18'),
+                        step('2025-12-04T21:00:00+08:00', Temperature='16'),
+                        step('2025-12-05T00:00:00+08:00', Temperature='15'),
+                    ]},
+                    {'elementName': '天氣現象', 'time': [
+                        {'startTime': '2025-12-04T18:00:00+08:00',
+                         'elementValue': [{'Weather': '多雲', 'WeatherCode': '04'}]},
+                    ]},
+                ],
+            }],
+        }},
+    }}
+
+
+def test_c0032_summary_and_table(c0032_payload):
+    snapshot = ForecastSnapshot(c0032_payload, dataset=get_dataset("F-C0032-001"))
+
+    assert snapshot.get_locations() == ['臺北市', '高雄市']
+    assert snapshot.identifier == 'c0032-test'
+    info = snapshot.get_temperature_info('台北市')
+    assert (info['date'], info['max_temp'], info['min_temp'], info['weather']) == ('2025-12-04', 21.0, 17.0, '多雲')
+
+    table = snapshot.get_forecast('高雄市', element='MaxT')
+    assert [(date[:10], value) for _, _, date, value, _ in table.rows()] == [('2025-12-04', 27.0), ('2025-12-05', 28.0)]
+    assert snapshot.forecast_table.elements() == ['MaxT', 'MinT', 'Wx']
+
+
+def test_d0047_groups_townships_by_county(d0047_payload):
+    snapshot = ForecastSnapshot(d0047_payload, dataset=get_dataset("F-D0047-061"))
+
+    assert snapshot.get_locations() == ['臺北市中正區']
+    assert snapshot.resolve_location('台北市中正區') == '臺北市中正區'
+    info = snapshot.get_temperature_info('臺北市中正區')
+    # 沒有最高、最低溫要素時，以第一天的逐時溫度計算
+    assert (info['date'], info['max_temp'], info['min_temp'], info['weather']) == ('2025-12-04', 18.0, 16.0, '多雲')
+
+    table = snapshot.get_forecast(element='溫度', end_date='2025-12-04')
+    assert [value for *_, value, _ in table.rows()] == [18.0, 16.0]
+
+
+def test_a0010_dataset_shares_table_iteration(payload):
+    locations = location_list(payload)
+    dataset = get_dataset("F-A0010-001")
+    table = extract_forecast_table(locations)
+
+    entries = [entry for loc in locations for entry in dataset.iter_entries(loc)]
+    assert len(entries) == len(table)
+    assert entries == [entry for loc in locations for entry in iter_forecast_entries(loc)]
+    assert all(len(date) == 10 for _, date, _ in entries)
+
+
+def test_unknown_dataset():
+    with pytest.raises(KeyError):
+        get_dataset("F-X0000-000")
+    assert get_dataset("F-D0047-005").dataset_id == "F-D0047-005"
@@ -0,0 +1,72 @@
+"""ForecastSnapshot：單次下載的預報快照、地點索引與客戶端的重複使用"""
+import copy
+from datetime import datetime, timedelta
+
+from benchmarks.payloads import location_list
+from forecast_snapshot import ForecastSnapshot
+
+
+def test_snapshot_serves_every_location(payload):
+    snapshot = ForecastSnapshot(payload)
+    names = [loc['locationName'] for loc in location_list(payload)]
+
+    assert snapshot.get_locations() == sorted(names)
+    assert snapshot.identifier == payload['cwaopendata']['identifier']
+    assert snapshot.issue_time is not None
+
+    first = location_list(payload)[0]
+    info = snapshot.get_temperature_info(first['locationName'])
+    assert dict(info) == dict(ForecastSnapshot.extract_first_day(first['locationName'], first), updated_at=None)
+    assert [record.location for record in snapshot.get_all_locations_data()] == sorted(names)
+    assert snapshot.get_temperature_info("不存在的地點") is None
+
+
+def test_staleness():
+    snapshot = ForecastSnapshot({}, fetched_at=datetime.now() - timedelta(minutes=11))
+    assert snapshot.is_stale(10)
+    assert not snapshot.is_stale(15)
+
+    snapshot.confirm()
+    assert not snapshot.is_stale(10)
+
+
+def test_full_crawl_downloads_once(client, stub, payload):
+    locations = client.get_locations()
+    assert len(locations) == len(location_list(payload))
+    for name in locations:
+        assert client.get_temperature_info(name)['location'] == name
+    assert len(client.get_all_locations_data()) == len(locations)
+
+    assert stub.requests == 1
+
+
+def _indexed_payload(payload):
+    """前兩個地點改為「臺北市」（geocode 63）與「臺中市」（areaCode 66）的資料"""
+    data = copy.deepcopy(payload)
+    locations = location_list(data)
+    locations[0].update(locationName="臺北市", geocode="63")
+    locations[1].update(locationName="臺中市", areaCode=66)
+    return data
+
+
+def test_lookup_by_name_code_and_alias(payload):
+    snapshot = ForecastSnapshot(_indexed_payload(payload))
+
+    assert snapshot.resolve_location("臺北市") == "臺北市"
+    assert snapshot.resolve_location("63") == "臺北市"
+    assert snapshot.resolve_location("66") == "臺中市"
+    assert snapshot.resolve_location("台北市") == "臺北市"
+    assert snapshot.resolve_location(" 台中市 ") == "臺中市"
+    assert snapshot.resolve_location("台南市") is None
+
+    assert snapshot.get_temperature_info("63")['location'] == "臺北市"
+    assert snapshot.get_temperature_info("台中市")['location'] == "臺中市"
+    assert len(snapshot.get_forecast("63", element="MaxT")) == 5
+
+
+def test_summaries_follow_sorted_index(payload):
+    snapshot = ForecastSnapshot(_indexed_payload(payload))
+
+    # 依排序後的名稱以二分搜尋取出的摘要必須對應正確的地點
+    for name in snapshot.get_locations():
+        assert snapshot.get_temperature_info(name)['location'] == name
@@ -0,0 +1,75 @@
+"""ForecastTable 的提取、地點資料列範圍、篩選與資料庫寫入"""
+import math
+
+from benchmarks.payloads import location_list
+from forecast_table import ForecastTable, extract_forecast_table, split_entry_values
+
+
+def test_extracts_every_day_and_element(payload):
+    table = extract_forecast_table(location_list(payload))
+    first = location_list(payload)[0]
+
+    # 20 個地點 × 3 個要素 × 5 天
+    assert len(table) == 20 * 3 * 5
+    assert table.elements() == ['MaxT', 'MinT', 'Wx']
+    rows = table.filter(first['locationName'], element='MaxT')
+    expected = [(day['dataDate'], float(day['temperature'])) for day in first['weatherElements']['MaxT']['daily']]
+    assert [(date, value) for _, _, date, value, _ in rows.rows()] == expected
+    assert all(text for *_, text in table.filter(element='Wx').rows())
+
+
+def test_split_entry_values():
+    assert split_entry_values({'dataDate': '2025-12-04', 'temperature': '25'}) == (25.0, None)
+    assert split_entry_values({'dataDate': '2025-12-04', 'weather': '晴', 'weatherid': '1'}) == (1.0, '晴')
+    assert split_entry_values({'dataDate': '2025-12-04', 'temperature': '-'}) == (None, None)
+
+
+def test_location_rows_are_ranges():
+    table = ForecastTable()
+    for location in ("臺北", "臺中"):
+        for day in ("2025-12-04", "2025-12-05"):
+            table.append(location, "MaxT", day, 20.0, None)
+
+    assert table.location_rows("臺北") == range(0, 2)
+    # 最後一個地點的範圍在加入時持續延伸
+    assert table.location_rows("臺中") == range(2, 4)
+    table.append("臺中", "MinT", "2025-12-04", 10.0, None)
+    assert table.location_rows("臺中") == range(2, 5)
+    assert list(table.location_rows("臺南")) == []
+
+
+def test_non_contiguous_locations_fall_back_to_scan():
+    table = ForecastTable()
+    table.append("臺北", "MaxT", "2025-12-04", 20.0, None)
+    table.append("臺中", "MaxT", "2025-12-04", 22.0, None)
+    table.append("臺北", "MinT", "2025-12-04", 12.0, None)
+
+    assert list(table.location_rows("臺北")) == [0, 2]
+    assert [element for _, element, *_ in table.filter("臺北").rows()] == ['MaxT', 'MinT']
+    assert len(table.filter("臺中")) == 1
+
+
+def test_filter_by_date_and_missing_values():
+    table = ForecastTable()
+    table.append("臺北", "T", "2025-12-04T18:00:00+08:00", 18.0, None)
+    table.append("臺北", "T", "2025-12-05T00:00:00+08:00", None, None)
+
+    assert math.isnan(table.value[1])
+    assert table.to_records()[1]['value'] is None
+    # 逐時資料的結束日期比對時間的日期部分
+    assert len(table.filter(end_date="2025-12-04")) == 1
+    assert len(table.filter(start_date="2025-12-05")) == 1
+    frame = table.to_frame()
+    assert str(frame['element'].dtype) == 'category'
+    assert frame['value'].isna().tolist() == [False, True]
+
+
+def test_database_round_trip(db, payload):
+    table = extract_forecast_table(location_list(payload))
+    assert db.insert_forecast(table, "2025-12-04T11:00:00+08:00") == len(table)
+
+    location = location_list(payload)[0]['locationName']
+    rows = db.get_forecast(location, element='MinT', start_date="2025-12-05", end_date="2025-12-06")
+    expected = table.filter(location, 'MinT', "2025-12-05", "2025-12-06")
+    assert [(row['date'], row['value']) for row in rows] == [(date, value) for _, _, date, value, _ in expected.rows()]
+    assert {row['issue_time'] for row in rows} == {"2025-12-04T11:00:00+08:00"}
@@ -0,0 +1,64 @@
+"""歷史資料的日期範圍查詢與日、週、月彙總"""
+from datetime import date, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def history_db(db):
+    """臺北 2025-11-28 ~ 2025-12-09 每日一筆（最高溫 20+i、最低溫 10+i），臺中只有三天"""
+    start = date(2025, 11, 28)
+    rows = [("臺北", (start + timedelta(days=i)).isoformat(), 20.0 + i, 10.0 + i, "晴") for i in range(12)]
+    rows += [("臺中", f"2025-12-0{day}", 25.0, 15.0, "雨") for day in (1, 2, 3)]
+    db.insert_many(rows)
+    db.insert_many([("臺北", "2025-12-01", 99.0, 0.0, "晴")], dataset="F-C0032-001")
+    return db
+
+
+def test_history_range(history_db):
+    frame = history_db.get_history("臺北", "2025-12-01", "2025-12-03")
+
+    assert list(frame.columns) == ['date', 'max_temp', 'min_temp', 'weather']
+    assert frame['date'].dt.strftime('%Y-%m-%d').tolist() == ["2025-12-01", "2025-12-02", "2025-12-03"]
+    assert frame['max_temp'].tolist() == [23.0, 24.0, 25.0]
+    assert str(frame['max_temp'].dtype) == 'float64'
+    # 其他資料集的同名地點不會混入
+    assert history_db.get_history("臺北", "2025-12-01", "2025-12-01", dataset="F-C0032-001")['max_temp'].tolist() == [99.0]
+    assert history_db.get_history("臺南").empty
+
+
+def test_history_multi_and_batch(history_db):
+    frame = history_db.get_history_multi(["臺北", "臺中"], start_date="2025-12-02", end_date="2025-12-02")
+    assert frame['location'].tolist() == ["臺中", "臺北"]
+    assert str(frame['location'].dtype) == 'category'
+
+    batch = history_db.get_history_batch(end_date="2025-11-29")
+    assert [(record.location, record.date) for record in batch] == [("臺北", "2025-11-28"), ("臺北", "2025-11-29")]
+    assert len(history_db.get_history_multi()) == 15
+
+
+def test_weekly_rollup(history_db):
+    frame = history_db.get_rollup(["臺北"], period='week')
+
+    # 週期以週一為起點：11/24 週（11/28~11/30）、12/01 週（7 天）、12/08 週（2 天）
+    assert frame['period'].dt.strftime('%Y-%m-%d').tolist() == ["2025-11-24", "2025-12-01", "2025-12-08"]
+    assert frame['days'].tolist() == [3, 7, 2]
+    week = frame.iloc[1]
+    assert (week['max_temp'], week['min_temp']) == (29.0, 13.0)
+    assert week['mean_max'] == pytest.approx(26.0)
+    assert week['mean_temp'] == pytest.approx(21.0)
+
+
+def test_daily_and_monthly_rollup(history_db):
+    monthly = history_db.get_rollup(period='month')
+    assert list(zip(monthly['location'], monthly['period'].dt.strftime('%Y-%m'), monthly['days'])) == [
+        ("臺中", "2025-12", 3), ("臺北", "2025-11", 3), ("臺北", "2025-12", 9)
+    ]
+
+    daily = history_db.get_rollup(["臺中"], "2025-12-02", "2025-12-02", period='day')
+    assert daily['days'].tolist() == [1]
+    assert daily['mean_temp'].tolist() == [20.0]
+
+    with pytest.raises(ValueError):
+        history_db.get_rollup(period='year')
+    assert history_db.get_rollup(["臺南"]).empty
@@ -0,0 +1,56 @@
+"""iter_json_array 的分段解析與客戶端的串流下載"""
+import json
+
+import pytest
+
+from benchmarks.payloads import encode, location_list
+from json_stream import iter_json_array
+
+
+def _chunks(raw, size):
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+
+@pytest.mark.parametrize("size", [1, 7, 4096])
+def test_matches_full_parse_for_any_chunk_size(payload, size):
+    # 片段大小為 1 時，多位元組的中文字元與陣列起點標記都會被切開
+    raw = encode(payload)
+    assert list(iter_json_array(_chunks(raw, size))) == location_list(payload)
+
+
+def test_stops_reading_when_consumer_stops(payload):
+    raw = encode(payload)
+    read = []
+
+    def chunks():
+        for chunk in _chunks(raw, 256):
+            read.append(chunk)
+            yield chunk
+
+    first = next(iter_json_array(chunks()))
+    assert first == location_list(payload)[0]
+    assert sum(map(len, read)) < len(raw) // 2
+
+
+def test_custom_pattern_and_empty_array():
+    raw = json.dumps({'dataset': {'location': [{'a': [1, "]"]}, {'b': "},{"}]}}).encode('utf-8')
+    assert list(iter_json_array([raw], r'"location"\s*:\s*\[')) == [{'a': [1, "]"]}, {'b': "},{"}]
+
+    assert list(iter_json_array([b'{"location": [ ]}'], r'"location"\s*:\s*\[')) == []
+
+
+def test_errors(payload):
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'{"other": []}']))
+
+    truncated = encode(payload)[:-200]
+    with pytest.raises(ValueError):
+        list(iter_json_array(_chunks(truncated, 512)))
+
+
+def test_client_iter_locations(client, payload):
+    names = [loc['locationName'] for loc in location_list(payload)]
+
+    locations = list(client.iter_locations(fields=['locationName']))
+    assert locations == [{'locationName': name} for name in names]
+    assert next(iter(client.iter_locations())) == location_list(payload)[0]
@@ -0,0 +1,112 @@
+"""MetricsRegistry 的 Prometheus 文字格式輸出"""
+import glob
+import importlib
+import os
+import re
+import urllib.error
+import urllib.request
+
+import pytest
+
+from metrics import MetricsRegistry, PrometheusFileSink, metrics, start_metrics_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_render_counters_gauges_and_histograms():
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    registry.describe('jobs_total', "處理的工作數")
+    registry.inc('jobs_total', result='ok')
+    registry.inc('jobs_total', 2, result='ok')
+    registry.inc('jobs_total', result='fail')
+    registry.set_gauge('queue_size', 3)
+    registry.observe('job_seconds', 0.05)
+    registry.observe('job_seconds', 0.5)
+    registry.observe('job_seconds', 5)
+
+    text = registry.render_prometheus()
+    assert text.splitlines() == [
+        "# HELP jobs_total 處理的工作數",
+        "# TYPE jobs_total counter",
+        'jobs_total{result="fail"} 1',
+        'jobs_total{result="ok"} 3',
+        "# TYPE queue_size gauge",
+        "queue_size 3",
+        "# TYPE job_seconds histogram",
+        'job_seconds_bucket{le="0.1"} 1',
+        'job_seconds_bucket{le="1"} 2',
+        'job_seconds_bucket{le="+Inf"} 3',
+        "job_seconds_sum 5.550000",
+        "job_seconds_count 3",
+    ]
+
+
+def test_label_and_help_escaping():
+    registry = MetricsRegistry()
+    registry.describe('errors_total', "第一行\n第二行 \\ 結尾")
+    registry.inc('errors_total', message='say "hi"\n\\')
+
+    lines = registry.render_prometheus().splitlines()
+    assert lines[0] == "# HELP errors_total 第一行\\n第二行 \\\\ 結尾"
+    assert lines[2] == 'errors_total{message="say \\"hi\\"\\n\\\\"} 1'
+
+
+def test_collectors_export_counters_and_gauges():
+    registry = MetricsRegistry()
+    registry.add_collector(lambda: {'cache_hits_total': 7}, kind='counter')
+    registry.add_collector(lambda: {'cache_size': 2})
+    registry.add_collector(lambda: 1 / 0)
+
+    text = registry.render_prometheus()
+    assert "# TYPE cache_hits_total counter\ncache_hits_total 7" in text
+    assert "# TYPE cache_size gauge\ncache_size 2" in text
+    assert registry.snapshot()['counters']['cache_hits_total'] == {(): 7}
+    with pytest.raises(ValueError):
+        registry.add_collector(lambda: {}, kind='histogram')
+
+
+def test_every_recorded_metric_is_described():
+    # 載入所有記錄指標的模組後，每個指標名稱都應有說明
+    pattern = re.compile(r"metrics\.(?:inc|observe|set_gauge|timer)\(\s*'(\w+)'")
+    names = set()
+    for path in glob.glob(os.path.join(ROOT, "*.py")):
+        with open(path, encoding='utf-8') as f:
+            found = pattern.findall(f.read())
+        if found:
+            importlib.import_module(os.path.basename(path)[:-3])
+            names.update(found)
+    assert names
+    assert sorted(name for name in names if metrics.help_text(name) is None) == []
+
+
+def test_shared_cache_stats_are_typed():
+    import weather_cache  # noqa: F401  註冊共用快取的 collector
+
+    text = metrics.render_prometheus()
+    assert "# TYPE weather_cache_hits_total counter" in text
+    assert "# TYPE weather_cache_misses_total counter" in text
+    assert "# TYPE weather_cache_size gauge" in text
+    assert "# HELP weather_cache_hits_total " in text
+
+
+def test_file_sink_and_http_endpoint(tmp_path):
+    registry = MetricsRegistry()
+    registry.inc('requests_total')
+
+    path = tmp_path / "metrics" / "weather.prom"
+    registry.add_sink(PrometheusFileSink(str(path)))
+    registry.flush()
+    assert path.read_text(encoding='utf-8') == registry.render_prometheus()
+
+    server = start_metrics_server(port=0, registry=registry)
+    try:
+        host, port = server.server_address[:2]
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=5) as response:
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            assert b"requests_total 1" in response.read()
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(f"http://{host}:{port}/other", timeout=5)
+        assert excinfo.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
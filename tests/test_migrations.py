@@ -0,0 +1,65 @@
+"""隨專案提供的 data.db（v0）遷移"""
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from database import WeatherDatabase
+from migrations import LATEST_VERSION, get_version, migrate
+
+SHIPPED_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data.db")
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """複製到暫存目錄的 data.db，不修改原始檔案"""
+    path = tmp_path / "legacy.db"
+    shutil.copyfile(SHIPPED_DB, path)
+    conn = sqlite3.connect(path)
+    assert get_version(conn) == 0
+    rows = conn.execute("SELECT location, date, max_temp, min_temp, weather FROM weather_data").fetchall()
+    yield path, conn, rows
+    conn.close()
+
+
+def test_v0_to_v3_keeps_rows(legacy_db):
+    _, conn, rows = legacy_db
+    assert migrate(conn, target=3) == [1, 2, 3]
+    assert get_version(conn) == 3
+
+    migrated = conn.execute("""
+        SELECT l.name, w.date, w.max_temp, w.min_temp, w.weather
+        FROM weather_data w JOIN locations l ON l.id = w.location_id
+    """).fetchall()
+    expected = [(loc, int(date.replace('-', '')), max_t, min_t, wx) for loc, date, max_t, min_t, wx in rows]
+    assert sorted(migrated) == sorted(expected)
+
+
+def test_migrate_to_latest_is_readable(legacy_db):
+    path, conn, rows = legacy_db
+    conn.close()
+
+    db = WeatherDatabase(str(path))
+    try:
+        with db.get_connection() as conn:
+            assert get_version(conn) == LATEST_VERSION
+            datasets = {row[0] for row in conn.execute("SELECT DISTINCT dataset FROM locations")}
+        assert datasets == {"F-A0010-001"}
+
+        batch = db.get_all_latest_data()
+        assert len(batch) == len(rows)
+        latest = db.get_latest_data(rows[0][0])
+        assert (latest['date'], latest['max_temp']) == (rows[0][1], rows[0][2])
+    finally:
+        db.close()
+
+
+def test_v2_drops_undated_rows(legacy_db):
+    _, conn, rows = legacy_db
+    conn.execute("INSERT INTO weather_data (location, date) VALUES ('無日期', '-')")
+    conn.commit()
+
+    migrate(conn, target=2)
+    assert conn.execute("SELECT COUNT(*) FROM weather_data").fetchone()[0] == len(rows)
+    assert conn.execute("SELECT COUNT(*) FROM weather_data WHERE date = 0").fetchone()[0] == 0
@@ -0,0 +1,80 @@
+"""decode_payload 的結構驗證、各解碼器的結果與延遲載入"""
+import copy
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.payloads import encode, location_list
+from datasets import get_dataset
+from payload_decoder import PayloadSchemaError, decode_payload
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+AGR = get_dataset("F-A0010-001")
+
+# fast=False 只用標準函式庫；fast=True 在安裝 msgspec 時依結構解碼
+MODES = [pytest.param(False, id="json"), pytest.param(True, id="fast")]
+
+
+def _forecasts(payload):
+    return payload['cwaopendata']['resources']['resource']['data']['agrWeatherForecasts']['weatherForecasts']
+
+
+@pytest.mark.parametrize("fast", MODES)
+def test_missing_path(payload, fast):
+    broken = copy.deepcopy(payload)
+    del broken['cwaopendata']['resources']['resource']['data']
+
+    with pytest.raises(PayloadSchemaError) as excinfo:
+        decode_payload(encode(broken), AGR, fast=fast)
+    assert excinfo.value.dataset_id == "F-A0010-001"
+
+
+@pytest.mark.parametrize("fast", MODES)
+def test_empty_or_wrongly_typed_locations(payload, fast):
+    for value in ([], "not a list", [{'geocode': '1'}]):
+        broken = copy.deepcopy(payload)
+        _forecasts(broken)['location'] = value
+        with pytest.raises(PayloadSchemaError):
+            decode_payload(encode(broken), AGR, fast=fast)
+
+
+@pytest.mark.parametrize("fast", MODES)
+def test_invalid_json(fast):
+    with pytest.raises(ValueError) as excinfo:
+        decode_payload(b'{"cwaopendata": ', AGR, fast=fast)
+    assert not isinstance(excinfo.value, PayloadSchemaError)
+
+
+def test_other_datasets_validate_after_decoding(c0032_payload):
+    dataset = get_dataset("F-C0032-001")
+    raw = json.dumps(c0032_payload).encode('utf-8')
+    assert decode_payload(raw, dataset) == c0032_payload
+
+    with pytest.raises(PayloadSchemaError):
+        decode_payload(b'[]', dataset)
+
+
+def test_untyped_decode_keeps_all_fields(payload):
+    assert decode_payload(encode(payload), AGR, typed=False) == payload
+
+    typed = decode_payload(encode(payload), AGR)
+    assert [loc['locationName'] for loc in location_list(typed)] == [
+        loc['locationName'] for loc in location_list(payload)
+    ]
+
+
+def test_fast_decoders_load_on_first_decode():
+    code = (
+        f"import sys; sys.path.insert(0, {ROOT!r})\n"
+        "import crawl_and_save, payload_decoder\n"
+        "before = sorted(m for m in ('msgspec', 'orjson') if m in sys.modules)\n"
+        "payload_decoder.decoder_name()\n"
+        "print(before, payload_decoder._fast_modules is not None)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[] True"
@@ -0,0 +1,87 @@
+"""RefreshScheduler 的退避與背景更新和請求執行緒的互斥"""
+import threading
+
+from refresh_scheduler import RefreshScheduler
+
+
+def _scheduler(client, results):
+    outcomes = iter(results)
+
+    def refresh():
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return RefreshScheduler(
+        client, interval_seconds=480, jitter=0, retry_base_seconds=15,
+        max_backoff_seconds=60, refresh_func=refresh
+    )
+
+
+def test_backoff_doubles_until_cap_and_resets(client):
+    scheduler = _scheduler(client, [False, RuntimeError("down"), False, False, True])
+
+    assert [scheduler.run_once() for _ in range(4)] == [15, 30, 60, 60]
+    assert scheduler.consecutive_failures == 4
+    assert scheduler.status()['last_error'] == "更新失敗"
+
+    assert scheduler.run_once() == 480
+    status = scheduler.status()
+    assert status['consecutive_failures'] == 0
+    assert status['last_error'] is None
+    assert status['last_success'] is not None
+
+
+def test_jitter_stays_within_bounds(client):
+    scheduler = _scheduler(client, [True] * 50)
+    scheduler.jitter = 0.1
+    delays = [scheduler.run_once() for _ in range(50)]
+    assert all(432 <= delay <= 528 for delay in delays)
+
+
+def test_refresh_once_against_stub(client, stub):
+    scheduler = RefreshScheduler(client)
+    assert scheduler.refresh_once()
+    assert scheduler.refresh_once()
+    assert stub.not_modified == 1
+
+
+def test_scheduler_and_requests_do_not_fetch_concurrently(client, stub):
+    stub.latency_seconds = 0.2
+    active = []
+    peak = []
+    lock = threading.Lock()
+    original_get = client.session.get
+
+    def counting_get(*args, **kwargs):
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        try:
+            return original_get(*args, **kwargs)
+        finally:
+            with lock:
+                active.pop()
+
+    client.session.get = counting_get
+    scheduler = RefreshScheduler(client)
+    first = client.fetch_snapshot()
+
+    threads = [threading.Thread(target=scheduler.refresh_once)] + [
+        threading.Thread(target=client.fetch_snapshot) for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert max(peak) == 1
+    # 所有條件式下載都回應 304，快照不被置換
+    assert client._snapshot is first
+    assert stub.not_modified == 4
+
+
+def test_default_interval_is_before_snapshot_expiry(client):
+    scheduler = RefreshScheduler(client)
+    assert scheduler.interval_seconds == client.snapshot_ttl_minutes * 60 * 0.8
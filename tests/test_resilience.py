@@ -0,0 +1,136 @@
+"""CircuitBreaker 的狀態變化與客戶端在上游故障時的行為"""
+import time
+
+import pytest
+
+from resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+
+def _open(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.before_call()
+        breaker.record_failure()
+
+
+def test_opens_after_threshold():
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=60)
+    breaker.before_call()
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_probe_success_closes():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05)
+    _open(breaker)
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    breaker.before_call()
+    # 試探呼叫進行中時拒絕其他呼叫
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_probe_failure_reopens():
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=0.05)
+    _open(breaker)
+    time.sleep(0.06)
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_release_frees_half_open_probe():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05)
+    _open(breaker)
+    time.sleep(0.06)
+
+    breaker.before_call()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+
+
+def test_retry_policy_counts_only_retryable_errors():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+    policy = RetryPolicy(max_attempts=2, base_delay=0)
+
+    def not_retryable():
+        raise KeyError("bad request")
+
+    with pytest.raises(KeyError):
+        policy.call(not_retryable, breaker=breaker, retry_on=(OSError,))
+    assert breaker.failures == 0
+
+    def unavailable():
+        raise OSError("down")
+
+    with pytest.raises(OSError):
+        policy.call(unavailable, breaker=breaker, retry_on=(OSError,))
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_client_stops_calling_stub_while_open(client, stub):
+    client.retry_policy = RetryPolicy(max_attempts=1)
+    client.breaker = CircuitBreaker(client.dataset_id, failure_threshold=2, reset_timeout=0.1)
+    stub.latency_seconds = 0.3
+    client.READ_TIMEOUT = 0.05
+
+    assert client.fetch_weather_data() is None
+    assert client.fetch_weather_data() is None
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+    requests_before = stub.requests
+    assert client.fetch_weather_data() is None
+    assert stub.requests == requests_before
+
+    # 上游恢復後，半開狀態的試探呼叫成功即關閉斷路器
+    stub.latency_seconds = 0
+    time.sleep(0.11)
+    assert client.fetch_weather_data() is not None
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retry_policy_stops_at_deadline():
+    policy = RetryPolicy(max_attempts=5, base_delay=0.5, jitter=0)
+    calls = []
+
+    def unavailable():
+        calls.append(time.monotonic())
+        raise OSError("down")
+
+    start = time.monotonic()
+    with pytest.raises(OSError):
+        policy.call(unavailable, retry_on=(OSError,), deadline=start + 0.8)
+    # 第一次失敗後等待 0.5 秒重試；第二次失敗後需等待 1 秒，超過期限而不再重試
+    assert len(calls) == 2
+    assert time.monotonic() - start < 0.8
+
+
+def test_hanging_upstream_returns_within_budget(client, stub):
+    # 預設逾時（讀取 20 秒、重試 3 次）下，總等待時間仍以 REQUEST_BUDGET 為上限
+    client.REQUEST_BUDGET = 1.0
+    stub.latency_seconds = 5
+
+    start = time.monotonic()
+    assert client.fetch_weather_data() is None
+    assert time.monotonic() - start < 1.5
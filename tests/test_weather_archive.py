@@ -0,0 +1,72 @@
+"""WeatherArchive 的匯出、移除與寫回"""
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from weather_archive import WeatherArchive
+
+
+@pytest.fixture
+def archive(db, tmp_path):
+    db.insert_many([
+        ("臺北", "2025-10-01", 20.0, 10.0, "晴"),
+        ("臺北", "2025-10-02", 21.0, 11.0, "雨"),
+        ("臺中", "2025-11-01", 22.0, 12.0, "晴"),
+    ])
+    # 模擬十月的資料在很久以前寫入
+    with db.get_connection() as conn:
+        conn.execute("UPDATE weather_data SET created_at = 1000000000, updated_at = 1000000000 WHERE date < 20251100")
+    return WeatherArchive(db, archive_dir=str(tmp_path / "archive"))
+
+
+def _count(db):
+    with db.get_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM weather_data").fetchone()[0]
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_export_and_load(db, tmp_path, fmt):
+    db.insert_many([("臺北", "2025-10-01", 20.0, 10.0, "晴")], dataset="F-C0032-001")
+    archive = WeatherArchive(db, archive_dir=str(tmp_path / fmt), fmt=fmt, compression="zstd")
+    archive.export_months()
+
+    assert archive.archived_months() == ["2025-10"]
+    frame = archive.load_frame()
+    assert frame['dataset'].astype(str).tolist() == ["F-C0032-001"]
+
+
+def test_prune_then_restore_keeps_timestamps(archive, db):
+    archive.export_months(before_month="2025-11")
+    assert archive.prune("2025-11") == 2
+    assert _count(db) == 1
+
+    assert archive.restore("2025-10") == 2
+    assert _count(db) == 3
+    with db.get_connection() as conn:
+        stamps = conn.execute("SELECT created_at, updated_at FROM weather_data WHERE date < 20251100").fetchall()
+    assert [tuple(row) for row in stamps] == [(1000000000, 1000000000)] * 2
+    # 寫回的舊資料不應被視為新鮮
+    assert db.get_fresh_data("臺北", ttl_minutes=10) is None
+
+
+def test_prune_skips_month_written_after_export(archive, db):
+    archive.export_months(before_month="2025-11")
+    db.insert_many([("臺北", "2025-10-03", 23.0, 13.0, "晴")])
+
+    assert archive.prune("2025-11") == 0
+    assert _count(db) == 4
+
+
+def test_restore_does_not_overwrite_newer_rows(archive, db):
+    archive.export_months(before_month="2025-11")
+    db.insert_many([("臺北", "2025-10-01", 30.0, 20.0, "晴")])
+    with db.get_connection() as conn:
+        conn.execute("DELETE FROM weather_data WHERE date = 20251002")
+
+    # 只寫回資料庫中不存在的列，較新的 10/01 不被封存資料覆蓋
+    assert archive.restore("2025-10") == 1
+    assert db.get_history("臺北")['max_temp'].tolist() == [30.0, 21.0]
+
+
+def test_restore_missing_month(archive):
+    assert archive.restore("2020-01") == -1
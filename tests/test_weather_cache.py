@@ -0,0 +1,101 @@
+"""TTLCache 的 single-flight 與 stale-while-revalidate"""
+import threading
+import time
+
+from weather_cache import TTLCache
+
+
+def test_concurrent_loads_are_coalesced():
+    cache = TTLCache(maxsize=8, ttl_seconds=60)
+    calls = []
+    release = threading.Event()
+
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load("key", loader)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    # 等所有呼叫端都進入等待後才讓 loader 完成
+    deadline = time.monotonic() + 5
+    while cache.stats()['coalesced'] < 7 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [1]
+    assert results == ["value"] * 8
+    assert cache.stats()['coalesced'] == 7
+    assert cache.get_or_load("key", loader) == "value"
+    assert calls == [1]
+
+
+def test_loader_error_reaches_waiters_and_is_not_cached():
+    cache = TTLCache(maxsize=8, ttl_seconds=60)
+
+    def failing():
+        raise RuntimeError("boom")
+
+    for _ in range(2):
+        try:
+            cache.get_or_load("key", failing)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("loader 的例外應向外拋出")
+    assert cache.peek("key") is None
+    assert cache.get_or_load("key", lambda: None) is None
+    assert cache.peek("key") is None
+
+
+def test_stale_value_is_served_while_revalidating():
+    cache = TTLCache(maxsize=8, ttl_seconds=60)
+    cache.set("key", "old", ttl_seconds=0.01)
+    time.sleep(0.02)
+
+    loaded = threading.Event()
+
+    def loader():
+        loaded.set()
+        return "new"
+
+    assert cache.get_or_load("key", loader, ttl_seconds=60, stale_seconds=60) == "old"
+    assert cache.stats()['stale_hits'] == 1
+    assert loaded.wait(5)
+
+    deadline = time.monotonic() + 5
+    while cache.get("key") != "new" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.get_or_load("key", loader, stale_seconds=60) == "new"
+
+
+def test_value_older_than_stale_window_is_reloaded():
+    cache = TTLCache(maxsize=8, ttl_seconds=60)
+    cache.set("key", "old", ttl_seconds=0.01)
+    time.sleep(0.05)
+
+    assert cache.get_or_load("key", lambda: "new", stale_seconds=0.01) == "new"
+    assert cache.stats()['stale_hits'] == 0
+
+
+def test_failed_revalidation_keeps_stale_value():
+    cache = TTLCache(maxsize=8, ttl_seconds=60)
+    cache.set("key", "old", ttl_seconds=0.01)
+    time.sleep(0.02)
+    failed = threading.Event()
+
+    def loader():
+        failed.set()
+        raise RuntimeError("boom")
+
+    assert cache.get_or_load("key", loader, stale_seconds=60) == "old"
+    assert failed.wait(5)
+    time.sleep(0.05)
+    assert cache.peek("key") == "old"
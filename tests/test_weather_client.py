@@ -0,0 +1,62 @@
+"""WeatherAPIClient 對替身伺服器的條件式下載與完整資料"""
+from benchmarks.payloads import encode, location_list, scale_payload
+
+
+def test_fetch_weather_data_keeps_all_fields(client, payload):
+    data = client.fetch_weather_data()
+    assert data == payload
+
+
+def test_second_fetch_uses_304(client, stub):
+    first = client.fetch_weather_data()
+    assert client.last_fetch_changed
+
+    second = client.fetch_weather_data()
+    assert stub.not_modified == 1
+    assert not client.last_fetch_changed
+    assert second is first
+
+
+def test_full_payload_not_replaced_by_typed_snapshot_payload(client, payload):
+    assert client.fetch_snapshot() is not None
+    # 快照只解碼部分欄位，不能作為完整資料重複使用
+    assert client.fetch_weather_data() == payload
+
+
+def test_snapshot_reused_until_upstream_changes(client, stub, payload):
+    snapshot = client.fetch_snapshot()
+    assert client.fetch_snapshot() is snapshot
+
+    stub.set_body(client.dataset_id, encode(scale_payload(payload, 3, 2)))
+    updated = client.fetch_snapshot()
+    assert updated is not snapshot
+    assert len(updated.get_locations()) == 3
+    assert len(snapshot.get_locations()) == len(location_list(payload))
+
+
+def test_unchanged_fetch_refreshes_database_freshness(client, db):
+    client.use_database = True
+    client.db = db
+    assert client.fetch_snapshot() is not None
+    records = client.get_all_locations_data()
+    location = records[0]['location']
+
+    # 模擬資料寫入已超過新鮮度期限
+    with db.get_connection() as conn:
+        conn.execute("UPDATE weather_data SET updated_at = updated_at - 3600")
+    assert db.get_fresh_data(location, ttl_minutes=10) is None
+
+    # 上游回應 304 後再次寫入，未變更的資料列也會更新 updated_at
+    assert client.fetch_snapshot() is not None
+    assert not client.last_fetch_changed
+    client.get_all_locations_data()
+    assert db.get_fresh_data(location, ttl_minutes=10) is not None
+
+
+def test_dataset_id_does_not_replace_class_default():
+    from weather_crawler import WeatherAPIClient
+
+    client = WeatherAPIClient(use_database=False, use_shared_cache=False, dataset_id="F-C0032-001")
+    assert client.dataset_id == "F-C0032-001"
+    assert client.DATASET_ID == WeatherAPIClient.DATASET_ID == "F-A0010-001"
+    assert WeatherAPIClient(use_database=False, use_shared_cache=False).dataset_id == "F-A0010-001"
@@ -0,0 +1,89 @@
+"""WeatherRecord 的存取與序列化，WeatherBatch 的欄位式儲存"""
+import json
+import math
+import pickle
+
+import pytest
+
+from weather_records import WeatherBatch, WeatherRecord, json_default
+
+
+def _records():
+    return [
+        WeatherRecord("臺北", "2025-12-04", 25.0, 15.0, "晴"),
+        WeatherRecord("臺中", "2025-12-04", None, 12.0, "多雲"),
+        WeatherRecord("臺北", "2025-12-05", 22.0, None, "晴", "2025-12-04 10:00:00"),
+    ]
+
+
+def test_record_mapping_and_attribute_access():
+    record = WeatherRecord("臺北", "2025-12-04", 25.0, 15.0, "晴")
+
+    assert record['max_temp'] == record.max_temp == 25.0
+    assert record.get('updated_at') is None
+    assert record.get('missing', '-') == '-'
+    with pytest.raises(KeyError):
+        record['missing']
+    assert list(record) == list(WeatherRecord._fields)
+    assert dict(record) == record.to_dict()
+    assert record == record.to_dict()
+    assert pickle.loads(pickle.dumps(record)) == record
+    assert not hasattr(record, '__dict__')
+
+
+def test_record_serializes_as_object():
+    record = WeatherRecord("臺北", "2025-12-04", 25.0, None, "晴")
+
+    expected = {'location': "臺北", 'date': "2025-12-04", 'max_temp': 25.0,
+                'min_temp': None, 'weather': "晴", 'updated_at': None}
+    assert json.loads(json.dumps(record, default=json_default)) == expected
+    assert json.loads(json.dumps(record.to_dict())) == expected
+    assert json.loads(json.dumps({'data': WeatherBatch([record])}, default=json_default)) == {'data': [expected]}
+    # 未提供 default 時不會被序列化成陣列
+    with pytest.raises(TypeError):
+        json.dumps(record)
+
+
+def test_batch_round_trip():
+    records = _records()
+    batch = WeatherBatch(records)
+
+    assert len(batch) == 3
+    assert list(batch) == records
+    assert batch[-1] == records[-1]
+    assert batch[1]['max_temp'] is None
+    assert math.isnan(batch.max_temp[1])
+    assert batch.locations() == ["臺北", "臺中"]
+    assert batch.weather == ["晴", "多雲", "晴"]
+    # 天氣描述以字典編碼，相同描述只存一份
+    assert batch._weather.categories == ["晴", "多雲"]
+    with pytest.raises(IndexError):
+        batch[3]
+
+
+def test_batch_accepts_tuples_dicts_and_slices():
+    batch = WeatherBatch([
+        ("臺北", "2025-12-04", 25.0, 15.0, "晴"),
+        {'location': "臺中", 'date': "2025-12-04", 'max_temp': 20.0, 'weather': "雨"},
+    ])
+
+    assert batch[1].min_temp is None
+    assert batch.to_records()[1]['weather'] == "雨"
+    sliced = batch[1:]
+    assert isinstance(sliced, WeatherBatch)
+    assert [record.location for record in sliced] == ["臺中"]
+
+
+def test_batch_frame():
+    frame = WeatherBatch(_records()).to_frame()
+
+    assert list(frame.columns) == ['location', 'date', 'max_temp', 'min_temp', 'weather']
+    assert str(frame['location'].dtype) == 'category'
+    assert frame['max_temp'].isna().tolist() == [False, True, False]
+
+
+def test_database_accepts_records(db):
+    assert db.insert_many(_records()) == {'inserted': 3, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+    latest = db.get_latest_data("臺中")
+    assert isinstance(latest, WeatherRecord)
+    assert (latest.max_temp, latest.min_temp) == (None, 12.0)
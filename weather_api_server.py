@@ -0,0 +1,428 @@
+"""
+唯讀 HTTP JSON API 伺服器
+以 WeatherAPIClient 的預報快照與 WeatherDatabase 的歷史資料提供機器存取介面：
+
+    GET /locations                      所有地點
+    GET /locations/{地點}               地點目前（第一天）的溫度與天氣
+    GET /forecast/{地點}?element=&start=&end=   多日、多要素預報
+    GET /history/{地點}?start=&end=     資料庫中的歷史資料
+    GET /health                         快照狀態
+
+每個回應在同一份快照內只序列化、gzip 壓縮與計算 ETag 一次，之後直接由記憶體送出，
+並支援 If-None-Match（304）；快照更新時整批捨棄。
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import re
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+from database import WeatherDatabase
+from forecast_snapshot import ForecastSnapshot
+from metrics import metrics, start_metrics_server
+from weather_crawler import WeatherAPIClient
+from weather_records import json_default
+
+DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+metrics.describe('weather_server_requests_total', "HTTP API 處理的請求數，依端點與狀態碼區分")
+metrics.describe('weather_server_request_seconds', "HTTP API 處理單一請求的耗時（秒）")
+metrics.describe('weather_server_cache_total', "HTTP API 回應快取的命中與未命中次數")
+metrics.describe('weather_server_snapshot_swaps_total', "HTTP API 因預報快照更新而更換回應快取的次數")
+
+
+class PreparedResponse:
+    """已序列化的回應：原始與 gzip 壓縮後的內容、ETag 與固定的標頭"""
+
+    __slots__ = ('status', 'body', 'gzip_body', 'etag', 'gzip_etag', 'headers', 'gzip_headers')
+
+    # 小於此大小的回應不壓縮（壓縮後幾乎不會變小）
+    GZIP_MIN_SIZE = 512
+
+    def __init__(self, payload: Any, status: int = 200, max_age: int = 60):
+        """
+        序列化回應內容
+
+        Args:
+            payload: 可 JSON 序列化的回應內容（WeatherRecord、WeatherBatch 以 json_default 轉換）
+            status: HTTP 狀態碼
+            max_age: Cache-Control 的 max-age（秒），0 表示不允許快取
+        """
+        self.status = status
+        self.body = json.dumps(
+            payload, ensure_ascii=False, separators=(',', ':'), default=json_default
+        ).encode('utf-8')
+        digest = hashlib.blake2b(self.body, digest_size=12).hexdigest()
+        self.etag = f'"{digest}"'
+        self.gzip_body = None
+        self.gzip_etag = None
+        if len(self.body) >= self.GZIP_MIN_SIZE:
+            # mtime=0 讓相同內容的壓縮結果固定
+            compressed = gzip.compress(self.body, compresslevel=6, mtime=0)
+            if len(compressed) < len(self.body):
+                self.gzip_body = compressed
+                self.gzip_etag = f'"{digest}-gz"'
+
+        cache_control = f"public, max-age={max_age}" if max_age > 0 else "no-cache"
+        common = (
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Cache-Control: {cache_control}\r\n"
+            "Vary: Accept-Encoding\r\n"
+        )
+        self.headers = (common + f"ETag: {self.etag}\r\n").encode('latin-1')
+        self.gzip_headers = (
+            (common + f"ETag: {self.gzip_etag}\r\nContent-Encoding: gzip\r\n").encode('latin-1')
+            if self.gzip_body is not None else None
+        )
+
+    def matches(self, if_none_match: str) -> bool:
+        """
+        檢查 If-None-Match 是否符合目前內容（原始與壓縮版本視為相同內容）
+
+        Args:
+            if_none_match: If-None-Match 標頭
+
+        Returns:
+            bool: 符合則返回 True（應回應 304）
+        """
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag == '*':
+                return True
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            if tag == self.etag or (self.gzip_etag is not None and tag == self.gzip_etag):
+                return True
+        return False
+
+
+class ResponseCache:
+    """
+    單一快照世代的回應快取
+
+    鍵為 (端點, 參數...)；快照更新時由伺服器建立新的快取，舊快取整批捨棄。
+    歷史資料不屬於快照，另以 ttl_seconds 限制有效時間。
+    """
+
+    def __init__(self, snapshot: Optional[ForecastSnapshot], max_entries: int = 4096):
+        """
+        Args:
+            snapshot: 此世代的預報快照，上游無法使用時為 None
+            max_entries: 最多保留的回應數，超過時捨棄最早加入的回應
+        """
+        self.snapshot = snapshot
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple, Tuple[PreparedResponse, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[PreparedResponse]:
+        """
+        取得已序列化的回應
+
+        Args:
+            key: 快取鍵
+
+        Returns:
+            PreparedResponse: 回應，未快取或已過期則返回 None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        response, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            return None
+        return response
+
+    def set(self, key: Tuple, response: PreparedResponse, ttl_seconds: Optional[float] = None):
+        """
+        保存已序列化的回應
+
+        Args:
+            key: 快取鍵
+            response: 回應
+            ttl_seconds: 有效秒數，未提供則與快照同時失效
+        """
+        expires_at = time.monotonic() + ttl_seconds if ttl_seconds is not None else None
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (response, expires_at)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class WeatherAPIServer:
+    """
+    唯讀天氣資料 HTTP API
+
+    用法:
+        server = WeatherAPIServer(port=8080).start()
+        ...
+        server.shutdown()
+    """
+
+    # 重新向客戶端確認快照的最短間隔（秒）；其間的請求直接使用目前的回應快取
+    SNAPSHOT_CHECK_SECONDS = 1.0
+
+    def __init__(
+        self,
+        client: Optional[WeatherAPIClient] = None,
+        db: Optional[WeatherDatabase] = None,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        max_age: int = 60,
+        history_ttl_seconds: float = 60,
+        max_cached_responses: int = 4096
+    ):
+        """
+        初始化伺服器（尚未開始監聽）
+
+        Args:
+            client: 提供預報快照的 API 客戶端，未提供則建立新的客戶端
+            db: 提供歷史資料的資料庫，未提供則使用客戶端的資料庫
+            host: 監聽位址
+            port: 監聽埠號（0 表示由系統指定）
+            max_age: 回應的 Cache-Control max-age（秒）
+            history_ttl_seconds: 歷史資料回應的快取秒數（其他行程也可能寫入資料庫）
+            max_cached_responses: 每份快照最多快取的回應數
+        """
+        self.client = client or WeatherAPIClient(stale_while_revalidate_minutes=5)
+        self.db = db or self.client.db or WeatherDatabase()
+        self.max_age = max_age
+        self.history_ttl_seconds = history_ttl_seconds
+        self.max_cached_responses = max_cached_responses
+        self._cache = ResponseCache(None, max_cached_responses)
+        self._checked_at: Optional[float] = None
+        self._check_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """實際監聽的 (位址, 埠號)"""
+        return self._httpd.server_address[:2]
+
+    def _current_cache(self) -> ResponseCache:
+        """
+        取得目前快照世代的回應快取，快照更新時改用新的快取
+
+        每 SNAPSHOT_CHECK_SECONDS 最多向客戶端確認一次；
+        快照過期時由客戶端的共用快取負責重新下載（同時只會下載一次）。
+        """
+        now = time.monotonic()
+        cache = self._cache
+        if self._checked_at is not None and now - self._checked_at < self.SNAPSHOT_CHECK_SECONDS:
+            return cache
+        with self._check_lock:
+            if self._checked_at is not None and time.monotonic() - self._checked_at < self.SNAPSHOT_CHECK_SECONDS:
+                return self._cache
+            snapshot = self.client.get_snapshot()
+            if snapshot is not self._cache.snapshot:
+                self._cache = ResponseCache(snapshot, self.max_cached_responses)
+                metrics.inc('weather_server_snapshot_swaps_total')
+            self._checked_at = time.monotonic()
+            return self._cache
+
+    def _respond(self, payload: Any, status: int = 200) -> PreparedResponse:
+        """序列化不快取的回應（錯誤與狀態）"""
+        return PreparedResponse(payload, status, max_age=0)
+
+    def resolve(self, path: str, query: str) -> Tuple[str, PreparedResponse]:
+        """
+        依請求路徑取得回應（優先由回應快取提供）
+
+        Args:
+            path: 請求路徑（已移除查詢字串，尚未解碼）
+            query: 查詢字串
+
+        Returns:
+            Tuple[str, PreparedResponse]: (端點名稱, 回應)
+        """
+        parts = [unquote(part) for part in path.strip('/').split('/')]
+        endpoint = parts[0]
+        if endpoint == 'health' and len(parts) == 1:
+            return endpoint, self._health()
+        if endpoint not in ('locations', 'forecast', 'history') or len(parts) > 2:
+            return 'unknown', self._respond({'error': '找不到此端點'}, 404)
+        if endpoint != 'locations' and len(parts) != 2:
+            return endpoint, self._respond({'error': '請指定地點'}, 404)
+
+        params = {name: values[-1] for name, values in parse_qs(query).items()}
+        for name in ('start', 'end'):
+            if name in params and not DATE_PATTERN.match(params[name]):
+                return endpoint, self._respond({'error': f'{name} 須為 YYYY-MM-DD 格式'}, 400)
+
+        cache = self._current_cache()
+        snapshot = cache.snapshot
+        location = None
+        if len(parts) == 2:
+            location = snapshot.resolve_location(parts[1]) if snapshot is not None else parts[1]
+            if location is None:
+                return endpoint, self._respond({'error': f'找不到地點: {parts[1]}'}, 404)
+
+        if endpoint == 'history':
+            key = (endpoint, location, params.get('start'), params.get('end'))
+        elif endpoint == 'forecast':
+            key = (endpoint, location, params.get('element'), params.get('start'), params.get('end'))
+        else:
+            key = (endpoint, location)
+        response = cache.get(key)
+        if response is not None:
+            metrics.inc('weather_server_cache_total', result='hit')
+            return endpoint, response
+
+        metrics.inc('weather_server_cache_total', result='miss')
+        if endpoint == 'history':
+            batch = self.db.get_history_batch(
+                [location], params.get('start'), params.get('end'), self.client.dataset_id
+            )
+            response = PreparedResponse(
+                {'location': location, 'data': batch.to_records()}, max_age=self.max_age
+            )
+            cache.set(key, response, self.history_ttl_seconds)
+            return endpoint, response
+
+        if snapshot is None:
+            return endpoint, self._respond({'error': '目前無法取得預報資料'}, 503)
+
+        meta = {'dataset': snapshot.dataset.dataset_id, 'issue_time': snapshot.issue_time}
+        if location is None:
+            payload = dict(meta, locations=snapshot.get_locations())
+        elif endpoint == 'locations':
+            payload = dict(meta, data=snapshot.get_temperature_info(location))
+        else:
+            table = snapshot.get_forecast(location, params.get('element'), params.get('start'), params.get('end'))
+            payload = dict(meta, location=location, data=table.to_records())
+        response = PreparedResponse(payload, max_age=self.max_age)
+        cache.set(key, response)
+        return endpoint, response
+
+    def _health(self) -> PreparedResponse:
+        """快照狀態（每次請求重新產生）"""
+        snapshot = self._current_cache().snapshot
+        if snapshot is None:
+            return self._respond({'status': 'unavailable'}, 503)
+        return self._respond({
+            'status': 'ok',
+            'dataset': snapshot.dataset.dataset_id,
+            'issue_time': snapshot.issue_time,
+            'snapshot_age_seconds': round(snapshot.age_seconds(), 1),
+            'cached_responses': len(self._cache),
+        })
+
+    def _handler_class(self):
+        """建立綁定此伺服器的請求處理類別"""
+        server = self
+
+        class APIHandler(BaseHTTPRequestHandler):
+            # HTTP/1.1 保持連線，避免每個請求重新建立 TCP 連線
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                self._serve(send_body=True)
+
+            def do_HEAD(self):
+                self._serve(send_body=False)
+
+            def _serve(self, send_body: bool):
+                start = time.perf_counter()
+                path, _, query = self.path.partition('?')
+                try:
+                    endpoint, response = server.resolve(urlsplit(path).path, query)
+                except Exception as e:
+                    print(f"✗ 處理 API 請求時發生錯誤: {e}")
+                    endpoint, response = 'error', server._respond({'error': '伺服器內部錯誤'}, 500)
+
+                status = response.status
+                if response.gzip_body is not None and 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    headers, body = response.gzip_headers, response.gzip_body
+                else:
+                    headers, body = response.headers, response.body
+                if_none_match = self.headers.get('If-None-Match')
+                if status == 200 and if_none_match and response.matches(if_none_match):
+                    status, body = 304, b''
+
+                # 狀態列與標頭一次寫出，不經過 send_response 的逐行緩衝
+                head = (
+                    f"HTTP/1.1 {status} {self.responses[status][0]}\r\n"
+                    f"Date: {_http_date()}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                ).encode('latin-1') + headers + b"\r\n"
+                self.wfile.write(head + body if send_body else head)
+                metrics.inc('weather_server_requests_total', endpoint=endpoint, status=status)
+                metrics.observe('weather_server_request_seconds', time.perf_counter() - start, endpoint=endpoint)
+
+            def log_message(self, format, *args):
+                # 不輸出每個請求的存取紀錄
+                pass
+
+        return APIHandler
+
+    def serve_forever(self):
+        """在目前執行緒處理請求，直到呼叫 shutdown()"""
+        self._httpd.serve_forever()
+
+    def start(self) -> "WeatherAPIServer":
+        """
+        以背景 daemon 執行緒開始處理請求
+
+        Returns:
+            WeatherAPIServer: 伺服器本身
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self.serve_forever, name="weather-api", daemon=True)
+            self._thread.start()
+        return self
+
+    def shutdown(self):
+        """停止處理請求並關閉監聽連線"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+_date_cache = (0, "")
+
+
+def _http_date() -> str:
+    """目前時間的 HTTP Date 標頭值（每秒只格式化一次）"""
+    global _date_cache
+    now = int(time.time())
+    if _date_cache[0] != now:
+        _date_cache = (now, formatdate(now, usegmt=True))
+    return _date_cache[1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="提供天氣資料的唯讀 HTTP JSON API")
+    parser.add_argument("--host", default="127.0.0.1", help="監聽位址")
+    parser.add_argument("--port", type=int, default=8080, help="監聽埠號")
+    parser.add_argument("--dataset", default=None, help="資料集代碼（預設為 F-A0010-001）")
+    parser.add_argument("--max-age", type=int, default=60, help="回應的 Cache-Control max-age（秒）")
+    parser.add_argument("--no-refresh", action="store_true", help="不在背景預先更新快照")
+    parser.add_argument("--metrics-port", type=int, default=None, help="於此埠號提供 /metrics 端點")
+    args = parser.parse_args()
+
+    api_client = WeatherAPIClient(dataset_id=args.dataset, stale_while_revalidate_minutes=5)
+    if not args.no_refresh:
+        from refresh_scheduler import RefreshScheduler
+        RefreshScheduler(api_client).start()
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+
+    api_server = WeatherAPIServer(api_client, host=args.host, port=args.port, max_age=args.max_age)
+    host, port = api_server.address
+    print(f"✓ 天氣資料 API: http://{host}:{port}/locations（Ctrl+C 結束）")
+    try:
+        api_server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n已停止 API 伺服器")
@@ -4,9 +4,8 @@
 參考 CWA 官網設計的美化版本
 """
 import streamlit as st
-import pandas as pd
-import pydeck as pdk
 from weather_crawler import WeatherAPIClient
+from refresh_scheduler import RefreshScheduler
 
 # 台灣地區座標定義 (中心點)
 REGION_COORDINATES = {
@@ -20,6 +19,15 @@ REGION_COORDINATES = {
     "馬祖地區": {"lat": 26.1505, "lon": 119.9265},   # 馬祖
 }
 
+# 地圖溫度色階 (R, G, B)：無資料、<20、<28、<32、其他
+MAP_COLOR_PALETTE = [
+    [200, 200, 200],  # 灰色
+    [33, 150, 243],   # 藍色
+    [76, 175, 80],    # 綠色
+    [255, 193, 7],    # 黃色
+    [244, 67, 54],    # 紅色
+]
+
 # 設定頁面配置
 st.set_page_config(
     page_title="中央氣象署天氣資訊",
@@ -206,59 +214,70 @@ def inject_custom_css():
     """, unsafe_allow_html=True)
 
 
+@st.cache_resource
+def get_client() -> WeatherAPIClient:
+    """取得整個應用共用的 API 客戶端（共用 Session 與資料庫連線）"""
+    # 快照過期時先返回舊資料並在背景更新，頁面不需等待上游 API
+    return WeatherAPIClient(stale_while_revalidate_minutes=10)
+
+
+@st.cache_resource
+def start_refresh_scheduler() -> RefreshScheduler:
+    """啟動背景更新排程，在快取過期前預先更新快照與資料庫（每個行程一次）"""
+    return RefreshScheduler(get_client()).start()
+
+
 @st.cache_data(ttl=600)  # 快取 10 分鐘
 def fetch_all_locations():
     """取得所有地點清單（帶快取）"""
-    client = WeatherAPIClient()
-    return client.get_locations()
+    return get_client().get_locations()
 
 
 @st.cache_data(ttl=600)  # 快取 10 分鐘
 def fetch_temperature_info(location_name: str):
     """取得特定地點的溫度資訊（帶快取）"""
-    client = WeatherAPIClient()
-    return client.get_temperature_info(location_name)
+    return get_client().get_temperature_info(location_name)
 
 
 @st.cache_data(ttl=600)  # 快取 10 分鐘
 def fetch_map_data():
     """取得地圖視覺化所需的資料"""
-    client = WeatherAPIClient()
-    all_data = client.get_all_locations_data()
+    # pandas/numpy 只在繪製地圖時才載入，不拖慢頁面啟動
+    import numpy as np
+    import pandas as pd
     
-    map_data = []
-    for item in all_data:
-        loc_name = item['location']
-        if loc_name in REGION_COORDINATES:
-            coords = REGION_COORDINATES[loc_name]
-            # 決定顏色 (R, G, B)
-            max_temp = item['max_temp']
-            if max_temp is None:
-                color = [200, 200, 200] # 灰色
-            elif max_temp < 20:
-                color = [33, 150, 243] # 藍色
-            elif max_temp < 28:
-                color = [76, 175, 80] # 綠色
-            elif max_temp < 32:
-                color = [255, 193, 7] # 黃色
-            else:
-                color = [244, 67, 54] # 紅色
-                
-            map_data.append({
-                "name": loc_name,
-                "lat": coords["lat"],
-                "lon": coords["lon"],
-                "max_temp": max_temp,
-                "weather": item['weather'],
-                "color": color
-            })
-            
-    return pd.DataFrame(map_data)
+    df = get_client().get_all_locations_frame()
+    if df.empty:
+        return pd.DataFrame()
+    
+    # 以座標表（以地點名稱為索引）join 取代逐筆查詢，只保留有座標的地點
+    region_frame = pd.DataFrame.from_dict(REGION_COORDINATES, orient="index")
+    df = df.astype({"location": str}).join(region_frame, on="location", how="inner")
+    
+    # 以 np.select 一次決定所有地點的溫度色階
+    max_temp = df["max_temp"]
+    color_index = np.select(
+        [max_temp.isna(), max_temp < 20, max_temp < 28, max_temp < 32],
+        [0, 1, 2, 3],
+        default=4
+    )
+    
+    return pd.DataFrame({
+        "name": df["location"].to_numpy(),
+        "lat": df["lat"].to_numpy(),
+        "lon": df["lon"].to_numpy(),
+        "max_temp": max_temp.to_numpy(),
+        "weather": df["weather"].to_numpy(),
+        "color": np.array(MAP_COLOR_PALETTE)[color_index].tolist()
+    })
 
 
 def main():
     """主應用程式"""
     
+    # 啟動背景更新排程
+    scheduler = start_refresh_scheduler()
+    
     # 注入自訂 CSS
     inject_custom_css()
     
@@ -276,6 +295,8 @@ def main():
         df_map = fetch_map_data()
         
     if not df_map.empty:
+        import pydeck as pdk
+        
         # 設定地圖視角
         view_state = pdk.ViewState(
             latitude=23.6,
@@ -410,6 +431,9 @@ def main():
             # 資料來源說明
             st.caption("📡 資料來源：中央氣象署開放資料平台")
             st.caption("⏱️ 資料每 10 分鐘自動更新")
+            refresh_status = scheduler.status()
+            if refresh_status['last_success']:
+                st.caption(f"🔁 最近背景更新：{refresh_status['last_success']}（{refresh_status['lag_seconds']:.0f} 秒前）")
             
         else:
             st.error(f"❌ 無法取得「{selected_location}」的溫度資訊")
@@ -422,13 +446,10 @@ def main():
     try:
         from database import WeatherDatabase
         db = WeatherDatabase()
-        all_data = db.get_all_latest_data()
+        df_display = db.get_all_latest_frame()
         
-        if all_data:
-            # 轉換為 DataFrame
-            df_display = pd.DataFrame(all_data)
-            
-            # 重新命名欄位為中文
+        if not df_display.empty:
+            # 重新命名欄位為中文並選擇要顯示的欄位
             df_display = df_display.rename(columns={
                 'location': '地點',
                 'date': '日期',
@@ -436,10 +457,7 @@ def main():
                 'min_temp': '最低溫 (°C)',
                 'weather': '天氣現象',
                 'updated_at': '更新時間'
-            })
-            
-            # 選擇要顯示的欄位
-            df_display = df_display[['地點', '日期', '最高溫 (°C)', '最低溫 (°C)', '天氣現象', '更新時間']]
+            })[['地點', '日期', '最高溫 (°C)', '最低溫 (°C)', '天氣現象', '更新時間']]
             
             # 顯示統計資訊
             col1, col2, col3 = st.columns(3)
@@ -0,0 +1,362 @@
+"""
+天氣資料欄位式封存模組
+將 weather_data 依月份匯出為壓縮的 Parquet 或 Arrow IPC 檔案，
+可直接以記憶體映射方式讀回分析，並從 SQLite 移除已封存的舊資料
+"""
+import os
+from typing import Optional, List, Any
+from database import DEFAULT_DATASET, WeatherDatabase, encode_date
+
+# 支援的封存格式與副檔名
+FORMATS = {
+    'parquet': 'parquet',
+    'arrow': 'arrow',
+}
+
+
+def _require_pyarrow():
+    """載入 pyarrow，未安裝時提示安裝方式"""
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError as e:
+        raise ImportError("封存功能需要 pyarrow，請執行: pip install pyarrow") from e
+
+
+class WeatherArchive:
+    """天氣資料封存管理類別"""
+
+    # 封存檔案的欄位與型別
+    COLUMNS = ('location', 'date', 'max_temp', 'min_temp', 'weather', 'created_at', 'updated_at', 'dataset')
+
+    def __init__(
+        self,
+        db: Optional[WeatherDatabase] = None,
+        archive_dir: str = "archive",
+        fmt: str = 'parquet',
+        compression: str = 'zstd'
+    ):
+        """
+        初始化封存管理
+
+        Args:
+            db: 資料來源資料庫，未提供則使用預設的 data.db
+            archive_dir: 封存目錄，檔案以 month=YYYY-MM/ 分割
+            fmt: 封存格式，'parquet' 或 'arrow'（Arrow IPC）
+            compression: 壓縮演算法（zstd、lz4 等）
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"不支援的封存格式: {fmt}（可用: {', '.join(FORMATS)}）")
+        self.db = db or WeatherDatabase()
+        self.archive_dir = archive_dir
+        self.fmt = fmt
+        self.compression = compression
+
+    def partition_path(self, month: str) -> str:
+        """
+        取得指定月份的封存檔案路徑
+
+        Args:
+            month: 月份（YYYY-MM）
+
+        Returns:
+            str: 檔案路徑
+        """
+        return os.path.join(self.archive_dir, f"month={month}", f"weather_data.{FORMATS[self.fmt]}")
+
+    def archived_months(self) -> List[str]:
+        """
+        取得已封存的月份
+
+        Returns:
+            List[str]: 排序後的月份清單（YYYY-MM）
+        """
+        if not os.path.isdir(self.archive_dir):
+            return []
+        months = []
+        for name in os.listdir(self.archive_dir):
+            if name.startswith("month=") and os.path.exists(self.partition_path(name[6:])):
+                months.append(name[6:])
+        return sorted(months)
+
+    def export_months(self, before_month: Optional[str] = None) -> List[str]:
+        """
+        將資料依月份匯出為欄位式檔案
+
+        Args:
+            before_month: 只匯出早於此月份（YYYY-MM，不含）的資料，未提供則匯出全部
+
+        Returns:
+            List[str]: 寫入的檔案路徑
+        """
+        pa = _require_pyarrow()
+
+        with self.db.get_connection('archive_export') as conn:
+            params: List[Any] = []
+            where = ""
+            if before_month is not None:
+                where = "WHERE date < ?"
+                params.append(encode_date(f"{before_month}-01"))
+            months = [f"{row[0] // 100:04d}-{row[0] % 100:02d}" for row in conn.execute(f"""
+                SELECT DISTINCT date / 100 AS month
+                FROM weather_data
+                {where}
+                ORDER BY month
+            """, params)]
+
+            paths = []
+            for month in months:
+                rows = conn.execute(f"""
+                    SELECT
+                        l.name, {WeatherDatabase.DATE_TEXT}, w.max_temp, w.min_temp, w.weather,
+                        datetime(w.created_at, 'unixepoch'), datetime(w.updated_at, 'unixepoch'),
+                        l.dataset
+                    FROM weather_data w
+                    JOIN locations l ON l.id = w.location_id
+                    WHERE w.date >= ? AND w.date < ?
+                    ORDER BY l.dataset, l.name, w.date
+                """, (encode_date(f"{month}-01"), encode_date(_next_month(month)))).fetchall()
+                table = self._to_arrow(pa, rows)
+                paths.append(self._write(pa, table, month))
+                print(f"✓ 已封存 {month}: {len(rows)} 筆")
+
+        return paths
+
+    def load_table(
+        self,
+        start_month: Optional[str] = None,
+        end_month: Optional[str] = None,
+        locations: Optional[List[str]] = None
+    ):
+        """
+        以記憶體映射方式讀取封存資料
+
+        Args:
+            start_month: 起始月份（含，YYYY-MM）
+            end_month: 結束月份（含，YYYY-MM）
+            locations: 只讀取的地點
+
+        Returns:
+            pyarrow.Table: 封存資料
+        """
+        pa = _require_pyarrow()
+        import pyarrow.compute as pc
+
+        tables = []
+        for month in self.archived_months():
+            if start_month is not None and month < start_month:
+                continue
+            if end_month is not None and month > end_month:
+                continue
+            table = self._read(pa, self.partition_path(month))
+            if locations is not None:
+                table = table.filter(pc.is_in(table['location'], value_set=pa.array(locations)))
+            tables.append(table)
+
+        if not tables:
+            return self._to_arrow(pa, [])
+        return pa.concat_tables(tables)
+
+    def load_frame(
+        self,
+        start_month: Optional[str] = None,
+        end_month: Optional[str] = None,
+        locations: Optional[List[str]] = None
+    ):
+        """
+        讀取封存資料為 pandas DataFrame
+
+        Args:
+            start_month: 起始月份（含，YYYY-MM）
+            end_month: 結束月份（含，YYYY-MM）
+            locations: 只讀取的地點
+
+        Returns:
+            pandas.DataFrame: 封存資料
+        """
+        return self.load_table(start_month, end_month, locations).to_pandas()
+
+    # 寫回封存資料時保留原本的建立與更新時間（不經過 insert_many，以免 updated_at 變為現在，
+    # 使多年前的資料被 get_fresh_data 視為新鮮）；資料庫中已有較新的資料時不覆蓋
+    RESTORE_SQL = """
+        INSERT INTO weather_data
+        (location_id, date, max_temp, min_temp, weather, created_at, updated_at)
+        VALUES (
+            (SELECT id FROM locations WHERE dataset = ? AND name = ?),
+            ?, ?, ?, ?,
+            COALESCE(CAST(strftime('%s', ?) AS INTEGER), 0),
+            COALESCE(CAST(strftime('%s', ?) AS INTEGER), 0)
+        )
+        ON CONFLICT(location_id, date)
+        DO UPDATE SET
+            max_temp = excluded.max_temp,
+            min_temp = excluded.min_temp,
+            weather = excluded.weather,
+            created_at = excluded.created_at,
+            updated_at = excluded.updated_at
+        WHERE excluded.updated_at > weather_data.updated_at
+    """
+
+    def restore(self, month: str) -> int:
+        """
+        將封存月份的資料寫回 SQLite，保留封存時的建立與更新時間
+
+        Args:
+            month: 月份（YYYY-MM）
+
+        Returns:
+            int: 寫回的資料列數（資料庫中已有較新資料的列不計），失敗返回 -1
+        """
+        pa = _require_pyarrow()
+        path = self.partition_path(month)
+        if not os.path.exists(path):
+            print(f"✗ 找不到封存檔案: {path}")
+            return -1
+        table = self._read(pa, path)
+        # 加入資料集欄位以前的封存檔案皆為預設資料集
+        datasets = (
+            table['dataset'].to_pylist() if 'dataset' in table.column_names
+            else [DEFAULT_DATASET] * table.num_rows
+        )
+        locations = table['location'].to_pylist()
+        rows = zip(
+            datasets,
+            locations,
+            [encode_date(value) for value in table['date'].to_pylist()],
+            table['max_temp'].to_pylist(),
+            table['min_temp'].to_pylist(),
+            table['weather'].to_pylist(),
+            table['created_at'].to_pylist(),
+            table['updated_at'].to_pylist()
+        )
+        try:
+            with self.db.get_connection('archive_restore') as conn:
+                conn.executemany(
+                    WeatherDatabase.INSERT_LOCATION_SQL, set(zip(datasets, locations))
+                )
+                restored = conn.executemany(self.RESTORE_SQL, rows).rowcount
+        except Exception as e:
+            print(f"✗ 寫回封存資料時發生錯誤: {e}")
+            return -1
+        print(f"✓ 已寫回 {month}: {restored} 筆")
+        return restored
+
+    def prune(self, before_month: str, vacuum: bool = False) -> int:
+        """
+        從 SQLite 刪除早於指定月份且已封存的資料
+
+        只刪除封存檔案仍涵蓋資料庫內容的月份：資料庫中該月的資料列數或最新更新時間
+        超過封存檔案時（匯出後又有寫入），保留該月並提示重新匯出。
+
+        Args:
+            before_month: 刪除早於此月份（YYYY-MM，不含）的資料
+            vacuum: 刪除後是否執行 VACUUM 回收檔案空間
+
+        Returns:
+            int: 刪除的資料列數
+        """
+        pa = _require_pyarrow()
+        import pyarrow.compute as pc
+
+        archived = [month for month in self.archived_months() if month < before_month]
+        deleted = 0
+        with self.db.get_connection('archive_prune') as conn:
+            for month in archived:
+                bounds = (encode_date(f"{month}-01"), encode_date(_next_month(month)))
+                count, max_updated = conn.execute("""
+                    SELECT COUNT(*), datetime(MAX(updated_at), 'unixepoch')
+                    FROM weather_data
+                    WHERE date >= ? AND date < ?
+                """, bounds).fetchone()
+                if not count:
+                    continue
+                table = self._read(pa, self.partition_path(month))
+                archived_max = pc.max(table['updated_at']).as_py() if table.num_rows else None
+                if count > table.num_rows or archived_max is None or max_updated > archived_max:
+                    print(
+                        f"⚠ {month} 在封存後有新的資料（資料庫 {count} 筆、最新 {max_updated}；"
+                        f"封存 {table.num_rows} 筆、最新 {archived_max}），請重新匯出後再移除"
+                    )
+                    continue
+                cursor = conn.execute("DELETE FROM weather_data WHERE date >= ? AND date < ?", bounds)
+                deleted += cursor.rowcount
+
+        if vacuum and deleted:
+            self.db.pool.acquire().execute("VACUUM")
+
+        print(f"✓ 已從資料庫移除 {deleted} 筆已封存資料")
+        return deleted
+
+    def _to_arrow(self, pa, rows: List[tuple]):
+        """將查詢結果轉為 Arrow Table（地點與天氣使用字典編碼）"""
+        columns = list(zip(*rows)) if rows else [[] for _ in self.COLUMNS]
+        schema = pa.schema([
+            ('location', pa.dictionary(pa.int32(), pa.string())),
+            ('date', pa.date32()),
+            ('max_temp', pa.float64()),
+            ('min_temp', pa.float64()),
+            ('weather', pa.dictionary(pa.int32(), pa.string())),
+            ('created_at', pa.string()),
+            ('updated_at', pa.string()),
+            ('dataset', pa.dictionary(pa.int32(), pa.string())),
+        ])
+        arrays = [
+            pa.array(columns[0], type=pa.string()).dictionary_encode(),
+            pa.array(columns[1], type=pa.string()).cast(pa.date32()),
+            pa.array(columns[2], type=pa.float64()),
+            pa.array(columns[3], type=pa.float64()),
+            pa.array(columns[4], type=pa.string()).dictionary_encode(),
+            pa.array(columns[5], type=pa.string()),
+            pa.array(columns[6], type=pa.string()),
+            pa.array(columns[7], type=pa.string()).dictionary_encode(),
+        ]
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    def _write(self, pa, table, month: str) -> str:
+        """寫入單一月份的封存檔案（先寫暫存檔再置換，避免留下不完整的檔案）"""
+        path = self.partition_path(month)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        if self.fmt == 'parquet':
+            import pyarrow.parquet as pq
+            pq.write_table(table, tmp_path, compression=self.compression)
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=self.compression)
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+                    writer.write_table(table)
+        os.replace(tmp_path, path)
+        return path
+
+    def _read(self, pa, path: str):
+        """以記憶體映射方式讀取單一封存檔案"""
+        if self.fmt == 'parquet':
+            import pyarrow.parquet as pq
+            return pq.read_table(path, memory_map=True)
+        # 資料緩衝區直接引用映射的記憶體，映射會隨 Table 存續
+        return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+
+def _next_month(month: str) -> str:
+    """
+    取得下個月第一天的日期字串
+
+    Args:
+        month: 月份（YYYY-MM）
+
+    Returns:
+        str: 下個月第一天（YYYY-MM-DD）
+    """
+    year, mon = int(month[:4]), int(month[5:7])
+    year, mon = (year + 1, 1) if mon == 12 else (year, mon + 1)
+    return f"{year:04d}-{mon:02d}-01"
+
+
+if __name__ == "__main__":
+    # 封存上個月以前的資料
+    from datetime import date
+
+    archive = WeatherArchive()
+    current_month = date.today().strftime("%Y-%m")
+    archive.export_months(before_month=current_month)
+    print(f"已封存月份: {archive.archived_months()}")
@@ -0,0 +1,276 @@
+"""
+行程內共用快取模組
+提供具容量上限、有效期限（TTL）與 LRU 淘汰的快取，並合併同時發生的相同請求
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from metrics import metrics
+
+
+class _Flight:
+    """進行中的載入工作，供同時請求相同鍵的呼叫端等待"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    """
+    執行緒安全的 LRU + TTL 快取
+
+    相同鍵同時有多個呼叫端請求時，只有第一個呼叫端會執行載入函式，
+    其餘呼叫端等待並共用同一份結果（single-flight）。
+    """
+
+    def __init__(self, maxsize: int = 256, ttl_seconds: float = 600):
+        """
+        初始化快取
+
+        Args:
+            maxsize: 最多保存的項目數，超過時淘汰最久未使用者
+            ttl_seconds: 預設有效期限（秒）
+        """
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+        self.stale_hits = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        取得未過期的快取值
+
+        Args:
+            key: 快取鍵
+
+        Returns:
+            Any: 快取值，不存在或已過期則返回 None
+        """
+        with self._lock:
+            value = self._get_locked(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """
+        取得快取值（包含已過期者），不影響統計與 LRU 順序
+
+        Args:
+            key: 快取鍵
+
+        Returns:
+            Any: 快取值，不存在則返回 None
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            return entry[1] if entry else None
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """
+        寫入快取值
+
+        Args:
+            key: 快取鍵
+            value: 快取值
+            ttl_seconds: 有效期限（秒），未提供則使用預設值
+        """
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """
+        移除快取值
+
+        Args:
+            key: 要移除的鍵，未提供則清空整個快取
+        """
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def invalidate_prefix(self, prefix: tuple):
+        """
+        移除所有以指定 tuple 開頭的鍵
+
+        Args:
+            prefix: 鍵的前綴，如 ('temperature', 'F-A0010-001')
+        """
+        size = len(prefix)
+        with self._lock:
+            for key in [k for k in self._data if isinstance(k, tuple) and k[:size] == prefix]:
+                del self._data[key]
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        ttl_seconds: Optional[float] = None,
+        stale_seconds: float = 0
+    ) -> Any:
+        """
+        取得快取值，不存在或已過期時呼叫 loader 載入
+
+        同一鍵同時只會有一個 loader 在執行；loader 返回 None 時不寫入快取。
+        過期未超過 stale_seconds 的值會立即返回，並在背景執行緒重新載入
+        （stale-while-revalidate）。
+
+        Args:
+            key: 快取鍵
+            loader: 載入函式
+            ttl_seconds: 有效期限（秒），未提供則使用預設值
+            stale_seconds: 過期後仍可先行返回舊值的秒數
+
+        Returns:
+            Any: 快取值或 loader 的結果
+        """
+        with self._lock:
+            value = self._get_locked(key)
+            if value is not None:
+                self.hits += 1
+                return value
+
+            stale = self._get_stale_locked(key, stale_seconds)
+            if stale is not None:
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    flight = self._inflight[key] = _Flight()
+                    threading.Thread(
+                        target=self._load, args=(key, loader, ttl_seconds, flight, True),
+                        name="cache-revalidate", daemon=True
+                    ).start()
+                return stale
+
+            self.misses += 1
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = self._inflight[key] = _Flight()
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        return self._load(key, loader, ttl_seconds, flight)
+
+    def _load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        ttl_seconds: Optional[float],
+        flight: _Flight,
+        background: bool = False
+    ) -> Any:
+        """執行 loader 並通知等待中的呼叫端"""
+        try:
+            flight.value = loader()
+            if flight.value is not None:
+                self.set(key, flight.value, ttl_seconds)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            if background:
+                # 背景重新載入失敗時保留舊值，不向外拋出
+                print(f"✗ 背景更新快取失敗: {e}")
+                return None
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        取得快取統計資訊
+
+        Returns:
+            Dict: 命中、未命中、淘汰、合併請求、返回舊值次數與目前項目數
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'evictions': self.evictions,
+                'coalesced': self.coalesced,
+                'stale_hits': self.stale_hits,
+                'size': len(self._data),
+                'maxsize': self.maxsize
+            }
+
+    def _get_stale_locked(self, key: Hashable, stale_seconds: float) -> Optional[Any]:
+        """在持有鎖的情況下取得過期未超過 stale_seconds 的值"""
+        entry = self._data.get(key)
+        if entry is None or stale_seconds <= 0:
+            return None
+        expires_at, value = entry
+        if expires_at + stale_seconds <= time.monotonic():
+            return None
+        return value
+
+    def _get_locked(self, key: Hashable) -> Optional[Any]:
+        """在持有鎖的情況下取得未過期的值並更新 LRU 順序"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            return None
+        self._data.move_to_end(key)
+        return value
+
+
+# 行程內所有 WeatherAPIClient 共用的快取
+shared_cache = TTLCache(maxsize=256, ttl_seconds=600)
+
+# 輸出效能指標時一併提供共用快取的統計：累計次數為計數器，其餘為目前數值
+_CACHE_COUNTERS = {
+    'hits': "共用快取命中次數",
+    'misses': "共用快取未命中次數",
+    'evictions': "共用快取因容量上限淘汰的項目數",
+    'coalesced': "等待其他呼叫端載入而合併的請求數",
+    'stale_hits': "過期後先行返回舊值的次數",
+}
+_CACHE_GAUGES = {
+    'hit_rate': "共用快取命中率",
+    'size': "共用快取目前項目數",
+    'maxsize': "共用快取容量上限",
+}
+for _name, _help in _CACHE_COUNTERS.items():
+    metrics.describe(f"weather_cache_{_name}_total", _help)
+for _name, _help in _CACHE_GAUGES.items():
+    metrics.describe(f"weather_cache_{_name}", _help)
+
+
+def _cache_stats(names: Dict[str, str], suffix: str = "") -> Dict[str, Any]:
+    """取得共用快取統計中指定項目的指標數值"""
+    stats = shared_cache.stats()
+    return {f"weather_cache_{name}{suffix}": stats[name] for name in names}
+
+
+metrics.add_collector(lambda: _cache_stats(_CACHE_COUNTERS, "_total"), kind='counter')
+metrics.add_collector(lambda: _cache_stats(_CACHE_GAUGES))
@@ -3,14 +3,49 @@
 可重用的 API 呼叫類別，供 CLI 和 Web UI 使用
 """
 import os
-import requests
-import json
-import urllib3
-from typing import Optional, List, Dict, Any
+import hashlib
+import threading
+import time
+from typing import Optional, List, Dict, Any, Iterator, Iterable
 from database import WeatherDatabase
+from datasets import get_dataset, location_name as record_location_name
+from forecast_snapshot import ForecastSnapshot, parse_temperature
+from forecast_table import ForecastTable
+from weather_records import WeatherBatch, WeatherRecord
+from json_stream import iter_json_array
+from payload_decoder import PayloadSchemaError, decode_payload
+from weather_cache import shared_cache
+from resilience import CircuitOpenError, RetryPolicy, get_breaker
+from metrics import metrics
 
-# 停用 SSL 警告
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+metrics.describe('weather_api_request_seconds', "向中央氣象署 API 下載資料的耗時（秒，含重試）")
+metrics.describe('weather_api_parse_seconds', "API 回應 JSON 解碼的耗時（秒）")
+metrics.describe('weather_api_download_bytes_total', "自中央氣象署 API 下載的位元組數")
+metrics.describe('weather_api_fetch_total', "API 下載次數，依結果（changed、unchanged、not_modified、error 等）區分")
+metrics.describe('weather_snapshot_build_seconds', "由 API 資料建立預報快照的耗時（秒）")
+metrics.describe('weather_temperature_lookup_seconds', "查詢單一地點溫度資訊的耗時（秒）")
+metrics.describe('weather_temperature_cache_total', "地點溫度資訊的共用快取命中與未命中次數")
+metrics.describe('weather_temperature_source_total', "地點溫度資訊的來源次數（database、snapshot、database_fallback）")
+
+_ssl_warnings_disabled = False
+
+
+def _requests():
+    """
+    延遲載入 requests（requests/urllib3 佔本模組匯入時間的大部分），
+    只在實際發送請求時才載入
+    
+    Returns:
+        module: requests 模組
+    """
+    global _ssl_warnings_disabled
+    import requests
+    if not _ssl_warnings_disabled:
+        import urllib3
+        # 停用 SSL 警告
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        _ssl_warnings_disabled = True
+    return requests
 
 
 class WeatherAPIClient:
@@ -18,45 +53,204 @@ class WeatherAPIClient:
     
     BASE_URL = "https://opendata.cwa.gov.tw/fileapi/v1/opendataapi"
     DEFAULT_API_KEY = "CWA-EED186C4-DA85-4467-8C6F-F87B1111AA87"
+    DATASET_ID = "F-A0010-001"
+    # 單次嘗試的連線與讀取逾時（秒）
+    CONNECT_TIMEOUT = 5
+    READ_TIMEOUT = 20
+    # 每次呼叫（含重試與退避等待）等待上游的總時間上限（秒）
+    REQUEST_BUDGET = 15
+    # 以 msgspec/orjson 解碼（未安裝時自動使用標準函式庫）
+    FAST_DECODE = True
     
-    def __init__(self, api_key: Optional[str] = None, use_database: bool = True):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        use_database: bool = True,
+        snapshot_ttl_minutes: int = 10,
+        use_shared_cache: bool = True,
+        stale_while_revalidate_minutes: int = 0,
+        dataset_id: Optional[str] = None
+    ):
         """
         初始化 API 客戶端
         
         Args:
             api_key: CWA API 授權金鑰，若未提供則從環境變數讀取
             use_database: 是否啟用資料庫快取功能
+            snapshot_ttl_minutes: 記憶體內預報快照的有效期限（分鐘）
+            use_shared_cache: 是否與同一行程內的其他客戶端共用快取（weather_cache.shared_cache）
+            stale_while_revalidate_minutes: 共用快取過期後仍先返回舊快照、並在背景更新的分鐘數
+            dataset_id: 資料集代碼（如 F-C0032-001、F-D0047-061），未提供則為 DATASET_ID
+        
+        Raises:
+            KeyError: 不支援的資料集
         """
         self.api_key = api_key or os.getenv("CWA_API_KEY", self.DEFAULT_API_KEY)
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'WeatherCrawler/1.0'
-        })
+        # 網址、斷路器、快取鍵與監控標籤皆以資料集代碼區分
+        self.dataset = get_dataset(dataset_id or self.DATASET_ID)
+        self._session = None
         self.use_database = use_database
         self.db = WeatherDatabase() if use_database else None
+        self.snapshot_ttl_minutes = snapshot_ttl_minutes
+        self.use_shared_cache = use_shared_cache
+        self.stale_while_revalidate_minutes = stale_while_revalidate_minutes
+        # 重試策略與同一資料集共用的斷路器
+        self.retry_policy = RetryPolicy()
+        self.breaker = get_breaker(self.dataset_id)
+        self._snapshot: Optional[ForecastSnapshot] = None
+        # 下載、比對驗證資訊與置換快照須整段執行，避免背景排程、背景重新載入與請求執行緒交錯
+        self._fetch_lock = threading.RLock()
+        # 條件式下載：上次回應的驗證資訊與解析結果
+        self._validators: Dict[str, Optional[str]] = {}
+        self._last_payload: Optional[Dict[str, Any]] = None
+        # _last_payload 是否為依結構解碼（只含快照使用的欄位）的結果
+        self._last_payload_typed = False
+        self.last_fetch_changed = True
+    
+    @property
+    def dataset_id(self) -> str:
+        """此客戶端使用的資料集代碼（類別屬性 DATASET_ID 為預設值）"""
+        return self.dataset.dataset_id
+    
+    @property
+    def session(self):
+        """HTTP Session，第一次使用時才建立"""
+        if self._session is None:
+            self._session = _requests().Session()
+            self._session.headers.update({
+                'User-Agent': 'WeatherCrawler/1.0'
+            })
+        return self._session
+    
+    @session.setter
+    def session(self, value):
+        self._session = value
+    
+    def _request(self, url: str, params: Dict[str, str], headers: Optional[Dict[str, str]] = None, stream: bool = False):
+        """
+        發送 GET 請求，逾時、連線錯誤與 5xx/429 回應以指數退避重試
+        
+        整個呼叫最多等待 REQUEST_BUDGET 秒：每次嘗試的逾時以剩餘時間為上限，
+        剩餘時間不足以等待下一次重試時直接拋出最後一次的例外。
+        連續失敗達門檻時斷路器開啟，期間直接拋出 CircuitOpenError 而不呼叫上游。
+        
+        Returns:
+            requests.Response: 回應物件（4xx 錯誤由呼叫端處理）
+        """
+        requests = _requests()
+        deadline = time.monotonic() + self.REQUEST_BUDGET
+        
+        def attempt():
+            remaining = max(0.1, deadline - time.monotonic())
+            response = self.session.get(
+                url, params=params, headers=headers,
+                timeout=(min(self.CONNECT_TIMEOUT, remaining), min(self.READ_TIMEOUT, remaining)),
+                verify=False, stream=stream
+            )
+            if response.status_code >= 500 or response.status_code == 429:
+                response.close()
+                response.raise_for_status()
+            return response
+        
+        return self.retry_policy.call(
+            attempt,
+            breaker=self.breaker,
+            retry_on=(
+                requests.exceptions.Timeout,
+                requests.exceptions.ConnectionError,
+                requests.exceptions.HTTPError
+            ),
+            deadline=deadline
+        )
     
     def fetch_weather_data(self) -> Optional[Dict[str, Any]]:
         """
         取得完整的天氣預報資料
         
+        若曾成功下載，會帶上 If-None-Match / If-Modified-Since 條件式標頭；
+        伺服器回應 304 或內容雜湊值未變時，直接返回上次解析的結果而不重新解析，
+        並將 last_fetch_changed 設為 False。
+        
+        Returns:
+            Dict: 完整的 JSON 資料（保留所有欄位，與安裝的解碼器無關），失敗則返回 None
+        """
+        with self._fetch_lock:
+            return self._fetch_payload(typed=False)
+    
+    def _fetch_payload(self, typed: bool) -> Optional[Dict[str, Any]]:
+        """
+        下載並解碼天氣預報資料（條件式下載與重複使用上次結果的規則同 fetch_weather_data）
+        
+        Args:
+            typed: 是否依資料集結構解碼（只保留快照使用的欄位，供 fetch_snapshot 使用）
+        
         Returns:
-            Dict: 完整的 JSON 資料，失敗則返回 None
+            Dict: 解碼後的資料，失敗則返回 None
         """
-        url = f"{self.BASE_URL}/F-A0010-001"
+        # 上次的結果只含部分欄位時，不能作為完整資料重複使用
+        cached = self._last_payload if typed or not self._last_payload_typed else None
+        url = f"{self.BASE_URL}/{self.dataset_id}"
         params = {
             "Authorization": self.api_key,
             "downloadType": "WEB",
             "format": "JSON"
         }
         
+        headers = {}
+        if cached is not None:
+            if self._validators.get('etag'):
+                headers['If-None-Match'] = self._validators['etag']
+            if self._validators.get('last_modified'):
+                headers['If-Modified-Since'] = self._validators['last_modified']
+        
+        requests = _requests()
+        dataset = self.dataset_id
+        result = 'error'
         try:
-            response = self.session.get(url, params=params, timeout=30, verify=False)
+            with metrics.timer('weather_api_request_seconds', dataset=dataset):
+                response = self._request(url, params, headers=headers)
+                raw = response.content
+            
+            if response.status_code == 304 and cached is not None:
+                result = 'not_modified'
+                self.last_fetch_changed = False
+                return cached
+            
             response.raise_for_status()
-            data = response.json()
+            metrics.inc('weather_api_download_bytes_total', len(raw), dataset=dataset)
+            
+            # 伺服器未提供驗證資訊時，以內容雜湊值判斷是否變更
+            content_hash = hashlib.sha256(raw).hexdigest()
+            unchanged = (
+                self._last_payload is not None
+                and content_hash == self._validators.get('content_hash')
+            )
+            if unchanged and cached is not None:
+                data = cached
+            else:
+                with metrics.timer('weather_api_parse_seconds', dataset=dataset):
+                    data = decode_payload(raw, self.dataset, fast=self.FAST_DECODE, typed=typed)
+                self._last_payload_typed = typed
+            result = 'unchanged' if unchanged else 'changed'
+            
+            self._validators = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'content_hash': content_hash
+            }
+            self._last_payload = data
+            self.last_fetch_changed = not unchanged
             return data
             
+        except CircuitOpenError as e:
+            result = 'circuit_open'
+            print(f"⚠ 暫停呼叫 API: {e}")
+            return None
         except requests.exceptions.Timeout:
-            print(f"✗ API 請求逾時（超過 30 秒）")
+            print(
+                f"✗ API 請求逾時（單次連線 {self.CONNECT_TIMEOUT} 秒 / 讀取 {self.READ_TIMEOUT} 秒，"
+                f"總計 {self.REQUEST_BUDGET} 秒）"
+            )
             return None
         except requests.exceptions.HTTPError as e:
             print(f"✗ HTTP 錯誤: {e}")
@@ -64,47 +258,279 @@ class WeatherAPIClient:
         except requests.exceptions.RequestException as e:
             print(f"✗ 請求失敗: {e}")
             return None
-        except json.JSONDecodeError as e:
+        except PayloadSchemaError as e:
+            result = 'schema_error'
+            print(f"✗ {e}")
+            return None
+        except ValueError as e:
             print(f"✗ JSON 解析失敗: {e}")
             return None
         except Exception as e:
             print(f"✗ 未預期的錯誤: {e}")
             return None
+        finally:
+            metrics.inc('weather_api_fetch_total', dataset=dataset, result=result)
     
-    def get_locations(self) -> List[str]:
+    def fetch_raw(self) -> Optional[bytes]:
         """
-        取得所有可用地點的清單
+        下載完整資料的原始位元組，不解碼也不帶條件式標頭
+        
+        供多行程管線（crawl_pipeline）在子行程中解碼與擷取使用；
+        同樣經過重試策略與斷路器。
         
         Returns:
-            List[str]: 地點名稱清單，按字母順序排序
+            bytes: API 回應內容，失敗則返回 None
         """
-        data = self.fetch_weather_data()
-        if not data:
-            return []
+        url = f"{self.BASE_URL}/{self.dataset_id}"
+        params = {
+            "Authorization": self.api_key,
+            "downloadType": "WEB",
+            "format": "JSON"
+        }
         
+        requests = _requests()
+        dataset = self.dataset_id
+        result = 'error'
         try:
-            # 導航到 location 清單
-            root = data.get('cwaopendata', {})
-            resources = root.get('resources', {})
-            resource = resources.get('resource', {})
-            data_node = resource.get('data', {})
-            agr_forecasts = data_node.get('agrWeatherForecasts', {})
-            weather_forecasts = agr_forecasts.get('weatherForecasts', {})
-            locations = weather_forecasts.get('location', [])
+            with metrics.timer('weather_api_request_seconds', dataset=dataset):
+                response = self._request(url, params)
+                raw = response.content
+            response.raise_for_status()
+            metrics.inc('weather_api_download_bytes_total', len(raw), dataset=dataset)
+            result = 'changed'
+            return raw
             
-            if not locations:
-                print("⚠ 找不到地點資料，資料結構可能已變更")
-                return []
+        except CircuitOpenError as e:
+            result = 'circuit_open'
+            print(f"⚠ 暫停呼叫 API: {e}")
+            return None
+        except requests.exceptions.RequestException as e:
+            print(f"✗ 請求失敗（{dataset}）: {e}")
+            return None
+        finally:
+            metrics.inc('weather_api_fetch_total', dataset=dataset, result=result)
+    
+    # 串流下載時每次讀取的位元組數
+    STREAM_CHUNK_SIZE = 64 * 1024
+    
+    def iter_locations(self, fields: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        以串流方式逐一取得 location 節點，邊下載邊解析
+        
+        不建立完整的物件樹，峰值記憶體只與單一地點的資料量有關；
+        呼叫端停止迭代時會立即關閉連線，不再下載剩餘資料。
+        依縣市分組的資料集（F-D0047）只串流第一個分組，地點名稱不含縣市。
+        
+        Args:
+            fields: 只保留的欄位名稱（如 ['locationName']），未提供則保留全部
+        
+        Yields:
+            Dict: 單一地點的 JSON 節點
+        """
+        url = f"{self.BASE_URL}/{self.dataset_id}"
+        params = {
+            "Authorization": self.api_key,
+            "downloadType": "WEB",
+            "format": "JSON"
+        }
+        if not self.dataset.stream_pattern:
+            print(f"⚠ 資料集 {self.dataset_id} 不支援串流解析")
+            return
+        keep = set(fields) if fields is not None else None
+        requests = _requests()
+        
+        try:
+            response = self._request(url, params, stream=True)
+        except (CircuitOpenError, requests.exceptions.RequestException) as e:
+            print(f"✗ 請求失敗: {e}")
+            return
+        
+        try:
+            response.raise_for_status()
+            chunks = self._count_bytes(response.iter_content(chunk_size=self.STREAM_CHUNK_SIZE))
+            for loc in iter_json_array(chunks, self.dataset.stream_pattern):
+                if keep is not None:
+                    loc = {key: value for key, value in loc.items() if key in keep}
+                yield loc
+        except requests.exceptions.RequestException as e:
+            print(f"✗ 串流下載失敗: {e}")
+        except ValueError as e:
+            print(f"✗ 串流解析失敗: {e}")
+        finally:
+            response.close()
+    
+    def _count_bytes(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """逐塊轉送串流資料並累計下載位元組數"""
+        for chunk in chunks:
+            metrics.inc('weather_api_download_bytes_total', len(chunk), dataset=self.dataset_id)
+            yield chunk
+    
+    def stream_locations(self) -> List[str]:
+        """
+        以串流方式取得所有地點名稱，只保留 locationName 欄位
+        
+        Returns:
+            List[str]: 地點名稱清單，按字母順序排序
+        """
+        names = [
+            record_location_name(loc)
+            for loc in self.iter_locations(fields=['locationName', 'LocationName'])
+        ]
+        return sorted(name for name in names if name)
+    
+    def stream_temperature_info(self, location_name: str) -> Optional[Dict[str, Any]]:
+        """
+        以串流方式取得特定地點的溫度資訊，找到該地點後立即停止下載
+        
+        Args:
+            location_name: 地點名稱（如「臺北市」）
+        
+        Returns:
+            Dict: 包含溫度資訊的字典，找不到則返回 None
+        """
+        for loc in self.iter_locations(fields=self.dataset.summary_fields):
+            if record_location_name(loc) == location_name:
+                return self.dataset.summarize(location_name, loc)
+        
+        print(f"✗ 找不到地點: {location_name}")
+        return None
+    
+    def fetch_snapshot(self) -> Optional[ForecastSnapshot]:
+        """
+        下載並解析一次完整資料，建立新的預報快照
+        
+        資料未變更時返回既有快照（不重新解析）。同一客戶端同時只會有一個執行緒下載。
+        
+        Returns:
+            ForecastSnapshot: 預報快照，失敗則返回 None
+        """
+        with self._fetch_lock:
+            data = self._fetch_payload(typed=True)
+            if not data:
+                return None
             
-            # 提取地點名稱並排序
-            location_names = [loc.get('locationName', '') for loc in locations if loc.get('locationName')]
-            return sorted(location_names)
+            # 資料未變更時沿用既有快照，更新確認時間並允許重新寫入資料庫以更新 updated_at
+            if not self.last_fetch_changed and self._snapshot is not None:
+                self._snapshot.confirm()
+                return self._snapshot
             
+            try:
+                with metrics.timer('weather_snapshot_build_seconds', dataset=self.dataset_id):
+                    snapshot = ForecastSnapshot(data, dataset=self.dataset)
+                snapshot.validators = dict(self._validators)
+                self._snapshot = snapshot
+                return snapshot
+            except Exception as e:
+                print(f"✗ 建立預報快照時發生錯誤: {e}")
+                return None
+    
+    def get_snapshot(self, max_age_minutes: Optional[int] = None) -> Optional[ForecastSnapshot]:
+        """
+        取得目前的預報快照，過期或尚未下載時才重新取得
+        
+        Args:
+            max_age_minutes: 快照有效期限（分鐘），未提供則使用 snapshot_ttl_minutes
+        
+        Returns:
+            ForecastSnapshot: 預報快照，失敗則返回 None
+        """
+        ttl = self.snapshot_ttl_minutes if max_age_minutes is None else max_age_minutes
+        if self._snapshot is not None and not self._snapshot.is_stale(ttl):
+            return self._snapshot
+        if not self.use_shared_cache:
+            return self.fetch_snapshot() or self._snapshot
+        
+        # 由共用快取提供；同時有多個呼叫端時只會下載一次
+        key = self._snapshot_cache_key()
+        snapshot = shared_cache.get_or_load(
+            key,
+            lambda: self._refresh_shared_snapshot(key),
+            ttl_seconds=ttl * 60,
+            stale_seconds=self.stale_while_revalidate_minutes * 60
+        )
+        if snapshot is not None:
+            self._adopt_snapshot(snapshot)
+            return snapshot
+        
+        # 上游失敗時沿用最後一份成功的快照（不寫回快取，恢復後會立即重新下載）
+        last_good = shared_cache.peek(key) or self._snapshot
+        if last_good is not None:
+            print(f"⚠ 使用 {last_good.fetched_at:%Y-%m-%d %H:%M:%S} 的快照資料")
+        return last_good
+    
+    def refresh_snapshot(self) -> Optional[ForecastSnapshot]:
+        """
+        立即重新取得快照（條件式下載）並更新共用快取，供背景排程預先更新使用
+        
+        Returns:
+            ForecastSnapshot: 預報快照，失敗則返回 None
+        """
+        if not self.use_shared_cache:
+            return self.fetch_snapshot()
+        
+        key = self._snapshot_cache_key()
+        with self._fetch_lock:
+            snapshot = self._refresh_shared_snapshot(key)
+            changed = self.last_fetch_changed
+        if snapshot is not None:
+            shared_cache.set(key, snapshot, ttl_seconds=self.snapshot_ttl_minutes * 60)
+            if changed:
+                # 預報已更新，讓各地點的溫度快取重新由新快照取得
+                shared_cache.invalidate_prefix(('temperature', self.dataset_id))
+        return snapshot
+    
+    def _snapshot_cache_key(self) -> tuple:
+        """取得目前資料集與金鑰在共用快取中的鍵"""
+        return ('snapshot', self.dataset_id, self.api_key)
+    
+    def _refresh_shared_snapshot(self, key: tuple) -> Optional[ForecastSnapshot]:
+        """
+        重新取得共用快取中的快照，沿用過期快照的驗證資訊進行條件式下載
+        
+        Args:
+            key: 共用快取鍵
+        
+        Returns:
+            ForecastSnapshot: 預報快照，失敗則返回 None
+        """
+        with self._fetch_lock:
+            stale = shared_cache.peek(key)
+            if stale is not None and stale is not self._snapshot:
+                self._adopt_snapshot(stale)
+            return self.fetch_snapshot()
+    
+    def _adopt_snapshot(self, snapshot: ForecastSnapshot):
+        """
+        將其他客戶端下載的快照設為目前快照
+        
+        Args:
+            snapshot: 預報快照
+        """
+        with self._fetch_lock:
+            self._snapshot = snapshot
+            self._last_payload = snapshot.payload
+            # 共用快取中的快照由 fetch_snapshot 建立，資料為依結構解碼的結果
+            self._last_payload_typed = True
+            self._validators = dict(snapshot.validators)
+    
+    def get_locations(self) -> List[str]:
+        """
+        取得所有可用地點的清單
+        
+        Returns:
+            List[str]: 地點名稱清單，按字母順序排序
+        """
+        snapshot = self.get_snapshot()
+        if not snapshot:
+            return sorted(item['location'] for item in self._fallback_all_latest())
+        
+        try:
+            return snapshot.get_locations()
         except Exception as e:
             print(f"✗ 提取地點清單時發生錯誤: {e}")
             return []
     
-    def get_temperature_info(self, location_name: str) -> Optional[Dict[str, Any]]:
+    def get_temperature_info(self, location_name: str) -> Optional[WeatherRecord]:
         """
         取得特定地點的溫度資訊
         
@@ -112,86 +538,77 @@ class WeatherAPIClient:
             location_name: 地點名稱（如「臺北市」）
         
         Returns:
-            Dict: 包含溫度資訊的字典，失敗則返回 None
-            {
-                'location': str,
-                'date': str,
-                'max_temp': float or None,
-                'min_temp': float or None,
-                'weather': str
-            }
+            WeatherRecord: 溫度資訊，失敗則返回 None；欄位可用屬性或 record['max_temp'] 存取
+            (
+                location: str,
+                date: str,
+                max_temp: float or None,
+                min_temp: float or None,
+                weather: str,
+                updated_at: str or None（僅資料庫來源）
+            )
+        """
+        with metrics.timer('weather_temperature_lookup_seconds'):
+            if self.use_shared_cache:
+                key = ('temperature', self.dataset_id, location_name)
+                loaded = []
+                
+                def loader():
+                    loaded.append(True)
+                    return self._load_temperature_info(location_name)
+                
+                result = shared_cache.get_or_load(
+                    key, loader, ttl_seconds=self.snapshot_ttl_minutes * 60
+                )
+                metrics.inc('weather_temperature_cache_total', result='miss' if loaded else 'hit')
+            else:
+                result = self._load_temperature_info(location_name)
+            
+            # 上游無法使用時改由資料庫提供最後一筆資料（不寫入快取）
+            if result is None and self._snapshot is None and self.use_database and self.db:
+                result = self.db.get_latest_data(location_name, self.dataset_id)
+                if result:
+                    metrics.inc('weather_temperature_source_total', source='database_fallback')
+                    print(f"⚠ 使用資料庫中的最後資料: {location_name}（更新於 {result['updated_at']}）")
+        return result
+    
+    def _load_temperature_info(self, location_name: str) -> Optional[WeatherRecord]:
+        """
+        由資料庫快取或預報快照取得特定地點的溫度資訊
+        
+        Args:
+            location_name: 地點名稱
+        
+        Returns:
+            WeatherRecord: 溫度資訊，失敗則返回 None
         """
         # 如果啟用資料庫，先檢查快取
         if self.use_database and self.db:
-            if self.db.is_data_fresh(location_name, ttl_minutes=10):
-                cached_data = self.db.get_latest_data(location_name)
-                if cached_data:
-                    print(f"✓ 從資料庫快取載入: {location_name}")
-                    return cached_data
-        
-        # 從 API 取得資料
-        data = self.fetch_weather_data()
-        if not data:
+            cached_data = self.db.get_fresh_data(location_name, ttl_minutes=10, dataset=self.dataset_id)
+            if cached_data:
+                metrics.inc('weather_temperature_source_total', source='database')
+                print(f"✓ 從資料庫快取載入: {location_name}")
+                return cached_data
+        
+        # 從快照取得資料
+        snapshot = self.get_snapshot()
+        if not snapshot:
             return None
         
         try:
-            # 導航到 location 清單
-            root = data.get('cwaopendata', {})
-            resources = root.get('resources', {})
-            resource = resources.get('resource', {})
-            data_node = resource.get('data', {})
-            agr_forecasts = data_node.get('agrWeatherForecasts', {})
-            weather_forecasts = agr_forecasts.get('weatherForecasts', {})
-            locations = weather_forecasts.get('location', [])
-            
-            # 找到指定的地點
-            target_location = None
-            for loc in locations:
-                if loc.get('locationName') == location_name:
-                    target_location = loc
-                    break
-            
-            if not target_location:
-                print(f"✗ 找不到地點: {location_name}")
+            result = snapshot.get_temperature_info(location_name)
+            if not result:
                 return None
+            metrics.inc('weather_temperature_source_total', source='snapshot')
             
-            # 提取溫度資訊
-            elements = target_location.get('weatherElements', {})
-            
-            # 最高溫
-            max_t_data = elements.get('MaxT', {}).get('daily', [])
-            first_day_max = max_t_data[0] if max_t_data else {}
-            max_temp_str = first_day_max.get('temperature', '-')
-            max_temp = self._parse_temperature(max_temp_str)
-            
-            # 最低溫
-            min_t_data = elements.get('MinT', {}).get('daily', [])
-            first_day_min = min_t_data[0] if min_t_data else {}
-            min_temp_str = first_day_min.get('temperature', '-')
-            min_temp = self._parse_temperature(min_temp_str)
-            
-            # 日期
-            date = first_day_max.get('dataDate', '-')
-            
-            # 天氣現象
-            wx_data = elements.get('Wx', {}).get('daily', [])
-            first_day_wx = wx_data[0] if wx_data else {}
-            weather = first_day_wx.get('weather', '-')
-            
-            result = {
-                'location': location_name,
-                'date': date,
-                'max_temp': max_temp,
-                'min_temp': min_temp,
-                'weather': weather
-            }
-            
-            # 儲存到資料庫
-            if self.use_database and self.db:
-                self.db.insert_weather_data(
-                    location_name, date, max_temp, min_temp, weather
-                )
-                print(f"✓ 已儲存到資料庫: {location_name}")
+            # 儲存到資料庫（同一份快照的資料只寫入一次）
+            if self.use_database and self.db and result['location'] not in snapshot.persisted_locations:
+                snapshot.persisted_locations.add(result['location'])
+                if self.db.insert_weather_data(
+                    result['location'], result['date'], result['max_temp'],
+                    result['min_temp'], result['weather'], self.dataset_id
+                ):
+                    print(f"✓ 已儲存到資料庫: {location_name}")
             
             return result
             
@@ -199,80 +616,101 @@ class WeatherAPIClient:
             print(f"✗ 提取溫度資訊時發生錯誤: {e}")
             return None
     
-    def get_all_locations_data(self) -> List[Dict[str, Any]]:
+    def get_all_locations_data(self) -> WeatherBatch:
         """
         取得所有地點的溫度資訊
         
         Returns:
-            List[Dict]: 包含所有地點溫度資訊的列表
+            WeatherBatch: 所有地點的溫度資訊（可如列表般迭代出 WeatherRecord），失敗則為空批次
         """
-        data = self.fetch_weather_data()
-        if not data:
-            return []
+        snapshot = self.get_snapshot()
+        if not snapshot:
+            return self._fallback_all_latest()
         
-        results = []
         try:
-            # 導航到 location 清單
-            root = data.get('cwaopendata', {})
-            resources = root.get('resources', {})
-            resource = resources.get('resource', {})
-            data_node = resource.get('data', {})
-            agr_forecasts = data_node.get('agrWeatherForecasts', {})
-            weather_forecasts = agr_forecasts.get('weatherForecasts', {})
-            locations = weather_forecasts.get('location', [])
+            results = snapshot.get_all_locations_data()
             
-            for loc in locations:
-                location_name = loc.get('locationName')
-                if not location_name:
-                    continue
-                    
-                # 提取溫度資訊
-                elements = loc.get('weatherElements', {})
-                
-                # 最高溫
-                max_t_data = elements.get('MaxT', {}).get('daily', [])
-                first_day_max = max_t_data[0] if max_t_data else {}
-                max_temp_str = first_day_max.get('temperature', '-')
-                max_temp = self._parse_temperature(max_temp_str)
-                
-                # 最低溫
-                min_t_data = elements.get('MinT', {}).get('daily', [])
-                first_day_min = min_t_data[0] if min_t_data else {}
-                min_temp_str = first_day_min.get('temperature', '-')
-                min_temp = self._parse_temperature(min_temp_str)
-                
-                # 日期
-                date = first_day_max.get('dataDate', '-')
-                
-                # 天氣現象
-                wx_data = elements.get('Wx', {}).get('daily', [])
-                first_day_wx = wx_data[0] if wx_data else {}
-                weather = first_day_wx.get('weather', '-')
-                
-                result_item = {
-                    'location': location_name,
-                    'date': date,
-                    'max_temp': max_temp,
-                    'min_temp': min_temp,
-                    'weather': weather
-                }
-                results.append(result_item)
-                
-                # 儲存到資料庫
-                if self.use_database and self.db:
-                    self.db.insert_weather_data(
-                        location_name, date, max_temp, min_temp, weather
+            # 在單一交易中批次儲存到資料庫（同一份快照的資料只寫入一次）
+            pending = [item for item in results if item['location'] not in snapshot.persisted_locations]
+            if self.use_database and self.db and pending:
+                counts = self.db.insert_many(pending, self.dataset_id)
+                if counts is not None:
+                    snapshot.persisted_locations.update(item['location'] for item in pending)
+                    print(
+                        f"✓ 已儲存 {len(pending)} 筆資料到資料庫"
+                        f"（新增 {counts['inserted']}、更新 {counts['updated']}、"
+                        f"未變更 {counts['unchanged']}）"
                     )
             
-            if self.use_database and self.db and results:
-                print(f"✓ 已儲存 {len(results)} 筆資料到資料庫")
+            # 同一份快照的完整多日預報也一併儲存
+            if self.use_database and self.db and not snapshot.forecast_persisted:
+                if self.db.insert_forecast(snapshot.forecast_table, snapshot.issue_time, self.dataset_id) >= 0:
+                    snapshot.forecast_persisted = True
             
             return results
             
         except Exception as e:
             print(f"✗ 提取所有地點資訊時發生錯誤: {e}")
-            return []
-
+            return WeatherBatch()
+    
+    def _fallback_all_latest(self) -> WeatherBatch:
+        """
+        上游無法使用時，由資料庫取得各地點最後一筆資料
+        
+        Returns:
+            WeatherBatch: 天氣資料，未啟用資料庫則為空批次
+        """
+        if not (self.use_database and self.db):
+            return WeatherBatch()
+        results = self.db.get_all_latest_data(self.dataset_id)
+        if results:
+            print(f"⚠ 使用資料庫中的最後資料: {len(results)} 個地點")
+        return results
+    
+    def get_all_locations_frame(self):
+        """
+        取得所有地點的溫度資訊（DataFrame 版本），並與 get_all_locations_data 一樣寫入資料庫
+        
+        Returns:
+            pandas.DataFrame: 欄位為 location、date、max_temp、min_temp、weather，失敗則為空的 DataFrame
+        """
+        import pandas as pd
+        
+        self.get_all_locations_data()
+        snapshot = self._snapshot
+        if not snapshot:
+            return pd.DataFrame(columns=['location', 'date', 'max_temp', 'min_temp', 'weather'])
+        return snapshot.get_all_locations_frame()
+    
+    def get_forecast(
+        self,
+        location_name: Optional[str] = None,
+        element: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> Optional[ForecastTable]:
+        """
+        取得多日、多要素預報
+        
+        Args:
+            location_name: 地點名稱，未提供則為所有地點
+            element: 天氣要素代碼（如 MaxT、MinT、Wx），未提供則為所有要素
+            start_date: 起始日期（含）
+            end_date: 結束日期（含）
+        
+        Returns:
+            ForecastTable: 欄位式預報資料表，失敗則返回 None
+        """
+        snapshot = self.get_snapshot()
+        if not snapshot:
+            return None
+        
+        try:
+            return snapshot.get_forecast(location_name, element, start_date, end_date)
+        except Exception as e:
+            print(f"✗ 提取預報資料時發生錯誤: {e}")
+            return None
+    
     def _parse_temperature(self, temp_str: str) -> Optional[float]:
         """
         解析溫度字串為浮點數
@@ -283,12 +721,7 @@ class WeatherAPIClient:
         Returns:
             float or None: 溫度數值，無效則返回 None
         """
-        if temp_str == '-' or not temp_str:
-            return None
-        try:
-            return float(temp_str)
-        except (ValueError, TypeError):
-            return None
+        return parse_temperature(temp_str)
 
 
 if __name__ == "__main__":
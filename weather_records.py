@@ -0,0 +1,289 @@
+"""
+天氣資料記錄型別
+WeatherRecord 為單一地點、單一日期的精簡記錄；WeatherBatch 為多筆記錄的欄位式容器，
+地點與日期經過 intern、天氣描述以字典編碼（代碼陣列＋類別清單）保存，溫度以 array('d') 保存。
+"""
+import math
+import sys
+from array import array
+from collections.abc import Mapping
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple, Union
+
+
+class WeatherRecord(Mapping):
+    """
+    單一地點、單一日期的天氣資料
+
+    以 __slots__ 保存欄位，不建立每筆記錄的字典；同時實作 Mapping，
+    相容原本的字典寫法：record['max_temp']、record.get('updated_at')、dict(record) 與 for key in record 皆可使用，
+    也可用屬性存取（record.max_temp）。
+    JSON 序列化時以 to_dict() 轉換，或傳入 json.dumps(record, default=json_default)。
+    """
+
+    __slots__ = ('location', 'date', 'max_temp', 'min_temp', 'weather', 'updated_at')
+    _fields = __slots__
+
+    def __init__(
+        self,
+        location: str,
+        date: str,
+        max_temp: Optional[float],
+        min_temp: Optional[float],
+        weather: Optional[str],
+        updated_at: Optional[str] = None
+    ):
+        self.location = location
+        self.date = date
+        self.max_temp = max_temp
+        self.min_temp = min_temp
+        self.weather = weather
+        self.updated_at = updated_at
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._fields:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, WeatherRecord):
+            return self.astuple() == other.astuple()
+        return Mapping.__eq__(self, other)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"WeatherRecord({fields})"
+
+    def __reduce__(self):
+        return type(self), self.astuple()
+
+    def astuple(self) -> Tuple:
+        """
+        依欄位順序取出值（可直接傳給 WeatherDatabase.insert_many）
+
+        Returns:
+            tuple: (location, date, max_temp, min_temp, weather, updated_at)
+        """
+        return tuple(getattr(self, name) for name in self._fields)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        轉換為字典（如需 JSON 序列化時使用）
+
+        Returns:
+            Dict: 欄位名稱 → 值
+        """
+        return {name: getattr(self, name) for name in self._fields}
+
+
+def json_default(obj: Any) -> Any:
+    """
+    json.dumps 的 default 參數：WeatherRecord 轉為物件、WeatherBatch 轉為物件陣列
+
+    Args:
+        obj: json 模組無法直接序列化的物件
+
+    Returns:
+        可序列化的值
+
+    Raises:
+        TypeError: 不支援的型別
+    """
+    if isinstance(obj, WeatherRecord):
+        return obj.to_dict()
+    if isinstance(obj, WeatherBatch):
+        return obj.to_records()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class _Dictionary:
+    """字典編碼的字串欄位：每列只存整數代碼，相同字串只存一份"""
+
+    __slots__ = ('codes', 'categories', '_index')
+
+    def __init__(self):
+        self.codes = array('i')
+        self.categories: List[Optional[str]] = []
+        self._index: Dict[Optional[str], int] = {}
+
+    def append(self, value: Optional[str]):
+        code = self._index.get(value)
+        if code is None:
+            code = len(self.categories)
+            self._index[value] = code
+            self.categories.append(sys.intern(value) if isinstance(value, str) else value)
+        self.codes.append(code)
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        return self.categories[self.codes[i]]
+
+    def values(self) -> List[Optional[str]]:
+        categories = self.categories
+        return [categories[code] for code in self.codes]
+
+
+class WeatherBatch:
+    """
+    欄位式天氣資料批次
+
+    可如 List[WeatherRecord] 一樣取長度、迭代、索引與切片，
+    但每列不建立獨立物件：地點、日期與更新時間經過 intern（重複值只佔一份記憶體），
+    天氣描述種類少、以字典編碼，溫度存於 array('d')（缺值為 NaN）。
+    """
+
+    COLUMNS = WeatherRecord._fields
+
+    def __init__(self, rows: Optional[Iterable] = None):
+        """
+        建立資料批次
+
+        Args:
+            rows: 初始資料列，可為 WeatherRecord、tuple 或字典
+        """
+        self.location: List[str] = []
+        self._weather = _Dictionary()
+        self.date: List[str] = []
+        self.max_temp = array('d')
+        self.min_temp = array('d')
+        self.updated_at: List[Optional[str]] = []
+        if rows is not None:
+            self.extend(rows)
+
+    def __len__(self) -> int:
+        return len(self.date)
+
+    def __repr__(self) -> str:
+        return f"WeatherBatch({len(self)} 筆)"
+
+    def append(
+        self,
+        location: str,
+        date: str,
+        max_temp: Optional[float],
+        min_temp: Optional[float],
+        weather: Optional[str],
+        updated_at: Optional[str] = None
+    ):
+        """
+        新增一筆資料
+
+        Args:
+            location: 地點名稱
+            date: 日期 (YYYY-MM-DD)
+            max_temp: 最高溫度，無則為 None
+            min_temp: 最低溫度，無則為 None
+            weather: 天氣現象描述
+            updated_at: 資料庫更新時間，無則為 None
+        """
+        self.location.append(sys.intern(location))
+        self._weather.append(weather)
+        self.date.append(sys.intern(date) if isinstance(date, str) else date)
+        self.max_temp.append(math.nan if max_temp is None else max_temp)
+        self.min_temp.append(math.nan if min_temp is None else min_temp)
+        self.updated_at.append(sys.intern(updated_at) if isinstance(updated_at, str) else updated_at)
+
+    def extend(self, rows: Iterable):
+        """
+        新增多筆資料
+
+        Args:
+            rows: WeatherRecord、依欄位順序排列的 tuple（5 或 6 欄）或字典
+        """
+        for row in rows:
+            if isinstance(row, Mapping):
+                self.append(*(row.get(column) for column in self.COLUMNS))
+            else:
+                self.append(*row)
+
+    def record(self, i: int) -> WeatherRecord:
+        """
+        取得單筆資料
+
+        Args:
+            i: 列索引
+
+        Returns:
+            WeatherRecord: 天氣資料
+        """
+        max_temp = self.max_temp[i]
+        min_temp = self.min_temp[i]
+        return WeatherRecord(
+            self.location[i],
+            self.date[i],
+            None if math.isnan(max_temp) else max_temp,
+            None if math.isnan(min_temp) else min_temp,
+            self._weather[i],
+            self.updated_at[i]
+        )
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return WeatherBatch(self.record(i) for i in range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.record(index)
+
+    def __iter__(self) -> Iterator[WeatherRecord]:
+        for i in range(len(self)):
+            yield self.record(i)
+
+    @property
+    def weather(self) -> List[Optional[str]]:
+        """各列的天氣現象描述"""
+        return self._weather.values()
+
+    def locations(self) -> List[str]:
+        """
+        取得批次中的地點
+
+        Returns:
+            List[str]: 不重複的地點名稱（依首次出現順序）
+        """
+        return list(dict.fromkeys(self.location))
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """
+        轉換為字典列表（如需 JSON 序列化時使用）
+
+        Returns:
+            List[Dict]: 每列一個字典
+        """
+        return [record.to_dict() for record in self]
+
+    def to_frame(self, columns: Optional[List[str]] = None):
+        """
+        轉換為 pandas DataFrame
+
+        location 轉為 category、date 與 updated_at 轉為 datetime64，
+        溫度為 float64（缺值為 NaN）。
+
+        Args:
+            columns: 要輸出的欄位，未提供則為 location、date、max_temp、min_temp、weather
+
+        Returns:
+            pandas.DataFrame: 資料表
+        """
+        import numpy as np
+        import pandas as pd
+
+        columns = list(columns or self.COLUMNS[:5])
+        data = {}
+        for column in columns:
+            if column == 'location':
+                data[column] = pd.Categorical(self.location)
+            elif column in ('date', 'updated_at'):
+                data[column] = pd.to_datetime(getattr(self, column), errors='coerce')
+            elif column in ('max_temp', 'min_temp'):
+                data[column] = np.array(getattr(self, column), dtype='float64')
+            else:
+                data[column] = self.weather
+        return pd.DataFrame(data, columns=columns)